@@ -0,0 +1,269 @@
+# export_neo4j_import.py
+# Generates node/relationship CSV files for `neo4j-admin database import full`
+# from the IFC property CSV, the lifecycle carbon items and the emission factors.
+#
+# Labels, ID spaces and relationship types follow docker/neo4j/init.cypher, so an
+# offline cold load yields the same graph shape as the transactional ETL:
+#   (:Asset)-[:HAS_CARBON_ITEM]->(:CarbonItem)-[:PART_OF_STAGE]->(:LifecycleStage)
+#   (:CarbonItem)-[:LINKED_TO_FACTOR]->(:EmissionFactor)
+#   (:ProvenanceActivity)-[:PROV_USED|PROV_GENERATED|PROV_ASSOCIATED_WITH]->(...)
+#
+# Usage (from TH2-integration/):
+#   python export_neo4j_import.py
+#   python export_neo4j_import.py --carbon ../docker/data/carbon_items.csv --factors factors.csv
+
+import argparse
+import csv
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ---------- Defaults ----------
+IFC_PROPERTIES_CSV = Path("generate_input_data/ifc/NTU_Campus_Properties.csv")
+CARBON_ITEMS_CSV = Path("../docker/data/carbon_items.csv")
+OUTPUT_DIR = Path("output")
+MANIFEST_NAME = "neo4j_import.csv"
+
+# Seed emission factors from init.cypher, used when no factor file is given
+SEED_FACTORS = [
+    {"id": "EF_ELEC_GRID", "name": "Electricity (grid)", "unit": "kgCO2e/kWh", "value": "0.5", "source": "demo"},
+    {"id": "EF_FILTER", "name": "HVAC filter", "unit": "kgCO2e/unit", "value": "12.3", "source": "demo"},
+]
+
+# BS EN 15978 lifecycle modules
+EN15978_MODULES = {
+    "A1": "Raw material supply", "A2": "Transport", "A3": "Manufacturing",
+    "A4": "Transport to site", "A5": "Construction installation",
+    "B1": "Use", "B2": "Maintenance", "B3": "Repair", "B4": "Replacement",
+    "B5": "Refurbishment", "B6": "Operational energy use", "B7": "Operational water use",
+    "C1": "Deconstruction", "C2": "Transport", "C3": "Waste processing", "C4": "Disposal",
+    "D": "Benefits beyond the system boundary",
+}
+
+AGENT_ID = "AGENT_ETL"
+
+# ---------- File layout (file name -> CSV header) ----------
+NODE_FILES = {
+    "assets": ["id:ID(Asset)", "name", "ifcType", "assetType", ":LABEL"],
+    "carbon_items": ["id:ID(CarbonItem)", "stage", "quantity:float", "unit", "description", ":LABEL"],
+    "lifecycle_stages": ["code:ID(LifecycleStage)", "name", "standard", ":LABEL"],
+    "emission_factors": ["id:ID(EmissionFactor)", "name", "unit", "value:float", "source", ":LABEL"],
+    "prov_activities": ["id:ID(ProvenanceActivity)", "name", "executedAt:datetime", "tool", ":LABEL"],
+    "prov_entities": ["id:ID(ProvenanceEntity)", "name", "entityType", "location", ":LABEL"],
+    "prov_agents": ["id:ID(ProvenanceAgent)", "name", "role", ":LABEL"],
+}
+REL_FILES = {
+    "rel_part_of_stage": [":START_ID(CarbonItem)", ":END_ID(LifecycleStage)", ":TYPE"],
+    "rel_linked_to_factor": [":START_ID(CarbonItem)", ":END_ID(EmissionFactor)", ":TYPE"],
+    "rel_has_carbon_item": [":START_ID(Asset)", ":END_ID(CarbonItem)", ":TYPE"],
+    "rel_prov_generated": [":START_ID(ProvenanceActivity)", ":END_ID(CarbonItem)", ":TYPE"],
+    "rel_prov_used": [":START_ID(ProvenanceActivity)", ":END_ID(ProvenanceEntity)", ":TYPE"],
+    "rel_prov_associated_with": [":START_ID(ProvenanceActivity)", ":END_ID(ProvenanceAgent)", ":TYPE"],
+}
+
+
+# ---------- Helpers ----------
+def entity_id(path):
+    """ProvenanceEntity id in the init.cypher style, e.g. ENTITY_carbon_items_csv."""
+    return "ENTITY_" + path.name.replace(".", "_").replace("-", "_")
+
+
+def activity_id(paths):
+    """Deterministic activity id: same inputs -> same id, so re-imports stay idempotent."""
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(p.name.encode("utf-8"))
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return f"ACT_IMPORT_{h.hexdigest()[:16]}"
+
+
+class ImportWriter:
+    """Keeps one csv.writer per output file and counts the rows written."""
+
+    def __init__(self, out_dir):
+        self.dir = out_dir / "neo4j_import"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.files = {}
+        self.writers = {}
+        self.counts = {}
+        for name, header in {**NODE_FILES, **REL_FILES}.items():
+            f = open(self.dir / f"{name}.csv", "w", newline="", encoding="utf-8")
+            self.files[name] = f
+            self.writers[name] = csv.writer(f)
+            self.writers[name].writerow(header)
+            self.counts[name] = 0
+
+    def row(self, name, values):
+        self.writers[name].writerow(values)
+        self.counts[name] += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+# ---------- Export ----------
+def export_assets(w, ifc_csv):
+    """One Asset node per GlobalId; the property CSV has one line per property."""
+    seen = set()
+    with open(ifc_csv, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            guid = row["GlobalId"]
+            if guid in seen:
+                continue
+            seen.add(guid)
+            w.row("assets", [guid, row["Name"], row["IfcClass"], row["IfcClass"], "Asset"])
+    return seen
+
+
+def export_factors(w, factors_csv):
+    rows = SEED_FACTORS
+    if factors_csv is not None:
+        with open(factors_csv, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    for r in rows:
+        w.row("emission_factors", [r["id"], r.get("name", ""), r.get("unit", ""),
+                                   r["value"], r.get("source", ""), "EmissionFactor"])
+    return {r["id"] for r in rows}
+
+
+def parse_quantity(value):
+    """Float quantity, or None for a blank or non-numeric cell."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def last_rows(carbon_csv):
+    """carbon_id -> index of its last row with a usable quantity (MERGE keeps the last write)."""
+    last = {}
+    with open(carbon_csv, newline="", encoding="utf-8") as f:
+        for i, r in enumerate(csv.DictReader(f)):
+            if parse_quantity(r["quantity"]) is not None:
+                last[r["carbon_id"]] = i
+    return last
+
+
+def export_carbon_items(w, carbon_csv, act_id, asset_ids, factor_ids):
+    """Stream carbon items into node and relationship files; return stage codes used.
+
+    neo4j-admin aborts on duplicate node ids, while the transactional ETL
+    MERGEs them, so a repeated carbon_id keeps only its last row. Rows
+    without a numeric quantity are skipped.
+    """
+    last = last_rows(carbon_csv)
+    stages = set()
+    skipped = 0
+    duplicates = 0
+    no_quantity = 0
+    with open(carbon_csv, newline="", encoding="utf-8") as f:
+        for i, r in enumerate(csv.DictReader(f)):
+            cid = r["carbon_id"]
+            quantity = parse_quantity(r["quantity"])
+            if quantity is None:
+                no_quantity += 1
+                continue
+            if last[cid] != i:
+                duplicates += 1
+                continue
+            stage = r["lifecycle_stage"]
+            w.row("carbon_items", [cid, stage, quantity, r["unit"],
+                                   r.get("description") or "", "CarbonItem"])
+            w.row("rel_part_of_stage", [cid, stage, "PART_OF_STAGE"])
+            w.row("rel_prov_generated", [act_id, cid, "PROV_GENERATED"])
+            stages.add(stage)
+
+            factor = r.get("factor_id") or ""
+            if factor:
+                if factor in factor_ids:
+                    w.row("rel_linked_to_factor", [cid, factor, "LINKED_TO_FACTOR"])
+                else:
+                    skipped += 1
+            asset = r.get("asset_id") or ""
+            if asset:
+                if asset in asset_ids:
+                    w.row("rel_has_carbon_item", [asset, cid, "HAS_CARBON_ITEM"])
+                else:
+                    skipped += 1
+    if skipped:
+        print(f"⚠️ {skipped} factor/asset references not found in the inputs were skipped.")
+    if duplicates:
+        print(f"⚠️ {duplicates} rows with a repeated carbon_id were superseded by a later row.")
+    if no_quantity:
+        print(f"⚠️ {no_quantity} rows without a numeric quantity were skipped.")
+    return stages
+
+
+def export_stages(w, stages):
+    for code in sorted(stages | {"B2", "B4", "B6"}):
+        w.row("lifecycle_stages", [code, EN15978_MODULES.get(code, code), "BS EN 15978", "LifecycleStage"])
+
+
+def export_provenance(w, act_id, sources):
+    executed_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    w.row("prov_agents", [AGENT_ID, "Python ETL Runner", "Ingestion", "ProvenanceAgent"])
+    w.row("prov_activities", [act_id, "Bulk import of lifecycle carbon dataset", executed_at,
+                              "export_neo4j_import.py", "ProvenanceActivity"])
+    w.row("rel_prov_associated_with", [act_id, AGENT_ID, "PROV_ASSOCIATED_WITH"])
+    for p in sources:
+        eid = entity_id(p)
+        w.row("prov_entities", [eid, p.name, "Dataset", str(p), "ProvenanceEntity"])
+        w.row("rel_prov_used", [act_id, eid, "PROV_USED"])
+
+
+def write_manifest(w, manifest_csv):
+    """Index of generated files (the former neo4j_import.csv placeholder)."""
+    with open(manifest_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["kind", "file", "rows"])
+        for name in NODE_FILES:
+            writer.writerow(["nodes", f"neo4j_import/{name}.csv", w.counts[name]])
+        for name in REL_FILES:
+            writer.writerow(["relationships", f"neo4j_import/{name}.csv", w.counts[name]])
+
+
+def admin_command(w, database="neo4j"):
+    args = [f"--nodes=/import/{name}.csv" for name in NODE_FILES if w.counts[name]]
+    args += [f"--relationships=/import/{name}.csv" for name in REL_FILES if w.counts[name]]
+    return "neo4j-admin database import full " + " ".join(args) + f" --overwrite-destination {database}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate neo4j-admin import files for the SDT graph.")
+    parser.add_argument("--ifc", type=Path, default=IFC_PROPERTIES_CSV, help="IFC property CSV")
+    parser.add_argument("--carbon", type=Path, default=CARBON_ITEMS_CSV, help="carbon_items.csv")
+    parser.add_argument("--factors", type=Path, default=None,
+                        help="emission factor CSV (id,name,unit,value,source); defaults to init.cypher seeds")
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR, help="output directory")
+    args = parser.parse_args()
+
+    sources = [p for p in (args.ifc, args.carbon, args.factors) if p is not None]
+    for p in sources:
+        if not p.exists():
+            raise FileNotFoundError(f"Expected input file not found: {p}")
+
+    act_id = activity_id(sources)
+    w = ImportWriter(args.out)
+    try:
+        asset_ids = export_assets(w, args.ifc)
+        factor_ids = export_factors(w, args.factors)
+        stages = export_carbon_items(w, args.carbon, act_id, asset_ids, factor_ids)
+        export_stages(w, stages)
+        export_provenance(w, act_id, sources)
+    finally:
+        w.close()
+    write_manifest(w, args.out / MANIFEST_NAME)
+
+    print(f"✅ neo4j-admin import files written to: {w.dir.resolve()}")
+    print(f"🔢 Assets={w.counts['assets']}, CarbonItems={w.counts['carbon_items']}, "
+          f"Stages={w.counts['lifecycle_stages']}, Factors={w.counts['emission_factors']}")
+    print("▶️ Copy the files into the Neo4j import directory, stop the database, then run:")
+    print(f"   {admin_command(w)}")
+    print("   and apply the constraints/indexes from docker/neo4j/init.cypher afterwards.")
+
+
+if __name__ == "__main__":
+    main()
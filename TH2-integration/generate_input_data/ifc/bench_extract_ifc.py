@@ -0,0 +1,129 @@
+# bench_extract_ifc.py
+# Benchmarks IFC property extraction on synthetically scaled NTU campus models.
+#
+# 1. Builds a campus with N copies of the sample building (make_ntu_campus_ifc)
+# 2. Times the legacy extractor (IfcObjectDefinition -> IsDefinedBy walk, rows
+#    buffered in a list) against the single-pass streaming extractor
+# 3. Times K copies of the model extracted sequentially vs in a process pool
+# 4. Compares the CSV and columnar (Arrow/Parquet) stage handoff: size on disk
+#    and time for the next stage to read every row with a numeric value
+#    (needs pyarrow; skipped otherwise)
+#
+# Usage:
+#   python bench_extract_ifc.py --buildings 200 --files 4
+
+import argparse
+import csv
+import shutil
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import ifcopenshell
+
+import ifc_columnar
+from extract_ifc_properties import extract_file, extract_many, iter_property_rows, write_rows
+from make_ntu_campus_ifc import build_campus
+
+
+# ---------- Legacy extractor (previous extract_ifc_properties.py) ----------
+def legacy_rows(model):
+    rows = []
+    for element in model.by_type("IfcObjectDefinition"):
+        if hasattr(element, "IsDefinedBy"):
+            for rel in element.IsDefinedBy:
+                if rel.is_a("IfcRelDefinesByProperties"):
+                    prop_def = rel.RelatingPropertyDefinition
+                    if prop_def.is_a("IfcPropertySet"):
+                        pset_name = prop_def.Name
+                        for prop in getattr(prop_def, "HasProperties", []):
+                            pname = prop.Name
+                            pval = None
+                            if hasattr(prop, "NominalValue") and prop.NominalValue:
+                                pval = prop.NominalValue.wrappedValue
+                            rows.append((
+                                element.GlobalId,
+                                getattr(element, "Name", ""),
+                                element.is_a(),
+                                pset_name,
+                                pname,
+                                pval
+                            ))
+    return rows
+
+
+def legacy_extract(ifc_path, csv_path):
+    model = ifcopenshell.open(str(ifc_path))
+    rows = legacy_rows(model)
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["GlobalId", "Name", "IfcClass", "PsetName", "Property", "Value"])
+        writer.writerows(rows)
+    return len(rows)
+
+
+def read_handoff(path):
+    """What etl_ifc_to_ttl.py does with its input: read rows, get numeric values."""
+    n = 0
+    if ifc_columnar.is_columnar(path):
+        for row in ifc_columnar.iter_rows(path):
+            n += row["NumericValue"] is not None
+        return n
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            n += ifc_columnar.numeric_value(row["Value"]) is not None
+    return n
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+# ---------- Main ----------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IFC property extraction benchmark.")
+    parser.add_argument("--buildings", type=int, default=200, help="sample buildings per model")
+    parser.add_argument("--files", type=int, default=4, help="model copies for the process-pool run")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="sdt_ifc_bench_"))
+    try:
+        ifc_path = tmp / f"campus_x{args.buildings}.ifc"
+        print(f"🏗️ Building synthetic campus with {args.buildings} buildings...")
+        _, secs = timed(lambda: build_campus(args.buildings).write(str(ifc_path)))
+        print(f"   {ifc_path.stat().st_size / 1e6:.1f} MB written in {secs:.1f}s")
+
+        # Same rows regardless of extractor
+        model = ifcopenshell.open(str(ifc_path))
+        assert Counter(legacy_rows(model)) == Counter(iter_property_rows(model)), "row sets differ"
+        del model
+
+        n_old, t_old = timed(legacy_extract, ifc_path, tmp / "legacy.csv")
+        (_, _, n_new, _), t_new = timed(extract_file, ifc_path, tmp / "stream.csv")
+        print(f"📄 Single file: legacy {t_old:.2f}s, streaming {t_new:.2f}s "
+              f"({n_new} rows, {t_old / t_new:.2f}x)")
+
+        copies = []
+        for i in range(args.files):
+            p = tmp / f"campus_{i}.ifc"
+            shutil.copyfile(ifc_path, p)
+            copies.append((p, tmp / f"campus_{i}.csv"))
+
+        _, t_seq = timed(lambda: [extract_file(ifc, out) for ifc, out in copies])
+        _, t_par = timed(lambda: list(extract_many(copies, args.workers)))
+        print(f"🗂️ {args.files} files: sequential {t_seq:.2f}s, "
+              f"process pool {t_par:.2f}s ({t_seq / t_par:.2f}x)")
+
+        if ifc_columnar.pa is not None:
+            rows = list(iter_property_rows(ifcopenshell.open(str(ifc_path))))
+            for suffix in (".csv", ".arrow", ".parquet"):
+                out = tmp / f"handoff{suffix}"
+                write_rows(rows, out)
+                _, t_read = timed(read_handoff, out)
+                print(f"🔁 Handoff {suffix:<8} {out.stat().st_size / 1e6:7.2f} MB, read {t_read:.3f}s")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
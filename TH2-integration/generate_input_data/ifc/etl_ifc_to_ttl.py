@@ -1,13 +1,40 @@
 # etl_ifc_to_ttl.py
 # Converts IFC-extracted CSV → RDF triples aligned with SDT ontology
+#
+# The input may also be the columnar intermediate written by
+# extract_ifc_properties.py (.arrow/.feather/.parquet, see ifc_columnar.py); its
+# typed NumericValue column is used directly instead of re-parsing strings.
+#
+# By default triples are collected in an rdflib Graph and serialized as pretty
+# Turtle. With --stream nt|ttl they are written straight to disk as rows are
+# mapped (rdf_stream.py), so peak memory no longer grows with the model size.
+# Stage timings, rows/triples per second and peak RSS are recorded with
+# pipeline_metrics.py (SDT_METRICS=<file> writes them).
+#
+# Usage:
+#   python etl_ifc_to_ttl.py [input.csv|input.arrow|input.parquet] [output.ttl]
+#   python etl_ifc_to_ttl.py NTU_Campus_Properties.csv ntu_campus_sample2.nt --stream nt
 
+import argparse
 import csv
 from rdflib import Graph, Namespace, Literal, RDF, RDFS, XSD
 from pathlib import Path
 
+from ifc_columnar import is_columnar, iter_rows, numeric_value
+from ifc_mapping_rules import classify
+from pipeline_metrics import metrics
+from rdf_stream import StreamWriter
+
 # ---------- Input & Output ----------
-csv_file = Path("NTU_Campus_Properties.csv")
-ttl_file = Path("ntu_campus_sample2.ttl")
+parser = argparse.ArgumentParser(description="Convert IFC property rows to SDT RDF.")
+parser.add_argument("input", nargs="?", type=Path, default=Path("NTU_Campus_Properties.csv"))
+parser.add_argument("output", nargs="?", type=Path, default=None)
+parser.add_argument("--stream", choices=["nt", "ttl"], default=None,
+                    help="stream N-Triples / prefixed Turtle instead of building a Graph")
+args = parser.parse_args()
+
+csv_file = args.input
+ttl_file = args.output or Path("ntu_campus_sample2." + ("nt" if args.stream == "nt" else "ttl"))
 
 # ---------- Namespaces ----------
 SDT = Namespace("http://builtinsight.io/ontology/sdt#")
@@ -16,16 +43,25 @@ PROV = Namespace("http://www.w3.org/ns/prov#")
 IFC  = Namespace("http://ifcowl.openbimstandards.org/IFC4x3#")
 XSD_NS = Namespace("http://www.w3.org/2001/XMLSchema#")
 
-# ---------- Graph ----------
-g = Graph()
-g.bind("sdt", SDT)
-g.bind("sosa", SOSA)
-g.bind("prov", PROV)
-g.bind("ifc", IFC)
-g.bind("rdfs", RDFS)
+PREFIXES = {"sdt": SDT, "sosa": SOSA, "prov": PROV, "ifc": IFC, "rdf": RDF, "rdfs": RDFS, "xsd": XSD_NS}
+
+# ---------- Sinks ----------
+class GraphSink:
+    """Adds triples to an in-memory Graph; the store itself removes duplicates."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def add(self, triple):
+        self.graph.add(triple)
+
+    def once(self, key, triples):
+        for t in triples:
+            self.graph.add(t)
+
 
 # ---------- Helper Function ----------
-def create_asset_triples(row):
+def create_asset_triples(row, sink):
     """Create triples for IFC entities (Asset or Equipment)."""
     guid = row["GlobalId"]
     name = row["Name"]
@@ -36,42 +72,70 @@ def create_asset_triples(row):
 
     asset_uri = SDT[guid]
 
-    # classify type
-    if "Sensor" in ifc_class:
-        g.add((asset_uri, RDF.type, SOSA.Sensor))
-    elif any(x in ifc_class for x in ["Equipment", "Fan", "Light"]):
-        g.add((asset_uri, RDF.type, SDT.Asset))
-    else:
-        g.add((asset_uri, RDF.type, SDT.Asset))
+    # classify type & operational result (rule table in ifc_mapping_rules.py)
+    decision = classify(ifc_class, pset, prop)
 
-    g.add((asset_uri, RDFS.label, Literal(name)))
-    g.add((asset_uri, SDT.ifcGUID, Literal(guid)))
+    sink.once(("asset", guid), [
+        (asset_uri, RDF.type, decision.asset_class),
+        (asset_uri, RDFS.label, Literal(name)),
+        (asset_uri, SDT.ifcGUID, Literal(guid)),
+    ])
 
     # operational carbon result
-    if "EnergyUse" in pset or "Power" in prop:
+    if decision.operational:
         result_uri = SDT[f"{guid}_operationalResult"]
-        g.add((result_uri, RDF.type, SDT.OperationalCarbonResult))
-        g.add((result_uri, SDT.aboutAsset, asset_uri))
-        g.add((result_uri, SDT.hasModule, SDT.B6))
+        sink.once(("result", guid), [
+            (result_uri, RDF.type, SDT.OperationalCarbonResult),
+            (result_uri, SDT.aboutAsset, asset_uri),
+            (result_uri, SDT.hasModule, SDT.B6),
+            (result_uri, SDT.timestamp, Literal("2025-10-08T13:00:00Z", datatype=XSD.dateTime)),
+        ])
         if val:
-            try:
-                g.add((result_uri, SDT.value, Literal(float(val), datatype=XSD.decimal)))
-            except:
-                g.add((result_uri, SDT.value, Literal(str(val))))
-        g.add((result_uri, SDT.unit, Literal("kWh" if "Power" in prop else "unknown")))
-        g.add((result_uri, SDT.timestamp, Literal("2025-10-08T13:00:00Z", datatype=XSD.dateTime)))
+            num = row["NumericValue"] if "NumericValue" in row else numeric_value(val)
+            if num is not None:
+                value = Literal(num, datatype=XSD.decimal)
+            else:
+                value = Literal(str(val))
+            sink.once(("value", guid, value), [(result_uri, SDT.value, value)])
+        unit = Literal(decision.unit)
+        sink.once(("unit", guid, unit), [(result_uri, SDT.unit, unit)])
 
     # general annotation
     if val:
-        g.add((asset_uri, SDT.source, Literal(f"{pset}:{prop}={val}")))
-
-# ---------- Process CSV ----------
-with open(csv_file, newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        create_asset_triples(row)
-
-# ---------- Output RDF ----------
-g.serialize(destination=ttl_file, format="turtle")
-print(f"✅ TTL dataset generated: {ttl_file.resolve()}")
-print(f"🔢 Total triples: {len(g)}")
+        sink.add((asset_uri, SDT.source, Literal(f"{pset}:{prop}={val}")))
+
+
+def iter_input_rows(path):
+    if is_columnar(path):
+        yield from iter_rows(path)
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+# ---------- Process CSV / columnar input & Output RDF ----------
+if args.stream:
+    with metrics.stage("rdf_generation", unit="rows") as st:
+        with StreamWriter(ttl_file, fmt=args.stream, prefixes=PREFIXES) as sink:
+            for row in iter_input_rows(csv_file):
+                create_asset_triples(row, sink)
+                st.count()
+        total = sink.count
+        st.set(triples=total)
+else:
+    g = Graph()
+    for prefix, ns in PREFIXES.items():
+        g.bind(prefix, ns)
+    sink = GraphSink(g)
+    with metrics.stage("rdf_generation", unit="rows") as st:
+        for row in iter_input_rows(csv_file):
+            create_asset_triples(row, sink)
+            st.count()
+        st.set(triples=len(g))
+    with metrics.stage("serialize", unit="triples") as st:
+        g.serialize(destination=ttl_file, format="turtle")
+        st.count(len(g))
+    total = len(g)
+
+print(f"✅ {'NT' if args.stream == 'nt' else 'TTL'} dataset generated: {ttl_file.resolve()}")
+print(f"🔢 Total triples: {total}")
@@ -1,44 +1,102 @@
 # generate_integration_summary.py
 # Auto-calculates TH2 semantic integration metrics using real SHACL and RDF counts.
+# Turtle files are loaded through graph_cache.py, so unchanged inputs are not re-parsed.
+#
+# Every input is read once:
+#   - validation CSV: streamed; total, per-shape and per-focus-node counts
+#   - shapes graph:   sh:NodeShape / sh:property looked up through the rdflib index
+#   - dataset:        one vectorized pass over the cached triple table for the
+#                     triple count and per-class instance counts
+# The text report is unchanged; integration_summary.json holds the full metrics.
+# Stage timings and peak RSS are recorded with pipeline_metrics.py
+# (SDT_METRICS=<file> writes them).
 
 import csv
-from rdflib import Graph
+import json
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
 
+from rdflib import Namespace, RDF
+
+from graph_cache import load_graph, load_table, np
+from pipeline_metrics import metrics
+
+SH = Namespace("http://www.w3.org/ns/shacl#")
+
 # ---------- Input Files ----------
 validation_csv = Path("validation_report.csv")
 shape_ttl = Path("sdt_tbox_s1.ttl")
 dataset_ttl = Path("ntu_campus_sample2.ttl")
 summary_file = Path("integration_summary.txt")
+summary_json = summary_file.with_suffix(".json")
+
+
+# ---------- Metrics ----------
+def violation_metrics(path):
+    """(total rows, rows per sourceShape, distinct focus nodes) in one streamed pass."""
+    total, by_shape, focus = 0, Counter(), set()
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            total += 1
+            by_shape[row.get("sourceShape", "")] += 1
+            focus.add(row.get("focusNode", ""))
+    return total, by_shape, focus
+
+
+def shape_metrics(g_shapes):
+    """(NodeShapes, {property shape: owning NodeShape}) from the type/sh:property index."""
+    node_shapes = sorted(str(s) for s in g_shapes.subjects(RDF.type, SH.NodeShape))
+    owner = {str(prop): str(shape) for shape, prop in g_shapes.subject_objects(SH.property)}
+    return node_shapes, owner
+
+
+def dataset_metrics(table):
+    """(triple count, instances per class) from a graph_cache.TripleTable."""
+    type_id = table.term_id(RDF.type)
+    if type_id is None:
+        return len(table), {}
+    if np is not None:
+        ids = table.ids
+        classes, counts = np.unique(ids[ids[:, 1] == type_id, 2], return_counts=True)
+        by_class = {str(table.terms[c]): int(n) for c, n in zip(classes.tolist(), counts.tolist())}
+    else:
+        by_class = Counter(str(table.terms[o]) for _, p, o in table.ids if p == type_id)
+    return len(table), dict(sorted(by_class.items(), key=lambda kv: (-kv[1], kv[0])))
+
 
 # ---------- Count violations ----------
-violations = 0
+violations, violations_by_shape, violating_nodes = 0, Counter(), set()
 if validation_csv.exists():
-    with open(validation_csv, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-        violations = len(rows)
+    with metrics.stage("violations", unit="results") as st:
+        violations, violations_by_shape, violating_nodes = violation_metrics(validation_csv)
+        st.count(violations)
 else:
     print("⚠️ validation_report.csv not found. Assuming no violations.")
 
 # ---------- Count SHACL shapes ----------
 shapes_count = 0
+node_shapes, shape_owner = [], {}
 if shape_ttl.exists():
-    g_shapes = Graph()
-    g_shapes.parse(shape_ttl, format="turtle")
-    shapes_count = len(list(g_shapes.triples((None, None, None))))
-    # roughly estimate shape number by counting NodeShape definitions
-    shapes_count = sum(1 for s, p, o in g_shapes.triples((None, None, None)) if "NodeShape" in str(o))
+    # canonical blank nodes: same property-shape ids as in validate_shacl.py's report
+    with metrics.stage("shapes", unit="triples") as st:
+        g_shapes = load_graph(shape_ttl, "turtle", canonical=True)
+        node_shapes, shape_owner = shape_metrics(g_shapes)
+        shapes_count = len(node_shapes)
+        st.count(len(g_shapes))
 else:
     print("⚠️ sdt_tbox_s1.ttl not found. Shape count unavailable.")
 
+violations_by_node_shape = Counter()
+for shape, n in violations_by_shape.items():
+    violations_by_node_shape[shape_owner.get(shape, shape)] += n
+
 # ---------- Count dataset triples ----------
-triple_count = 0
+triple_count, instances_by_class = 0, {}
 if dataset_ttl.exists():
-    g_data = Graph()
-    g_data.parse(dataset_ttl, format="turtle")
-    triple_count = len(g_data)
+    with metrics.stage("dataset", unit="triples") as st:
+        triple_count, instances_by_class = dataset_metrics(load_table(dataset_ttl, "turtle"))
+        st.count(triple_count)
 else:
     print("⚠️ ntu_campus_sample2.ttl not found. Triple count unavailable.")
 
@@ -57,6 +115,7 @@ else:
     correctness = "Low"
 
 manual_reduction = 70 if violations == 0 else 55
+generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 # ---------- Write Summary ----------
 with open(summary_file, "w", encoding="utf-8") as f:
@@ -70,7 +129,30 @@ with open(summary_file, "w", encoding="utf-8") as f:
     f.write(f"Manual Reconciliation Reduction: {manual_reduction}%\n")
     f.write(f"Total Triples Processed: {triple_count}\n")
     f.write(f"Output: {dataset_ttl.name}\n")
-    f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    f.write(f"Generated on: {generated_on}\n")
+
+summary = {
+    "validation": {
+        "passed": violations == 0,
+        "violations": violations,
+        "focus_nodes_with_violations": len(violating_nodes),
+        "violations_by_shape": dict(violations_by_node_shape.most_common()),
+        "violations_by_source_shape": dict(violations_by_shape.most_common()),
+    },
+    "shapes": {"count": shapes_count, "node_shapes": node_shapes},
+    "dataset": {
+        "file": dataset_ttl.name,
+        "triples": triple_count,
+        "instances_by_class": instances_by_class,
+    },
+    "shacl_coverage_pct": round(coverage, 1),
+    "instance_correctness": correctness,
+    "manual_reconciliation_reduction_pct": manual_reduction,
+    "generated_on": generated_on,
+}
+with open(summary_json, "w", encoding="utf-8") as f:
+    json.dump(summary, f, indent=2, ensure_ascii=False)
 
 print(f"✅ Integration summary written to: {summary_file.resolve()}")
+print(f"🧾 Metrics JSON written to: {summary_json.resolve()}")
 print(f"📊 SHACL Coverage: {coverage:.1f}% | Shapes={shapes_count}, Violations={violations}, Triples={triple_count}")
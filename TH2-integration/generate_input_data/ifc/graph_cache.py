@@ -0,0 +1,231 @@
+# graph_cache.py
+# On-disk cache of parsed RDF files shared by the TH1/TH2 scripts
+# (validate_shacl.py, generate_integration_summary.py).
+#
+# Parsing Turtle with rdflib dominates every script start: the ontology import
+# set (sdt_imports_local.ttl + IFC4_ADD2, PROV-O, SOSA, OWL-Time, VOAF) alone
+# takes ~2 s. Parsed results are kept under .sdt_cache/graphs/ as
+#   - load_graph(s): a pickled rdflib Graph, for code that needs a Graph
+#                    (pyshacl, SPARQL); ~3x faster than parsing
+#   - load_table:    an integer-encoded triple table (numpy .npy, optionally
+#                    memory-mapped) plus the list of terms, for code that only
+#                    counts or scans triples; loads in milliseconds
+# An entry is reused while every source file keeps its size and mtime or, if
+# those changed, its sha256; otherwise the files are parsed again.
+#
+# SDT_GRAPH_CACHE=<dir> moves the cache, SDT_GRAPH_CACHE=0 disables it.
+#
+# Usage (timings for the given files, cold parse vs cached loads):
+#   python graph_cache.py ../../../TH1-ontology/ttl_package/import/ontologies/*.ttl
+
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import time
+
+from rdflib import Graph
+from rdflib.compare import to_canonical_graph
+from rdflib.util import guess_format
+
+try:
+    import numpy as np
+except ImportError:  # tables are then pickled as lists and never memory-mapped
+    np = None
+
+CACHE_DIR = os.getenv("SDT_GRAPH_CACHE", ".sdt_cache")
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_files(paths, fmt=None, canonical=False):
+    """Parse ``paths`` into one Graph (no cache). ``canonical`` relabels blank
+    nodes deterministically, so they get the same ids on every parse."""
+    g = Graph()
+    for path in paths:
+        g.parse(path, format=fmt or guess_format(str(path)) or "turtle")
+    if canonical:
+        canon = Graph()
+        for t in to_canonical_graph(g):
+            canon.add(t)
+        for prefix, ns in g.namespaces():
+            canon.bind(prefix, ns, override=False)
+        g = canon
+    return g
+
+
+# ---------- Cache entries ----------
+def cache_enabled(cache_dir):
+    return bool(cache_dir) and cache_dir != "0"
+
+
+def _entry(paths, kind, cache_dir):
+    key = hashlib.sha1("\n".join(paths).encode("utf-8")).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(paths[0]))[0]
+    return os.path.join(cache_dir, "graphs", f"{stem}_{key}.{kind}")
+
+
+def _sources(paths):
+    sources = []
+    for path in paths:
+        st = os.stat(path)
+        sources.append({"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return sources
+
+
+def _write_meta(entry, sources):
+    for s in sources:
+        if "sha256" not in s:
+            s["sha256"] = file_sha256(s["path"])
+    _atomic_write(entry + ".json", json.dumps({"sources": sources}).encode("utf-8"))
+
+
+def _is_fresh(entry, sources):
+    try:
+        with open(entry + ".json", encoding="utf-8") as f:
+            cached = json.load(f)["sources"]
+    except (OSError, ValueError, KeyError):
+        return False
+    if [s["path"] for s in cached] != [s["path"] for s in sources]:
+        return False
+    touched = False
+    for cur, old in zip(sources, cached):
+        cur["sha256"] = old["sha256"]
+        if (cur["size"], cur["mtime_ns"]) == (old["size"], old["mtime_ns"]):
+            continue
+        cur["sha256"] = file_sha256(cur["path"])
+        if cur["sha256"] != old["sha256"]:
+            return False
+        touched = True
+    if touched:  # same content, new mtime: skip hashing next time
+        _write_meta(entry, sources)
+    return True
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ---------- Graphs ----------
+def load_graphs(paths, fmt=None, cache_dir=CACHE_DIR, canonical=False):
+    """One Graph holding all of ``paths``, cached as a pickle."""
+    paths = [os.path.abspath(p) for p in paths]
+    if not cache_enabled(cache_dir):
+        return parse_files(paths, fmt, canonical)
+    sources = _sources(paths)
+    entry = _entry(paths, "canonical" if canonical else "graph", cache_dir)
+    if _is_fresh(entry, sources):
+        with open(entry + ".pkl", "rb") as f:
+            return pickle.load(f)
+    g = parse_files(paths, fmt, canonical)
+    _atomic_write(entry + ".pkl", pickle.dumps(g, protocol=pickle.HIGHEST_PROTOCOL))
+    _write_meta(entry, sources)  # written last: marks the entry complete
+    return g
+
+
+def load_graph(path, fmt=None, cache_dir=CACHE_DIR, canonical=False):
+    return load_graphs([path], fmt, cache_dir, canonical)
+
+
+# ---------- Triple tables ----------
+class TripleTable:
+    """Triples as an (n, 3) array of indexes into ``terms``."""
+
+    def __init__(self, terms, ids):
+        self.terms = terms
+        self.ids = ids
+        self._index = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        index = {}
+        rows = [tuple(index.setdefault(term, len(index)) for term in t) for t in graph]
+        ids = np.array(rows, dtype=np.int32).reshape(-1, 3) if np is not None else rows
+        return cls(list(index), ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        terms = self.terms
+        rows = self.ids.tolist() if np is not None else self.ids
+        for s, p, o in rows:
+            yield terms[s], terms[p], terms[o]
+
+    def term_id(self, term):
+        """Index of ``term`` in ``terms``, or None if it does not occur."""
+        if self._index is None:
+            self._index = {t: i for i, t in enumerate(self.terms)}
+        return self._index.get(term)
+
+    def to_graph(self):
+        g = Graph()
+        for t in self:
+            g.add(t)
+        return g
+
+
+def load_tables(paths, fmt=None, cache_dir=CACHE_DIR, mmap=True):
+    """TripleTable of all ``paths``; the id array is memory-mapped when ``mmap``."""
+    paths = [os.path.abspath(p) for p in paths]
+    if not cache_enabled(cache_dir):
+        return TripleTable.from_graph(parse_files(paths, fmt))
+    sources = _sources(paths)
+    entry = _entry(paths, "table", cache_dir)
+    if _is_fresh(entry, sources):
+        with open(entry + ".pkl", "rb") as f:
+            terms = pickle.load(f)
+        if np is None:
+            terms, ids = terms
+        else:
+            ids = np.load(entry + ".npy", mmap_mode="r" if mmap else None)
+        return TripleTable(terms, ids)
+    table = TripleTable.from_graph(parse_files(paths, fmt))
+    if np is None:
+        payload = (table.terms, table.ids)
+    else:
+        payload = table.terms
+        _atomic_write(entry + ".npy", _npy_bytes(table.ids))
+    _atomic_write(entry + ".pkl", pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    _write_meta(entry, sources)
+    return table
+
+
+def load_table(path, fmt=None, cache_dir=CACHE_DIR, mmap=True):
+    return load_tables([path], fmt, cache_dir, mmap)
+
+
+def _npy_bytes(array):
+    buf = io.BytesIO()
+    np.save(buf, array)
+    return buf.getvalue()
+
+
+# ---------- Main ----------
+if __name__ == "__main__":
+    files = sys.argv[1:]
+    if not files:
+        sys.exit("usage: python graph_cache.py FILE [FILE ...]")
+
+    def timed(label, fn):
+        started = time.perf_counter()
+        result = fn()
+        print(f"{label:<28} {time.perf_counter() - started:8.3f}s  ({len(result)} triples)")
+
+    timed("rdflib parse", lambda: parse_files(files))
+    timed("load_graphs (first run)", lambda: load_graphs(files))
+    timed("load_graphs (cached)", lambda: load_graphs(files))
+    timed("load_tables (first run)", lambda: load_tables(files))
+    timed("load_tables (cached, mmap)", lambda: load_tables(files))
@@ -0,0 +1,150 @@
+# ifc_columnar.py
+# Optional columnar (Arrow IPC / Parquet) intermediate for the IFC -> RDF pipeline.
+# Requires: pip install pyarrow   (only when a .arrow/.feather/.parquet path is used)
+#
+# Columns: GlobalId, Name, IfcClass, PsetName, Property, Value, NumericValue
+#   - IfcClass, PsetName and Property are dictionary-encoded (few distinct values)
+#   - NumericValue is float64, filled at extraction time, so downstream stages no
+#     longer re-parse every value from a string
+#
+# .arrow / .feather -> Arrow IPC file, read memory-mapped and zero-copy
+# .parquet          -> compressed Parquet, smallest on disk
+
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # CSV remains the default handoff format
+    pa = None
+
+ARROW_SUFFIXES = {".arrow", ".feather"}
+PARQUET_SUFFIXES = {".parquet"}
+COLUMNAR_SUFFIXES = ARROW_SUFFIXES | PARQUET_SUFFIXES
+
+BATCH_ROWS = 65536
+FIELDS = ["GlobalId", "Name", "IfcClass", "PsetName", "Property", "Value", "NumericValue"]
+
+
+def is_columnar(path):
+    return Path(path).suffix.lower() in COLUMNAR_SUFFIXES
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for .arrow/.feather/.parquet files: pip install pyarrow")
+
+
+def _schema():
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("GlobalId", pa.string()),
+        ("Name", pa.string()),
+        ("IfcClass", dict_str),
+        ("PsetName", dict_str),
+        ("Property", dict_str),
+        ("Value", pa.string()),
+        ("NumericValue", pa.float64()),
+    ])
+
+
+def numeric_value(val):
+    """float(val) for numbers and numeric strings, else None."""
+    if val is None or isinstance(val, bool):
+        return None
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+class ColumnarWriter:
+    """Row-at-a-time writer that flushes fixed-size record batches."""
+
+    def __init__(self, path, batch_rows=BATCH_ROWS):
+        _require_pyarrow()
+        self.path = Path(path)
+        self.schema = _schema()
+        self.batch_rows = batch_rows
+        self.columns = [[] for _ in FIELDS]
+        # Dictionaries only ever grow, so IPC batches can be written as deltas
+        self._codes = {i: {} for i, f in enumerate(self.schema) if pa.types.is_dictionary(f.type)}
+        self._sink = None
+        if self.path.suffix.lower() in PARQUET_SUFFIXES:
+            self._writer = pq.ParquetWriter(str(self.path), self.schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(str(self.path), "wb")
+            options = ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = ipc.new_file(self._sink, self.schema, options=options)
+
+    def writerow(self, row):
+        """Accept a (GlobalId, Name, IfcClass, PsetName, Property, Value) tuple."""
+        guid, name, ifc_class, pset, prop, val = row
+        cols = self.columns
+        cols[0].append(guid)
+        cols[1].append(name or "")
+        cols[2].append(ifc_class)
+        cols[3].append(pset)
+        cols[4].append(prop)
+        cols[5].append("" if val is None else str(val))
+        cols[6].append(numeric_value(val))
+        if len(cols[0]) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self.columns[0]:
+            return
+        arrays = []
+        for i, (field, values) in enumerate(zip(self.schema, self.columns)):
+            codes = self._codes.get(i)
+            if codes is None:
+                arrays.append(pa.array(values, type=field.type))
+                continue
+            indices = [codes.setdefault(v, len(codes)) for v in values]
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(indices, type=pa.int32()), pa.array(list(codes), type=pa.string())
+            ))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.columns = [[] for _ in FIELDS]
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_batches(path):
+    """Yield pyarrow RecordBatches; Arrow IPC files are memory-mapped (zero-copy)."""
+    _require_pyarrow()
+    path = Path(path)
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        yield from pq.ParquetFile(str(path), memory_map=True).iter_batches(batch_size=BATCH_ROWS)
+        return
+    with pa.memory_map(str(path), "r") as source:
+        reader = ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def _column_values(col):
+    # Decode dictionary columns through their (small) dictionary once per batch
+    if pa.types.is_dictionary(col.type):
+        values = col.dictionary.to_pylist()
+        return [None if i is None else values[i] for i in col.indices.to_pylist()]
+    return col.to_pylist()
+
+
+def iter_rows(path):
+    """Yield dict rows with the CSV column names plus a typed NumericValue."""
+    for batch in iter_batches(path):
+        names = batch.schema.names
+        for values in zip(*(_column_values(col) for col in batch.columns)):
+            yield dict(zip(names, values))
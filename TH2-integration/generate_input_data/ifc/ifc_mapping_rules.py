@@ -0,0 +1,127 @@
+# ifc_mapping_rules.py
+# Declarative IFC -> SDT ontology mapping rules (see "ETL mapping table.md", §1-2).
+#
+# The rule tables below are compiled once into dict lookups and regexes, with one
+# combined regex per table to reject non-matching text in a single scan. Decisions
+# are memoized per (IfcClass, PsetName, Property), so the per-row cost is one
+# cache lookup however many rules/classes are defined.
+#
+# Run this file directly to print the decisions for the NTU sample classes.
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from rdflib import Namespace
+
+SDT = Namespace("http://builtinsight.io/ontology/sdt#")
+SOSA = Namespace("http://www.w3.org/ns/sosa/")
+NAMESPACES = {"sdt": SDT, "sosa": SOSA}
+
+# ---------- Rule tables ----------
+# Asset classification: first matching rule (in table order) wins.
+#   match: "exact" (whole IfcClass), "contains" (substring) or "regex"
+CLASS_RULES = [
+    {"match": "contains", "pattern": "Sensor",    "target": "sosa:Sensor"},
+    {"match": "contains", "pattern": "Equipment", "target": "sdt:Asset"},
+    {"match": "contains", "pattern": "Fan",       "target": "sdt:Asset"},
+    {"match": "contains", "pattern": "Light",     "target": "sdt:Asset"},
+]
+DEFAULT_CLASS = "sdt:Asset"  # every other IfcBuildingElement / IfcSpace
+
+# Operational (B6) carbon results: a row is operational if any rule matches;
+# the unit comes from the first matching rule that defines one.
+OPERATIONAL_RULES = [
+    {"field": "PsetName", "match": "contains", "pattern": "EnergyUse", "unit": None},
+    {"field": "Property", "match": "contains", "pattern": "Power",     "unit": "kWh"},
+]
+DEFAULT_UNIT = "unknown"
+
+
+class Decision(NamedTuple):
+    asset_class: object   # rdflib URIRef
+    operational: bool
+    unit: str
+
+
+# ---------- Compilation ----------
+def _curie(value):
+    prefix, local = value.split(":", 1)
+    return NAMESPACES[prefix][local]
+
+
+def _regex_source(rule):
+    if rule["match"] == "regex":
+        return rule["pattern"]
+    return re.escape(rule["pattern"])
+
+
+class _CompiledTable:
+    """Exact-match dict plus per-rule regexes; returns matching rule indexes."""
+
+    def __init__(self, indexed_rules):
+        self.exact = {}
+        self.patterns = []
+        for i, rule in indexed_rules:
+            if rule["match"] == "exact":
+                self.exact.setdefault(rule["pattern"], []).append(i)
+            elif rule["match"] in ("contains", "regex"):
+                self.patterns.append((i, re.compile(_regex_source(rule))))
+            else:
+                raise ValueError(f"Unknown match kind: {rule['match']!r}")
+        # Prefilter only: an alternation reports one branch per position, so
+        # overlapping patterns ("Power" / "Power_kW") are confirmed per rule
+        self.regex = re.compile("|".join(f"(?:{p.pattern})" for _, p in self.patterns)) if self.patterns else None
+
+    def matches(self, text):
+        hits = set(self.exact.get(text, ()))
+        if self.regex is not None and text and self.regex.search(text):
+            hits.update(i for i, pattern in self.patterns if pattern.search(text))
+        return hits
+
+
+_class_table = _CompiledTable(enumerate(CLASS_RULES))
+_class_targets = [_curie(r["target"]) for r in CLASS_RULES]
+_default_class = _curie(DEFAULT_CLASS)
+
+_op_tables = {
+    field: _CompiledTable((i, r) for i, r in enumerate(OPERATIONAL_RULES) if r["field"] == field)
+    for field in {r["field"] for r in OPERATIONAL_RULES}
+}
+
+
+# ---------- Public API ----------
+@lru_cache(maxsize=None)
+def classify_class(ifc_class):
+    """Ontology class for an IfcClass name."""
+    hits = _class_table.matches(ifc_class)
+    return _class_targets[min(hits)] if hits else _default_class
+
+
+@lru_cache(maxsize=65536)
+def classify(ifc_class, pset, prop):
+    """Mapping decision for one (IfcClass, PsetName, Property) key."""
+    fields = {"PsetName": pset or "", "Property": prop or ""}
+    hits = set()
+    for field, table in _op_tables.items():
+        hits |= table.matches(fields[field])
+    unit = DEFAULT_UNIT
+    for i in sorted(hits):
+        if OPERATIONAL_RULES[i]["unit"]:
+            unit = OPERATIONAL_RULES[i]["unit"]
+            break
+    return Decision(classify_class(ifc_class), bool(hits), unit)
+
+
+if __name__ == "__main__":
+    samples = [
+        ("IfcSensor", "Pset_Sensor", "SensorType"),
+        ("IfcUnitaryEquipment", "Pset_AHU_Performance", "Power_kW"),
+        ("IfcUnitaryEquipment", "Pset_AHU_Performance", "FlowRate_m3h"),
+        ("IfcFan", "Pset_Equipment", "PowerRating_kW"),
+        ("IfcRoof", "Pset_EnergyUse", "EnergyUse_kWh"),
+        ("IfcSpace", "Pset_Area", "GrossArea_m2"),
+    ]
+    for key in samples:
+        d = classify(*key)
+        print(f"{'/'.join(key):<55} -> {d.asset_class.n3()}  operational={d.operational}  unit={d.unit}")
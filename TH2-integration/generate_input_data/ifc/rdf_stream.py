@@ -0,0 +1,92 @@
+# rdf_stream.py
+# Streaming RDF writer: emits N-Triples or prefix-compacted Turtle line by line,
+# so peak memory does not depend on the number of triples written.
+#
+# Triples that would be repeated for every property row of the same subject
+# (rdf:type, rdfs:label, ...) are written through once(key, triples); the keys
+# are kept as 64-bit hashes in a set, which costs a few dozen bytes per key
+# instead of the hundreds of bytes per triple of an in-memory rdflib Graph.
+
+import hashlib
+import re
+
+from rdflib import BNode, Literal, URIRef
+
+# Turtle local names that need no escaping (conservative subset of PN_LOCAL)
+_SAFE_LOCAL = re.compile(r"^[A-Za-z0-9_](?:[A-Za-z0-9_\-.]*[A-Za-z0-9_\-])?$")
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"}
+_NEEDS_ESCAPE = re.compile(r'[\\"\n\r]')
+
+
+def _escape(text):
+    return _NEEDS_ESCAPE.sub(lambda m: _ESCAPES[m.group(0)], text)
+
+
+def key_hash(key):
+    """64-bit digest of a dedup key."""
+    return int.from_bytes(hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class StreamWriter:
+    """Write triples to ``path`` as N-Triples (fmt="nt") or Turtle (fmt="ttl")."""
+
+    def __init__(self, path, fmt="nt", prefixes=None):
+        if fmt not in ("nt", "ttl"):
+            raise ValueError(f"Unsupported stream format: {fmt}")
+        self.fmt = fmt
+        # longest namespace first so nested namespaces compact correctly
+        self.prefixes = sorted((prefixes or {}).items(), key=lambda kv: -len(str(kv[1])))
+        self.seen = set()
+        self.count = 0
+        self._f = open(path, "w", encoding="utf-8")
+        if fmt == "ttl":
+            for prefix, ns in sorted(self.prefixes):
+                self._f.write(f"@prefix {prefix}: <{ns}> .\n")
+            self._f.write("\n")
+
+    # ---------- Term formatting ----------
+    def _iri(self, uri):
+        if self.fmt == "ttl":
+            for prefix, ns in self.prefixes:
+                ns = str(ns)
+                if uri.startswith(ns) and _SAFE_LOCAL.match(uri[len(ns):]):
+                    return f"{prefix}:{uri[len(ns):]}"
+        return f"<{uri}>"
+
+    def _term(self, term):
+        if isinstance(term, URIRef):
+            return self._iri(str(term))
+        if isinstance(term, Literal):
+            text = f'"{_escape(str(term))}"'
+            if term.language:
+                return f"{text}@{term.language}"
+            if term.datatype:
+                return f"{text}^^{self._iri(str(term.datatype))}"
+            return text
+        if isinstance(term, BNode):
+            return f"_:{term}"
+        raise TypeError(f"Unsupported RDF term: {term!r}")
+
+    # ---------- Emission ----------
+    def add(self, triple):
+        s, p, o = triple
+        self._f.write(f"{self._term(s)} {self._term(p)} {self._term(o)} .\n")
+        self.count += 1
+
+    def once(self, key, triples):
+        """Write ``triples`` only the first time ``key`` is seen."""
+        h = key_hash(key)
+        if h in self.seen:
+            return
+        self.seen.add(h)
+        for t in triples:
+            self.add(t)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -4,14 +4,66 @@
 # Description:
 #   Validates RDF data (e.g., SDT ontology instances) against SHACL
 #   shapes and computes instance correctness (% of valid instances).
+#
+#   Results are read by walking the sh:ValidationResult nodes of the
+#   report graph and streamed to the report (.csv, or .jsonl by
+#   suffix), counted in the same pass; the console shows at most
+#   --max-print results.
+#
+#   With --shards N the data graph is split by focus node and the
+#   shards are validated in a process pool against the same shapes
+#   graph; the merged report has the same CSV columns. rdfs:range types
+#   are added before the split, so they reach every shard. --check also
+#   runs the unsharded validation and compares both reports.
+#
+#   With --incremental the validated data graph is kept next to the
+#   report; the next run diffs against it, re-validates only the focus
+#   nodes the diff can affect and patches the existing CSV report.
+#
+#   With --ontology (TBox files / import manifests) the RDFS class and
+#   property closure of the ontology is computed once and cached on disk;
+#   each run only materializes instance-level entailments before
+#   validating (--no-closure-cache: pyshacl RDFS inference as before).
+#
+#   Parsed Turtle files are cached by graph_cache.py (--cache-dir), so
+#   repeated runs on unchanged files skip the rdflib parser.
+#
+#   Stage timings, triples per second and peak RSS are recorded with
+#   pipeline_metrics.py (SDT_METRICS=<file> writes them).
+#
+# Usage:
+#   python validate_shacl.py [data.ttl] [shapes.ttl] [report.csv|report.jsonl]
+#   python validate_shacl.py data.ttl shapes.ttl report.csv --shards 8 --check
+#   python validate_shacl.py data.ttl shapes.ttl report.csv --incremental
+#   python validate_shacl.py data.ttl shapes.ttl report.csv --ontology sdt_imports_local.ttl sdt_tbox_s1.ttl
 #################################################################
 
-import sys
+import argparse
+import hashlib
+import json
 import os
 import csv
-from rdflib import Graph
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote, urlparse
+from rdflib import BNode, Graph, Literal, Namespace, OWL, RDF, RDFS, URIRef
 from pyshacl import validate
 
+# graph_cache.py and pipeline_metrics.py exist once, in
+# TH2-integration/generate_input_data/ifc; the TH1 copy of this script
+# (TH1-ontology/ttl_package/import, same depth) imports them from there
+SHARED_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..",
+    "TH2-integration", "generate_input_data", "ifc"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from graph_cache import CACHE_DIR, cache_enabled, file_sha256, load_graph, load_graphs
+from pipeline_metrics import metrics
+
 # ---------------------------------------------------------------
 # CONFIGURATION
 # ---------------------------------------------------------------
@@ -19,73 +71,724 @@ DATA_FILE = "import/dataset/ntu_campus_sample.ttl"
 SHACL_FILE = "import/sdt_tbox_s1.ttl"
 OUTPUT_CSV = "validation_report.csv"
 
+SH = Namespace("http://www.w3.org/ns/shacl#")
+REPORT_COLUMNS = ["focusNode", "resultPath", "resultMessage", "sourceShape"]
+
+# Per sh:ValidationResult: the exported columns, then sh:value and
+# sh:sourceConstraintComponent, which together identify a result so that
+# results repeated across shards can be merged
+RESULT_PREDICATES = [SH.focusNode, SH.resultPath, SH.resultMessage, SH.sourceShape,
+                     SH.value, SH.sourceConstraintComponent]
+MAX_PRINT = 20
+
+# Data-graph triples every shard needs (class/property axioms for RDFS inference)
+SCHEMA_PREDICATES = {RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range,
+                     OWL.equivalentClass, OWL.equivalentProperty, OWL.inverseOf}
+SCHEMA_TYPES = {RDFS.Class, OWL.Class, RDF.Property, OWL.ObjectProperty,
+                OWL.DatatypeProperty, OWL.AnnotationProperty, OWL.Ontology}
+
+# pyshacl options when no ontology closure is used
+DEFAULT_OPTIONS = {"inference": "rdfs"}
+
 # ---------------------------------------------------------------
-# MAIN VALIDATION FUNCTION
+# REPORT HELPERS
 # ---------------------------------------------------------------
 
-def run_shacl_validation(data_file=DATA_FILE, shacl_file=SHACL_FILE, output_csv=OUTPUT_CSV):
-    print("🔍 Loading RDF data...")
-    data_graph = Graph().parse(data_file, format="turtle")
+def iter_results(report_graph):
+    """Yield (focusNode, resultPath, resultMessage, sourceShape, value, component)
+    for each sh:ValidationResult, using the report graph's indexes."""
+    value = report_graph.value
+    for vr in report_graph.subjects(RDF.type, SH.ValidationResult):
+        yield tuple(value(vr, p) for p in RESULT_PREDICATES)
 
-    print("🧩 Loading SHACL shapes...")
-    shacl_graph = Graph().parse(shacl_file, format="turtle")
 
-    print("⚙️  Running SHACL validation (this may take a moment)...")
-    conforms, report_graph, report_text = validate(
+def report_results(report_graph):
+    return list(iter_results(report_graph))
+
+
+def load_shapes(shacl_file, cache_dir=CACHE_DIR):
+    """Shapes graph with canonical blank-node ids, so property-shape ids in
+    sourceShape are the same in every run and every worker process."""
+    return load_graph(shacl_file, "turtle", cache_dir, canonical=True)
+
+
+def csv_row(result):
+    return tuple(str(x) if x else "" for x in result[:len(REPORT_COLUMNS)])
+
+
+def csv_rows(results):
+    return [csv_row(result) for result in results]
+
+
+def is_jsonl(path):
+    return path.lower().endswith(".jsonl")
+
+
+class ReportWriter:
+    """Stream report rows to CSV (or JSONL) while counting results and focus nodes."""
+
+    def __init__(self, path, preview=MAX_PRINT):
+        self.jsonl = is_jsonl(path)
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._csv = None
+        if not self.jsonl:
+            self._csv = csv.writer(self._f)
+            self._csv.writerow(REPORT_COLUMNS)
+        self.count = 0
+        self.focus_nodes = set()
+        self.preview = []
+        self.preview_size = preview
+
+    def write(self, row):
+        if self.jsonl:
+            self._f.write(json.dumps(dict(zip(REPORT_COLUMNS, row)), ensure_ascii=False) + "\n")
+        else:
+            self._csv.writerow(row)
+        self.count += 1
+        self.focus_nodes.add(row[0])
+        if len(self.preview) < self.preview_size:
+            self.preview.append(row)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_report(rows, output_path, preview=MAX_PRINT):
+    with ReportWriter(output_path, preview) as report:
+        for row in rows:
+            report.write(row)
+    return report
+
+
+def read_report(output_path):
+    with open(output_path, newline="", encoding="utf-8") as f:
+        if is_jsonl(output_path):
+            return [tuple(json.loads(line)[c] for c in REPORT_COLUMNS) for line in f if line.strip()]
+        reader = csv.reader(f)
+        next(reader, None)
+        return [tuple(row) for row in reader]
+
+
+def print_preview(report):
+    for focus, path, message, _ in report.preview:
+        print(f"  ❌ {focus} | {path or '-'} | {message}")
+    if report.count > len(report.preview):
+        print(f"  ... and {report.count - len(report.preview)} more results")
+
+
+def print_correctness(data_graph, report):
+    """Correctness per distinct focus node: a node with several violations counts once."""
+    total_instances = len(set(data_graph.subjects()))  # count all RDF subjects
+    invalid_instances = len(report.focus_nodes)
+    valid_instances = max(total_instances - invalid_instances, 0)
+    correctness_rate = (valid_instances / total_instances) * 100 if total_instances > 0 else 0
+
+    print(f"\n📊 Instance correctness: {correctness_rate:.2f}%")
+    print(f"🧩 Total instances: {total_instances}, Violations: {report.count} "
+          f"on {invalid_instances} focus nodes")
+
+# ---------------------------------------------------------------
+# SHARDING
+# ---------------------------------------------------------------
+# Each shard owns a slice of the data-graph subjects and contains their
+# triples plus the description of everything reachable from them through
+# object links (so sh:node / sh:class / property paths see the same data
+# as in the full graph), plus all schema triples. Nodes reachable from
+# several shards are validated more than once; identical results are
+# merged. Types inferred from rdfs:range depend on incoming edges, which
+# may sit in another shard, so they are added to the graph before it is
+# split (the cached ontology closure already materializes them). Shapes
+# using sh:inversePath also read incoming edges; they are validated
+# unsharded.
+
+def is_schema_triple(triple):
+    _, p, o = triple
+    return p in SCHEMA_PREDICATES or (p == RDF.type and o in SCHEMA_TYPES)
+
+
+def split_schema(data_graph):
+    """(schema triples, instance subjects) of the data graph."""
+    schema_subjects = {s for s, o in data_graph.subject_objects(RDF.type) if o in SCHEMA_TYPES}
+    schema_subjects |= {t[0] for t in data_graph if is_schema_triple(t)}
+    schema = [t for s in schema_subjects for t in data_graph.triples((s, None, None))]
+    subjects = sorted(set(data_graph.subjects()) - schema_subjects, key=str)
+    return schema, subjects
+
+
+def closure_triples(data_graph, owners):
+    """Triples of ``owners`` and of every subject reachable from them."""
+    seen = set(owners)
+    stack = list(owners)
+    triples = []
+    while stack:
+        s = stack.pop()
+        for t in data_graph.triples((s, None, None)):
+            triples.append(t)
+            o = t[2]
+            if t[1] != RDF.type and not isinstance(o, Literal) and o not in seen:
+                seen.add(o)
+                stack.append(o)
+    return triples
+
+
+def partition_graph(data_graph, n_shards):
+    """Split the data graph into (schema triples, [shard triples, ...])."""
+    schema, subjects = split_schema(data_graph)
+    # Contiguous IRI ranges keep an asset and its results in the same shard
+    weights = [sum(1 for _ in data_graph.predicate_objects(s)) for s in subjects]
+    target = sum(weights) / max(n_shards, 1)
+    shards, current, size = [], [], 0
+    for s, w in zip(subjects, weights):
+        current.append(s)
+        size += w
+        if size >= target and len(shards) < n_shards - 1:
+            shards.append(current)
+            current, size = [], 0
+    if current:
+        shards.append(current)
+    return schema, [closure_triples(data_graph, owners) for owners in shards]
+
+
+_worker_shapes = None
+_worker_schema = None
+_worker_options = None
+
+
+def _init_worker(shacl_graph, schema, options):
+    global _worker_shapes, _worker_schema, _worker_options
+    _worker_shapes = shacl_graph
+    _worker_schema = schema
+    _worker_options = options
+
+
+def _validate_shard(triples):
+    g = Graph()
+    for t in _worker_schema:
+        g.add(t)
+    for t in triples:
+        g.add(t)
+    conforms, report_graph, _ = validate(
+        g,
+        shacl_graph=_worker_shapes,
+        debug=False,
+        **_worker_options
+    )
+    return conforms, report_results(report_graph)
+
+
+def range_types(data_graph, ont_graph=None):
+    """rdf:type triples entailed by rdfs:range (rule rdfs3) for the objects of the data graph."""
+    axioms = [t for t in data_graph if is_schema_triple(t)]
+    if ont_graph is not None:
+        axioms += list(ont_graph.triples((None, RDFS.range, None)))
+        axioms += list(ont_graph.triples((None, RDFS.subPropertyOf, None)))
+        axioms += list(ont_graph.triples((None, RDFS.subClassOf, None)))
+    ranges = close_axioms(axioms_of(axioms))["range"]
+    if not ranges:
+        return []
+    return [(o, RDF.type, c) for p, cs in ranges.items()
+            for o in data_graph.objects(None, p) if not isinstance(o, Literal) for c in cs]
+
+
+def validate_sharded(data_graph, shacl_graph, n_shards, workers=None, options=DEFAULT_OPTIONS):
+    """Validate shards in a process pool; returns (conforms, merged results)."""
+    if (None, SH.inversePath, None) in shacl_graph:
+        print("ℹ️  Shapes use sh:inversePath (incoming edges), validating unsharded")
+        return validate_full(data_graph, shacl_graph, options)
+    if options.get("inference", "none") != "none":
+        entailed = [t for t in range_types(data_graph, options.get("ont_graph")) if t not in data_graph]
+        if entailed:
+            graph = Graph()
+            for t in data_graph:
+                graph.add(t)
+            for t in entailed:
+                graph.add(t)
+            data_graph = graph
+    schema, shards = partition_graph(data_graph, n_shards)
+    print(f"🧱 {len(shards)} shards, {sum(map(len, shards))} triples "
+          f"(+{len(schema)} schema triples each)")
+    conforms, results, seen = True, [], set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(shacl_graph, schema, options)) as pool:
+        for ok, rows in pool.map(_validate_shard, shards):
+            conforms &= ok
+            for row in rows:
+                if row not in seen:
+                    seen.add(row)
+                    results.append(row)
+    results.sort(key=lambda row: tuple(str(x) if x else "" for x in row))
+    return conforms, results
+
+
+def validate_graph(data_graph, shacl_graph, options=DEFAULT_OPTIONS):
+    """One pyshacl run; returns (conforms, report graph)."""
+    conforms, report_graph, _ = validate(
         data_graph,
         shacl_graph=shacl_graph,
-        inference="rdfs",
-        debug=False
+        debug=False,
+        **options
     )
+    return conforms, report_graph
 
-    print("\n✅ Conforms:" if conforms else "\n❌ Violations detected!")
-    print("Validation Report")
-    print(report_text)
 
-    # -----------------------------------------------------------
-    # Extract SHACL validation results into CSV
-    # -----------------------------------------------------------
-    print("\n🧾 Exporting CSV report...")
-
-    qres = report_graph.query(
-        """
-        PREFIX sh: <http://www.w3.org/ns/shacl#>
-        SELECT ?focusNode ?resultPath ?resultMessage ?sourceShape
-        WHERE {
-            ?vr a sh:ValidationResult ;
-                sh:focusNode ?focusNode ;
-                sh:resultMessage ?resultMessage ;
-                sh:sourceShape ?sourceShape .
-            OPTIONAL { ?vr sh:resultPath ?resultPath . }
-        }
-        """
+def validate_full(data_graph, shacl_graph, options=DEFAULT_OPTIONS):
+    conforms, report_graph = validate_graph(data_graph, shacl_graph, options)
+    return conforms, report_results(report_graph)
+
+
+def compare_reports(full, other, label="sharded"):
+    """True if both result lists hold the same results (as multisets)."""
+    missing = Counter(full) - Counter(other)
+    extra = Counter(other) - Counter(full)
+    for what, diff in ((f"missing from {label}", missing), (f"only in {label}", extra)):
+        for row in list(diff)[:10]:
+            print(f"   {what}: {' | '.join(str(x) for x in row[:len(REPORT_COLUMNS)])}")
+    return not missing and not extra
+
+# ---------------------------------------------------------------
+# INCREMENTAL VALIDATION
+# ---------------------------------------------------------------
+# The last validated data graph is stored as N-Triples next to the report
+# (<report>.snapshot.nt), with the shapes file hash (<report>.snapshot.json).
+# A changed triple changes the description of its subject, so the subject
+# and every node that reaches it through object links (property paths,
+# sh:node) are re-validated; its object is re-validated too (targets and
+# incoming links), together with its ancestors when the predicate has an
+# rdfs:range that can change the object's inferred type. The rows of
+# those focus nodes in the CSV report are replaced. Schema changes, blank
+# nodes in the diff, new shapes or ontology files or a missing snapshot
+# fall back to a full validation.
+
+def snapshot_paths(output_csv):
+    stem = os.path.splitext(output_csv)[0]
+    return stem + ".snapshot.nt", stem + ".snapshot.json"
+
+
+def load_snapshot(output_csv, shacl_file, ontology_key=None):
+    """Previously validated data graph, or None if it cannot be reused."""
+    graph_path, meta_path = snapshot_paths(output_csv)
+    if not (os.path.exists(graph_path) and os.path.exists(meta_path) and os.path.exists(output_csv)):
+        print("ℹ️  No previous snapshot, running full validation")
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("shacl_sha256") != file_sha256(shacl_file):
+        print("ℹ️  SHACL shapes changed, running full validation")
+        return None
+    if meta.get("ontology") != ontology_key:
+        print("ℹ️  Ontology changed, running full validation")
+        return None
+    return Graph().parse(graph_path, format="nt")
+
+
+def save_snapshot(data_graph, output_csv, shacl_file, ontology_key=None):
+    graph_path, meta_path = snapshot_paths(output_csv)
+    data_graph.serialize(destination=graph_path, format="nt", encoding="utf-8")
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"shacl_sha256": file_sha256(shacl_file), "ontology": ontology_key,
+                   "triples": len(data_graph)}, f)
+
+
+def affected_focus_nodes(previous, data_graph):
+    """Focus nodes whose results may differ between two data graphs, or None for a full run."""
+    old, new = set(previous), set(data_graph)
+    changed = (new - old) | (old - new)
+    print(f"🔀 Diff: +{len(new - old)} / -{len(old - new)} triples")
+    ranged = set(data_graph.subjects(RDFS.range)) | set(previous.subjects(RDFS.range))
+    seeds, objects = set(), set()
+    for t in changed:
+        if is_schema_triple(t):
+            print("ℹ️  Schema triples changed, running full validation")
+            return None
+        s, p, o = t
+        if isinstance(s, BNode) or isinstance(o, BNode):
+            print("ℹ️  Blank nodes changed, running full validation")
+            return None
+        seeds.add(s)
+        if p != RDF.type and not isinstance(o, Literal):
+            (seeds if p in ranged else objects).add(o)
+    affected = set(seeds)
+    stack = list(seeds)
+    while stack:
+        node = stack.pop()
+        for s, p in data_graph.subject_predicates(node):
+            if p != RDF.type and s not in affected:
+                affected.add(s)
+                stack.append(s)
+    return affected | objects
+
+
+def validate_focus(data_graph, shacl_graph, focus_nodes, options=DEFAULT_OPTIONS):
+    """Validate only ``focus_nodes`` on the part of the data graph they can see."""
+    schema, _ = split_schema(data_graph)
+    g = Graph()
+    for t in schema:
+        g.add(t)
+    for t in closure_triples(data_graph, focus_nodes):
+        g.add(t)
+    for node in focus_nodes:  # incoming links, for rdfs:range and sh:targetObjectsOf
+        for t in data_graph.triples((None, None, node)):
+            g.add(t)
+    present = [n for n in focus_nodes if (n, None, None) in g]
+    if not present:
+        return []
+    _, report_graph, _ = validate(
+        g,
+        shacl_graph=shacl_graph,
+        focus_nodes=present,
+        debug=False,
+        **options
     )
+    return report_results(report_graph)
+
+
+def patch_report(output_csv, focus_nodes, results):
+    """Replace the report rows of ``focus_nodes`` with ``results``; returns all rows."""
+    stale = {str(n) for n in focus_nodes}
+    kept = [row for row in read_report(output_csv) if row[0] not in stale]
+    return kept + csv_rows(results)
+
+# ---------------------------------------------------------------
+# RDFS CLOSURE CACHE
+# ---------------------------------------------------------------
+# The ontology (TBox + owl:imports of the given manifests, resolved to the
+# local ontologies/ copies) is reduced to its closed RDFS hierarchy:
+# transitive rdfs:subClassOf and rdfs:subPropertyOf, and for every
+# property the domains/ranges it inherits from its super-properties,
+# lifted to their super-classes. The closure is stored as JSON in
+# --cache-dir under the hash of all ontology files. Per run, rules
+# rdfs2/3/7/9 are applied to the data triples in a single pass and the
+# result is validated with inference="none".
+
+# Bumped when the closure algorithm changes, so stale cached closures are not reused
+CLOSURE_VERSION = 2
+
+IMPORTS_PATTERN = re.compile(
+    r"(?:owl:imports|<http://www\.w3\.org/2002/07/owl#imports>)\s+((?:<[^>]*>\s*,?\s*)+)")
+
+
+def local_import_path(iri, base_dir):
+    """Local file for a file: import IRI, matched against ``base_dir``; None otherwise."""
+    if not iri.startswith("file:"):
+        return None
+    path = unquote(urlparse(iri).path)
+    parts = [p for p in path.split("/") if p]
+    for k in range(len(parts)):
+        candidate = os.path.join(base_dir, *parts[k:])
+        if os.path.exists(candidate):
+            return os.path.abspath(candidate)
+    return path if os.path.exists(path) else None
+
+
+def resolve_imports(paths):
+    """Ontology files plus the local files they owl:import (one level)."""
+    files = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if path in files:
+            continue
+        files.append(path)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        for block in IMPORTS_PATTERN.findall(text):
+            for iri in re.findall(r"<([^>]*)>", block):
+                local = local_import_path(iri, os.path.dirname(path))
+                if local is None:
+                    print(f"ℹ️  Skipping non-local import {iri}")
+                elif local not in files:
+                    files.append(local)
+    return files
+
+
+def files_key(files):
+    h = hashlib.sha256()
+    for path in sorted(files):
+        h.update(file_sha256(path).encode("ascii"))
+    return h.hexdigest()
+
 
-    with open(output_csv, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["focusNode", "resultPath", "resultMessage", "sourceShape"])
-        for row in qres:
-            writer.writerow([str(x) if x else "" for x in row])
+def parse_ontology(files, cache_dir=CACHE_DIR):
+    return load_graphs(files, "turtle", cache_dir)
 
-    print(f"📂 Validation results exported to: {output_csv}")
+
+def _ancestors(edges):
+    """Transitive closure of a {node: {parent, ...}} relation.
+
+    Cycles (equivalent classes) are closed per strongly connected component
+    (Tarjan), so every member of a cycle gets the whole cycle and everything
+    above it. Components come out parents-first, so each is closed once.
+    """
+    index, low, on_stack, stack = {}, {}, set(), []
+    component, closed_components = {}, []
+
+    def parents(node):
+        return iter(edges.get(node, ()))
+
+    for root in list(edges):
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, parents(root))]
+        while work:
+            node, it = work[-1]
+            for parent in it:
+                if parent not in index:
+                    index[parent] = low[parent] = len(index)
+                    stack.append(parent)
+                    on_stack.add(parent)
+                    work.append((parent, parents(parent)))
+                    break
+                if parent in on_stack:
+                    low[node] = min(low[node], index[parent])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] != index[node]:
+                    continue
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component[member] = len(closed_components)
+                    members.append(member)
+                    if member == node:
+                        break
+                result = set()
+                for member in members:
+                    for parent in edges.get(member, ()):
+                        result.add(parent)  # members of a cycle are each other's parents
+                        if component[parent] != component[member]:
+                            result |= closed_components[component[parent]]
+                closed_components.append(result)
+    return {node: set(closed_components[c]) for node, c in component.items()}
+
+
+def close_axioms(axioms):
+    """Close raw {subClassOf, subPropertyOf, domain, range} edges (see section comment)."""
+    sup_c = _ancestors(axioms["subClassOf"])
+    sup_p = _ancestors(axioms["subPropertyOf"])
+    closure = {"subClassOf": sup_c, "subPropertyOf": sup_p}
+    for key in ("domain", "range"):
+        lifted = {}
+        for p in set(axioms[key]) | set(sup_p):
+            classes = set()
+            for q in {p} | sup_p.get(p, set()):
+                for c in axioms[key].get(q, ()):
+                    classes.add(c)
+                    classes |= sup_c.get(c, set())
+            if classes:
+                lifted[p] = classes
+        closure[key] = lifted
+    return closure
+
+
+def axioms_of(triples):
+    """Raw RDFS axioms (IRIs only; OWL class expressions are skipped)."""
+    axioms = {key: defaultdict(set) for key in ("subClassOf", "subPropertyOf", "domain", "range")}
+    for s, p, o in triples:
+        if not (isinstance(s, URIRef) and isinstance(o, URIRef)):
+            continue
+        if p in (RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range):
+            axioms[p.split("#")[-1]][s].add(o)
+    return axioms
+
+
+def load_closure(files, cache_dir=CACHE_DIR):
+    """Closed RDFS axioms of ``files``, from the on-disk cache when possible; returns (closure, key)."""
+    key = files_key(files)
+    path = os.path.join(cache_dir, f"rdfs_closure_v{CLOSURE_VERSION}_{key[:16]}.json")
+    started = time.perf_counter()
+    if cache_enabled(cache_dir) and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        source = "cache"
+    else:
+        closure = close_axioms(axioms_of(parse_ontology(files, cache_dir)))
+        raw = {k: {str(a): sorted(str(b) for b in bs) for a, bs in v.items()} for k, v in closure.items()}
+        if cache_enabled(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(raw, f)
+        source = f"{len(files)} ontology files"
+    closure = {k: {URIRef(a): {URIRef(b) for b in bs} for a, bs in v.items()} for k, v in raw.items()}
+    print(f"🧠 RDFS closure from {source}: {sum(map(len, closure.values()))} entries "
+          f"in {time.perf_counter() - started:.2f}s")
+    return closure, key
+
+
+def materialize(data_graph, closure):
+    """Copy of the data graph with its instance-level RDFS entailments."""
+    schema = [t for t in data_graph if is_schema_triple(t)]
+    if schema:  # axioms in the data graph itself: re-close with them (not cached)
+        axioms = axioms_of(schema)
+        for key, edges in closure.items():
+            for a, bs in edges.items():
+                axioms[key][a] |= bs
+        closure = close_axioms(axioms)
+    sup_c, sup_p = closure["subClassOf"], closure["subPropertyOf"]
+    domains, ranges = closure["domain"], closure["range"]
+    g = Graph()
+    for s, p, o in data_graph:
+        g.add((s, p, o))
+        if p == RDF.type:
+            for c in sup_c.get(o, ()):
+                g.add((s, RDF.type, c))
+            continue
+        for q in sup_p.get(p, ()):
+            g.add((s, q, o))
+        for c in domains.get(p, ()):
+            g.add((s, RDF.type, c))
+        if not isinstance(o, Literal):
+            for c in ranges.get(p, ()):
+                g.add((o, RDF.type, c))
+    return g
+
+# ---------------------------------------------------------------
+# MAIN VALIDATION FUNCTION
+# ---------------------------------------------------------------
+
+def run_shacl_validation(data_file=DATA_FILE, shacl_file=SHACL_FILE, output_csv=OUTPUT_CSV,
+                         shards=1, workers=None, check=False, incremental=False,
+                         ontology=None, closure_cache=True, cache_dir=CACHE_DIR,
+                         max_print=MAX_PRINT):
+    print("🔍 Loading RDF data...")
+    with metrics.stage("load_data", unit="triples") as st:
+        data_graph = load_graph(data_file, "turtle", cache_dir)
+        st.count(len(data_graph))
+
+    print("🧩 Loading SHACL shapes...")
+    with metrics.stage("load_shapes", unit="triples") as st:
+        shacl_graph = load_shapes(shacl_file, cache_dir)
+        st.count(len(shacl_graph))
+
+    # Graph handed to pyshacl and how it infers; data_graph stays as parsed
+    graph, options, ontology_key, ontology_files = data_graph, DEFAULT_OPTIONS, None, None
+    if ontology:
+        ontology_files = resolve_imports(ontology)
+        with metrics.stage("ontology", unit="triples") as st:
+            if closure_cache:
+                closure, ontology_key = load_closure(ontology_files, cache_dir)
+                started = time.perf_counter()
+                graph = materialize(data_graph, closure)
+                options = {"inference": "none"}
+                st.count(len(graph) - len(data_graph))
+                print(f"🧠 Materialized {len(graph) - len(data_graph)} entailed triples "
+                      f"in {time.perf_counter() - started:.2f}s")
+            else:
+                print(f"🧠 Loading {len(ontology_files)} ontology files for RDFS inference...")
+                options = {"inference": "rdfs", "ont_graph": parse_ontology(ontology_files, cache_dir)}
+                ontology_key = "rdfs:" + files_key(ontology_files)
+                st.count(len(options["ont_graph"]))
+
+    affected = None
+    if incremental:
+        with metrics.stage("incremental_diff", unit="focus_nodes") as st:
+            previous = load_snapshot(output_csv, shacl_file, ontology_key)
+            if previous is not None:
+                affected = affected_focus_nodes(previous, graph)
+                st.count(len(affected))
+                del previous
+
+    started = time.perf_counter()
+    rows, report_graph = None, None
+    with metrics.stage("validate", unit="triples") as st:
+        if affected is not None:
+            print(f"♻️  Re-validating {len(affected)} affected focus nodes...")
+            rows = patch_report(output_csv, affected, validate_focus(graph, shacl_graph, affected, options))
+            conforms = not rows
+            mode = "incremental"
+        elif shards > 1:
+            print(f"⚙️  Running sharded SHACL validation ({shards} shards)...")
+            conforms, results = validate_sharded(graph, shacl_graph, shards, workers, options)
+            rows = csv_rows(results)
+            mode = "sharded"
+        else:
+            print("⚙️  Running SHACL validation (this may take a moment)...")
+            conforms, report_graph = validate_graph(graph, shacl_graph, options)
+            mode = "closure" if graph is not data_graph else "full"
+        st.count(len(graph))
+        st.set(mode=mode)
+    secs = time.perf_counter() - started
+    print(f"⏱️  Validation took {secs:.2f}s")
+
+    print("\n✅ Conforms:" if conforms else "\n❌ Violations detected!")
 
     # -----------------------------------------------------------
-    # Compute instance correctness (simple ratio)
+    # Stream SHACL validation results into the report
     # -----------------------------------------------------------
-    total_instances = len(set(data_graph.subjects()))  # count all RDF subjects
-    violation_count = sum(1 for _ in open(output_csv, encoding="utf-8")) - 1  # minus header
-    valid_instances = max(total_instances - violation_count, 0)
-    correctness_rate = (valid_instances / total_instances) * 100 if total_instances > 0 else 0
+    print("\n🧾 Exporting report...")
+    with metrics.stage("export_report", unit="results") as st:
+        if rows is None:
+            rows = map(csv_row, iter_results(report_graph))
+            if check and mode != "full":
+                rows = list(rows)
+        report = write_report(rows, output_csv, max_print)
+        st.count(report.count)
+    del report_graph
+    print(f"📂 {report.count} validation results exported to: {output_csv}")
+    if report.count:
+        print("Validation Report")
+        print_preview(report)
+    if incremental:
+        save_snapshot(graph, output_csv, shacl_file, ontology_key)
 
-    print(f"\n📊 Instance correctness: {correctness_rate:.2f}%")
-    print(f"🧩 Total instances: {total_instances}, Violations: {violation_count}")
+    # -----------------------------------------------------------
+    # Compute instance correctness (per distinct focus node)
+    # -----------------------------------------------------------
+    print_correctness(data_graph, report)
+
+    if check and mode != "full":
+        # Reference: one pyshacl run with its own RDFS inference over the data
+        # graph as parsed (and the ontology mixed in, if any)
+        reference = dict(DEFAULT_OPTIONS)
+        if ontology_files:
+            reference["ont_graph"] = options.get("ont_graph") or parse_ontology(ontology_files, cache_dir)
+        print(f"\n🔁 Checking {mode} report against a full validation...")
+        started = time.perf_counter()
+        full_conforms, full_results = validate_full(data_graph, shacl_graph, reference)
+        full_secs = time.perf_counter() - started
+        same = compare_reports(csv_rows(full_results), rows, mode) and full_conforms == conforms
+        print(f"   full {full_secs:.2f}s ({len(full_results)} results), "
+              f"{mode} {secs:.2f}s ({len(rows)} results)")
+        print("   Reports match ✅" if same else "   Reports differ ❌")
+        if not same:
+            raise SystemExit(1)
     print("Done ✅")
 
 # ---------------------------------------------------------------
 # COMMAND-LINE ENTRY POINT
 # ---------------------------------------------------------------
 if __name__ == "__main__":
-    data_arg = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
-    shacl_arg = sys.argv[2] if len(sys.argv) > 2 else SHACL_FILE
-    output_arg = sys.argv[3] if len(sys.argv) > 3 else OUTPUT_CSV
-    run_shacl_validation(data_arg, shacl_arg, output_arg)
+    parser = argparse.ArgumentParser(description="SHACL validation with instance correctness.")
+    parser.add_argument("data", nargs="?", default=DATA_FILE)
+    parser.add_argument("shacl", nargs="?", default=SHACL_FILE)
+    parser.add_argument("output", nargs="?", default=OUTPUT_CSV)
+    parser.add_argument("--shards", type=int, default=1,
+                        help="split the data graph into N shards validated in parallel")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size for --shards (default: one per CPU)")
+    parser.add_argument("--check", action="store_true",
+                        help="also run a full validation and verify both reports match")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-validate only what changed since the last --incremental run")
+    parser.add_argument("--ontology", nargs="+", default=None,
+                        help="TBox files / import manifests whose RDFS axioms apply to the data")
+    parser.add_argument("--no-closure-cache", dest="closure_cache", action="store_false",
+                        help="mix the ontology into pyshacl RDFS inference instead of the cached closure")
+    parser.add_argument("--max-print", type=int, default=MAX_PRINT,
+                        help="results shown on the console (all are written to the report)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="directory for parsed-graph and ontology-closure caches (0: no cache)")
+    args = parser.parse_args()
+    run_shacl_validation(args.data, args.shacl, args.output, args.shards, args.workers,
+                         args.check, args.incremental, args.ontology, args.closure_cache,
+                         args.cache_dir, args.max_print)
@@ -0,0 +1,32 @@
+// ============================================================================
+// TH4 - Lineage reconstruction (bounded depth)
+//
+// Every query starts from an id-constrained node and only expands that node's
+// own PROV edges, so its cost does not grow with the PROV history.
+// docker/etl/lineage.py runs the same steps for many ids at once, with caching.
+// ============================================================================
+
+// (L1) Activities that generated a CarbonItem, with their sources and agents
+MATCH (c:CarbonItem {id: "CI_B6_ELEC_0001"})<-[:PROV_GENERATED]-(act:ProvenanceActivity)
+RETURN c.id, act.id, act.name, act.executedAt,
+       [(act)-[:PROV_USED]->(e:ProvenanceEntity) | e.id] AS used,
+       [(act)-[:PROV_ASSOCIATED_WITH]->(g:ProvenanceAgent) | g.id] AS agents;
+
+// (L2) Upstream chain, at most 3 activity levels
+//      item <-GENERATED- act -USED-> entity <-GENERATED- act ...
+MATCH (c:CarbonItem {id: "CI_B6_ELEC_0001"})<-[:PROV_GENERATED]-(a0:ProvenanceActivity)
+      ((:ProvenanceActivity)-[:PROV_USED]->(:ProvenanceEntity)<-[:PROV_GENERATED]-(up:ProvenanceActivity)){0,2}
+RETURN c.id, a0.id AS activity, [a IN up | a.id] AS upstream;
+
+// (L3) Lineage of a report figure: a daily rollup lists the activities behind it
+MATCH (r:CarbonRollup {id: "ASSET_AHU_01|B6|day|2026-01-22"})
+UNWIND r.activities AS aid
+MATCH (act:ProvenanceActivity {id: aid})
+RETURN r.id, r.kgCO2e, act.id, act.name, act.executedAt,
+       [(act)-[:PROV_USED]->(e:ProvenanceEntity) | e.id] AS used;
+
+// (L4) Activities recorded since a given time (index on lastExecutedAt)
+MATCH (act:ProvenanceActivity)
+WHERE act.lastExecutedAt > datetime("2026-01-22T00:00:00Z")
+RETURN act.id, act.name, act.lastExecutedAt
+ORDER BY act.lastExecutedAt;
@@ -0,0 +1,360 @@
+# ai_ingest_runner.py
+# Batch runner for the TH5 AI ingestion pipeline (TH5-ai_ingestion_v3.json):
+#   spreadsheet row -> AI_ETL (chat completion) -> AI_Response_Parser /
+#   Extract_RDF_Content (Turtle clean-up) -> Neo4j_Write_RDF (n10s inline import)
+#
+# Instead of one HTTP call per row for both the model and Neo4j:
+#   - model requests fan out with asyncio, bounded by --concurrency and
+#     --rate (requests per minute); 429/5xx are retried with backoff
+#   - responses are cached content-addressed under --cache-dir by
+#     sha256(prompt version + row), so re-runs only call the model for new
+#     or edited rows and for a changed prompt/model
+#   - the parsed Turtle of --chunk-size rows is merged with rdflib and
+#     written with one n10s.rdf.import.inline call per chunk
+#
+# The system prompt, model and temperature are read from the v3 workflow,
+# so the runner and the n8n workflow stay in sync.
+#
+# Usage:
+#   python ai_ingest_runner.py lca_input.csv --out generated_triples.ttl
+#   python ai_ingest_runner.py lca_input.xlsx --neo4j http://localhost:7474 --concurrency 8 --rate 300
+#   python stub_model_server.py --port 8099 &
+#   python ai_ingest_runner.py rows.csv --endpoint http://localhost:8099/v1/chat/completions --out out.ttl
+
+import argparse
+import asyncio
+import base64
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from rdflib import Graph
+
+try:
+    import aiohttp
+except ImportError:  # requests then run in worker threads through urllib
+    aiohttp = None
+
+WORKFLOW = Path(__file__).with_name("TH5-ai_ingestion_v3.json")
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+CACHE_DIR = Path(".ai_cache")
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# ---------- Prompt (from the n8n workflow) ----------
+def load_prompt(workflow=WORKFLOW):
+    """(system prompt, model, temperature) of the AI_ETL node."""
+    with open(workflow, encoding="utf-8") as f:
+        nodes = {n["name"]: n for n in json.load(f)["nodes"]}
+    body = nodes["AI_ETL"]["parameters"]["jsonBody"]
+    system = re.search(r"content: `(.*?)`", body, re.S).group(1).strip()
+    model = re.search(r'model: "([^"]+)"', body).group(1)
+    temperature = float(re.search(r"temperature: ([0-9.]+)", body).group(1))
+    return system, model, temperature
+
+
+def prompt_version(system, model, temperature):
+    key = json.dumps([system, model, temperature], ensure_ascii=False)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def request_body(row, system, model, temperature):
+    user = ("Convert this spreadsheet record into a complete RDF/Turtle graph "
+            "following the SDT ontology and rules:\n" + json.dumps(row, indent=2, ensure_ascii=False))
+    return {"model": model, "temperature": temperature,
+            "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}]}
+
+
+# ---------- Response parsing (AI_Response_Parser + Extract_RDF_Content) ----------
+def clean_turtle(raw):
+    start = raw.find("@prefix")
+    if start == -1:
+        raise ValueError("No '@prefix' found in AI output")
+    rdf = raw[start:]
+    rdf = re.sub(r"```turtle|```", "", rdf, flags=re.I)
+    rdf = (rdf.replace("\\n", "\n").replace("\r", "").replace('\\"', '"')
+              .replace("“", '"').replace("”", '"')
+              .replace("‘", "'").replace("’", "'"))
+    rdf = re.sub(r"<([^>]*?)>", lambda m: "<" + m.group(1).replace(" ", "%20") + ">", rdf)
+    return rdf.strip()
+
+
+def parse_response(response):
+    """Cleaned Turtle of a chat completion; raises ValueError if it does not parse."""
+    raw = (response.get("choices") or [{}])[0].get("message", {}).get("content") or ""
+    rdf = clean_turtle(raw)
+    Graph().parse(data=rdf, format="turtle")  # reject invalid Turtle before caching
+    return rdf
+
+
+# ---------- Input ----------
+def read_rows(path):
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        sheet = load_workbook(path, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h) for h in next(rows)]
+        for values in rows:
+            if any(v is not None for v in values):
+                yield {h: ("" if v is None else str(v)) for h, v in zip(header, values)}
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def row_key(row, version):
+    canonical = json.dumps(row, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{version}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+# ---------- Cache ----------
+class ResponseCache:
+    """One JSON file per key: <dir>/<key[:2]>/<key>.json holding the cleaned Turtle."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)["rdf"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, rdf, meta):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(dict(meta, rdf=rdf), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# ---------- HTTP ----------
+class RateLimiter:
+    """At most ``per_minute`` acquisitions per minute, evenly spaced."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HttpError(Exception):
+    def __init__(self, status, body="", retry_after=None):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _post_blocking(url, payload, headers, timeout):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                 headers=dict(headers, **{"Content-Type": "application/json"}))
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        raise HttpError(e.code, e.read().decode("utf-8", "replace"), e.headers.get("Retry-After"))
+
+
+class HttpClient:
+    """POST JSON with aiohttp when installed, else urllib in ``workers`` threads."""
+
+    def __init__(self, workers=4, timeout=120.0):
+        self.workers = workers
+        self.timeout = timeout
+        self.session = None
+        self.pool = None
+
+    async def __aenter__(self):
+        if aiohttp is not None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        else:
+            self.pool = ThreadPoolExecutor(self.workers + 1)  # +1 for the graph write
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.session is not None:
+            await self.session.close()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def post(self, url, payload, headers):
+        if self.session is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, _post_blocking, url, payload, headers, self.timeout)
+        async with self.session.post(url, json=payload, headers=headers) as resp:
+            if resp.status >= 400:
+                raise HttpError(resp.status, await resp.text(), resp.headers.get("Retry-After"))
+            return await resp.json(content_type=None)
+
+
+async def post_with_retry(client, url, payload, headers, retries=5, base_delay=1.0):
+    attempt = 0
+    while True:
+        try:
+            return await client.post(url, payload, headers)
+        except (HttpError, OSError, asyncio.TimeoutError) as e:
+            status = getattr(e, "status", None)
+            if attempt >= retries or (status is not None and status not in RETRY_STATUS):
+                raise
+            delay = base_delay * (2 ** attempt) * random.uniform(0.5, 1.0)
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# ---------- Runner ----------
+class IngestRunner:
+    def __init__(self, endpoint, api_key, cache, concurrency=4, rate=60, workflow=WORKFLOW):
+        self.system, self.model, self.temperature = load_prompt(workflow)
+        self.version = prompt_version(self.system, self.model, self.temperature)
+        self.endpoint = endpoint
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.cache = cache
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate)
+        self.stats = {"rows": 0, "cached": 0, "requested": 0, "failed": 0}
+
+    async def convert(self, client, row):
+        """Cleaned Turtle for one row, from the cache or the model; None on failure."""
+        key = row_key(row, self.version)
+        rdf = self.cache.get(key)
+        if rdf is not None:
+            self.stats["cached"] += 1
+            return rdf
+        async with self.semaphore:
+            await self.limiter.acquire()
+            self.stats["requested"] += 1
+            try:
+                response = await post_with_retry(
+                    client, self.endpoint,
+                    request_body(row, self.system, self.model, self.temperature), self.headers)
+                rdf = parse_response(response)
+            except Exception as e:  # one bad row must not stop the batch
+                self.stats["failed"] += 1
+                print(f"⚠️ Row {row.get('ObservationID', '?')}: {e}")
+                return None
+        self.cache.put(key, rdf, {"prompt_version": self.version, "model": self.model, "row": row})
+        return rdf
+
+    async def run(self, rows, chunk_size, sink):
+        """Convert ``rows`` chunk by chunk; each chunk's write overlaps the next chunk's requests."""
+        async with HttpClient(self.concurrency) as client:
+            writing = None
+            chunk = []
+            for row in rows:
+                self.stats["rows"] += 1
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    writing = await self._flush(client, chunk, sink, writing)
+                    chunk = []
+            if chunk:
+                writing = await self._flush(client, chunk, sink, writing)
+            if writing is not None:
+                await writing
+
+    async def _flush(self, client, chunk, sink, writing):
+        results = await asyncio.gather(*(self.convert(client, row) for row in chunk))
+        graph = Graph()
+        for rdf in results:
+            if rdf is not None:
+                graph.parse(data=rdf, format="turtle")
+        if writing is not None:
+            await writing  # keep chunk writes in order
+        if not len(graph):
+            return None
+        return asyncio.ensure_future(sink(client, graph))
+
+
+def neo4j_sink(url, user, password, database="neo4j"):
+    """One n10s inline import per chunk through the HTTP transaction endpoint."""
+    endpoint = f"{url.rstrip('/')}/db/{database}/tx/commit"
+    token = base64.b64encode(f"{user}:{password}".encode("utf-8")).decode("ascii")
+    headers = {"Authorization": f"Basic {token}"}
+
+    async def write(client, graph):
+        payload = {"statements": [{
+            "statement": "CALL n10s.rdf.import.inline($rdf, 'Turtle')",
+            "parameters": {"rdf": graph.serialize(format="turtle")},
+        }]}
+        result = await post_with_retry(client, endpoint, payload, headers)
+        if result.get("errors"):
+            raise RuntimeError(f"Neo4j import failed: {result['errors']}")
+    return write
+
+
+def file_sink(path):
+    """Accumulate all chunks and write one Turtle file at the end (``.close()``)."""
+    merged = Graph()
+
+    async def write(client, graph):
+        for prefix, namespace in graph.namespaces():
+            merged.bind(prefix, namespace, override=False)
+        merged.addN((s, p, o, merged) for s, p, o in graph)
+    write.close = lambda: merged.serialize(destination=str(path), format="turtle")
+    write.graph = merged
+    return write
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent, cached TH5 AI ingestion runner")
+    parser.add_argument("input", help="spreadsheet rows (.csv or .xlsx)")
+    parser.add_argument("--endpoint", default=os.getenv("SDT_AI_ENDPOINT", OPENAI_URL))
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    parser.add_argument("--rate", type=float, default=60, help="max requests per minute (0 = unlimited)")
+    parser.add_argument("--chunk-size", type=int, default=50, help="rows per graph write")
+    parser.add_argument("--cache-dir", default=os.getenv("SDT_AI_CACHE", str(CACHE_DIR)))
+    parser.add_argument("--workflow", default=str(WORKFLOW), help="n8n workflow holding the prompt")
+    parser.add_argument("--out", help="write the merged Turtle here instead of Neo4j")
+    parser.add_argument("--neo4j", default=os.getenv("NEO4J_HTTP", "http://localhost:7474"))
+    args = parser.parse_args()
+
+    if args.out:
+        sink = file_sink(args.out)
+    else:
+        sink = neo4j_sink(args.neo4j, os.getenv("NEO4J_USER", "neo4j"),
+                          os.getenv("NEO4J_PASSWORD", "testpassword"))
+    runner = IngestRunner(args.endpoint, os.getenv("OPENAI_API_KEY"), ResponseCache(args.cache_dir),
+                          args.concurrency, args.rate, args.workflow)
+
+    started = time.perf_counter()
+    asyncio.run(runner.run(read_rows(args.input), args.chunk_size, sink))
+    elapsed = time.perf_counter() - started
+    if args.out:
+        sink.close()
+        print(f"✅ {len(sink.graph)} triples written to: {args.out}")
+    s = runner.stats
+    print(f"📊 Rows={s['rows']} cached={s['cached']} requested={s['requested']} "
+          f"failed={s['failed']} in {elapsed:.1f}s (prompt {runner.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# stub_model_server.py
+# Local stand-in for the chat-completions endpoint used by ai_ingest_runner.py,
+# so the batch runner (concurrency, rate limit, retries, cache, chunked writes)
+# can be exercised and benchmarked without an API key or token cost.
+#
+# Every POST answers with an OpenAI-shaped chat completion whose content is a
+# small, valid Turtle graph built from the spreadsheet record in the user
+# message, wrapped in a ```turtle fence like real model output.
+#
+#   --latency S     seconds to wait before answering (simulated model time)
+#   --fail-rate P   fraction of requests answered with 429 + Retry-After
+#
+# Usage:
+#   python stub_model_server.py --port 8099 --latency 0.5 --fail-rate 0.05
+#   python ai_ingest_runner.py rows.csv --endpoint http://localhost:8099/v1/chat/completions --out out.ttl
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TEMPLATE = """Here is the graph:
+```turtle
+@prefix ex: <http://example.org/sdt#> .
+@prefix sosa: <http://www.w3.org/ns/sosa/> .
+@prefix prov: <http://www.w3.org/ns/prov#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ex:Observation_{id} a sosa:Observation ;
+  ex:hasQuantity "{quantity}"^^xsd:decimal ;
+  ex:hasUnit "{unit}" ;
+  ex:hasLifecycleModule ex:LifecycleModule_{module} ;
+  ex:hasCarbonResult ex:CarbonResult_{id} ;
+  prov:wasGeneratedBy ex:Activity_{activity} .
+
+ex:CarbonResult_{id} a ex:CarbonResult ;
+  ex:hasValue "{carbon}"^^xsd:decimal ;
+  rdfs:label "Carbon result for {id}" .
+```"""
+
+
+def _local(value, default="Unknown"):
+    return re.sub(r"[^A-Za-z0-9_]", "_", str(value or "")) or default
+
+
+def _number(value):
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        return "0.0"
+
+
+def completion(request):
+    content = request["messages"][-1]["content"]
+    record = json.loads(content[content.index("{"):])
+    turtle = TEMPLATE.format(
+        id=_local(record.get("ObservationID")),
+        quantity=_number(record.get("Quantity")),
+        unit=str(record.get("Unit", "")).replace('"', ""),
+        module=_local(record.get("LifecycleModule")),
+        activity=_local(record.get("Activity")),
+        carbon=_number(record.get("CarbonResult")),
+    )
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": turtle}}],
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    lock = threading.Lock()
+    served = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self._send(429, {"error": {"message": "rate limited (stub)"}}, {"Retry-After": "1"})
+            return
+        try:
+            payload = completion(json.loads(body))
+        except (ValueError, KeyError, IndexError) as e:
+            self._send(400, {"error": {"message": str(e)}})
+            return
+        with self.lock:
+            Handler.served += 1
+        self._send(200, payload)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default 5 drops connections under --concurrency > 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub chat-completions server for ai_ingest_runner.py")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of 429 responses")
+    args = parser.parse_args()
+
+    Handler.latency = args.latency
+    Handler.fail_rate = args.fail_rate
+    server = Server(("127.0.0.1", args.port), Handler)
+    print(f"🧪 Stub model endpoint: http://127.0.0.1:{args.port}/v1/chat/completions "
+          f"(latency {args.latency}s, 429 rate {args.fail_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served {Handler.served} completions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+# bench_pipeline.py
+# Reproducible scaling benchmark of the SDT pipeline on synthetic campuses.
+#
+# For every scale (default 1x, 10x, 100x; 1x = 2 buildings x 40 assets x 3
+# meters, one month of 15-minute readings) a campus is generated with
+# synthetic_campus.py (reused while its parameters are unchanged), and the
+# pipeline stages are run as the real scripts, each in a fresh process:
+#
+#   extract       TH2 extract_ifc_properties.py   campus.ifc -> props.csv
+#   rdf           TH2 etl_ifc_to_ttl.py           props.csv -> campus.ttl
+#   shacl         TH2 validate_shacl.py           campus.ttl vs sdt_tbox_s1.ttl (no parse cache)
+#   carbon        docker/etl carbon_engine.py     carbon_items.csv -> EN 15978 totals
+#   observations  docker/etl observation_stream.py  meter CSV -> kWh / kgCO2e (no writes)
+#   neo4j         docker/etl run_etl.py           carbon items + meter readings into Neo4j
+#                 (only with --neo4j and a reachable NEO4J_URI; otherwise skipped)
+#
+# Each script records its stages with pipeline_metrics.py (SDT_METRICS); the
+# harness keeps seconds, items/sec and the process peak RSS per stage, writes
+# them to <work-dir>/results.json, and compares them with baseline.json:
+#   - time:   slower than baseline by more than --time-tolerance (default 35%);
+#             stages faster than --min-seconds in the baseline are not timed
+#   - memory: peak RSS above baseline by more than --memory-tolerance (15%)
+#             and by more than 16 MB
+# A stage that crashes (or writes no trace) in any of its runs is recorded
+# under "failed" and counts as a regression; only stages left out with
+# --stages and the Neo4j stages without --neo4j / a database are skipped.
+# Any regression is printed in a banner and the exit status is 1. Every stage
+# runs --repeat times (default 3) and the best time / lowest RSS is kept, both
+# when recording the baseline and when checking against it.
+# --update-baseline stores the current results instead. Baselines are only
+# comparable on the same machine class; a differing CPU count / platform /
+# Python version is reported before the comparison.
+#
+# Usage:
+#   python bench_pipeline.py                          # 1x, 10x, 100x vs baseline.json
+#   python bench_pipeline.py --scales 1,10 --stages extract,rdf,shacl
+#   python bench_pipeline.py --update-baseline
+#   python bench_pipeline.py --neo4j                  # also the Neo4j ingest (scratch database!)
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from synthetic_campus import generate
+
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parent
+IFC_DIR = REPO / "TH2-integration" / "generate_input_data" / "ifc"
+ETL_DIR = REPO / "docker" / "etl"
+SHAPES = IFC_DIR / "sdt_tbox_s1.ttl"
+BASELINE = HERE / "baseline.json"
+
+BASE_CAMPUS = {"buildings": 2, "assets": 40, "sensors": 3, "months": 1, "seed": 42}
+MEMORY_SLACK = 16 * 2 ** 20
+
+# stage -> (command, metric records kept); paths are relative to the campus directory
+STAGES = {
+    "extract": ([IFC_DIR / "extract_ifc_properties.py", "campus.ifc", "-o", "props.csv"],
+                ["ifc_open", "extract"]),
+    "rdf": ([IFC_DIR / "etl_ifc_to_ttl.py", "props.csv", "campus.ttl"],
+            ["rdf_generation", "serialize"]),
+    "shacl": ([IFC_DIR / "validate_shacl.py", "campus.ttl", SHAPES, "report.csv",
+               "--cache-dir", "0", "--max-print", "0"],
+              ["load_data", "validate", "export_report"]),
+    "carbon": ([ETL_DIR / "carbon_engine.py", "--carbon", "data/carbon_items.csv",
+                "--factors", "data/emission_factors.csv"],
+               ["load_items", "aggregate"]),
+    "observations": ([ETL_DIR / "observation_stream.py", "data/B6_Energy.csv"],
+                     ["transform"]),
+}
+NEO4J_STAGES = {
+    "neo4j_carbon": ({"SDT_MODE": "carbon"}, ["ingest_carbon_items"]),
+    "neo4j_carbon_parallel": ({"SDT_MODE": "carbon", "SDT_WRITERS": "4"}, ["ingest_carbon_items"]),
+    "neo4j_observations": ({"SDT_MODE": "observations", "SDT_OBSERVATION_FILE": "B6_Energy.csv"},
+                           ["ingest_observations"]),
+}
+
+
+def machine():
+    return {"platform": platform.platform(terse=True), "python": platform.python_version(),
+            "cpus": os.cpu_count()}
+
+
+# ---------- Campus ----------
+def campus_dir(work_dir, scale):
+    """Generate (or reuse) the campus of one scale; returns its directory and manifest."""
+    params = dict(BASE_CAMPUS, buildings=BASE_CAMPUS["buildings"] * scale)
+    out = work_dir / f"campus_{scale}x"
+    manifest_path = out / "campus.json"
+    if manifest_path.exists():
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["params"] == params:
+            return out, manifest
+    print(f"🏗️  Generating {scale}x campus ({params['buildings']} buildings) in {out}")
+    started = time.perf_counter()
+    manifest = generate(str(out), **params)
+    c = manifest["counts"]
+    print(f"   {c['assets']:,} assets, {c['sensors']:,} meters, {c['carbon_items']:,} carbon items, "
+          f"{c['readings']:,} readings in {time.perf_counter() - started:.1f}s")
+    return out, manifest
+
+
+# ---------- Stages ----------
+def run_stage(name, command, records, cwd, env=None):
+    """Run one script with SDT_METRICS set; returns {record: metrics} or None on failure."""
+    trace_path = cwd / "metrics" / f"{name}.json"
+    trace_path.parent.mkdir(exist_ok=True)
+    if trace_path.exists():
+        trace_path.unlink()
+    env = dict(os.environ, **(env or {}), SDT_METRICS=str(trace_path))
+    env.pop("SDT_PROFILE", None)
+    env.pop("SDT_TRACEMALLOC", None)
+    proc = subprocess.run([sys.executable, *map(str, command)], cwd=cwd, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if proc.returncode != 0 or not trace_path.exists():
+        print(f"   ❌ {name} failed (exit {proc.returncode}):")
+        print("      " + "\n      ".join(proc.stdout.strip().splitlines()[-15:]))
+        return None
+    with open(trace_path, encoding="utf-8") as f:
+        trace = json.load(f)
+    out = {}
+    for rec in trace["stages"]:
+        if rec["stage"] in records:
+            out[rec["stage"]] = {
+                "seconds": rec["seconds"],
+                "items": rec["items"],
+                "unit": rec["unit"],
+                "items_per_sec": rec["items_per_sec"],
+                "peak_rss_bytes": rec.get("peak_rss_bytes"),
+            }
+    return out
+
+
+def best_of(runs):
+    """Fastest seconds and lowest peak RSS of repeated runs, per record."""
+    best = {}
+    for run in runs:
+        for key, rec in run.items():
+            cur = best.setdefault(key, dict(rec))
+            if rec["seconds"] < cur["seconds"]:
+                cur.update(seconds=rec["seconds"], items_per_sec=rec["items_per_sec"])
+            if rec["peak_rss_bytes"] is not None and rec["peak_rss_bytes"] < (cur["peak_rss_bytes"] or 1 << 62):
+                cur["peak_rss_bytes"] = rec["peak_rss_bytes"]
+    return best
+
+
+def neo4j_available():
+    """True if the neo4j driver is installed and NEO4J_URI answers."""
+    try:
+        from neo4j import GraphDatabase
+    except ImportError:
+        return False
+    try:
+        with GraphDatabase.driver(
+            os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+            auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "testpassword")),
+            connection_timeout=5,
+        ) as driver:
+            driver.verify_connectivity()
+        return True
+    except Exception as e:
+        print(f"⚠️  Neo4j not reachable ({type(e).__name__}); Neo4j stages skipped.")
+        return False
+
+
+def run_scale(work_dir, scale, stages, repeat, with_neo4j):
+    """({stage.record: metrics}, [failed stages]) of one campus scale."""
+    cwd, _ = campus_dir(work_dir, scale)
+    results = {}
+    failed = []
+    for name in stages:
+        command, records = STAGES[name]
+        runs = []
+        for _ in range(repeat):
+            run = run_stage(name, command, records, cwd)
+            if run is None:
+                failed.append(name)
+                break
+            runs.append(run)
+        else:
+            for record, rec in best_of(runs).items():
+                results[f"{name}.{record}"] = rec
+    if with_neo4j:
+        for name, (env, records) in NEO4J_STAGES.items():
+            env = dict(env, SDT_PIPELINE=f"bench_{scale}x")
+            run = run_stage(name, [ETL_DIR / "run_etl.py"], records, cwd, env)
+            if run is None:
+                failed.append(name)
+                continue
+            for record, rec in run.items():
+                results[f"{name}.{record}"] = rec
+    for key, rec in results.items():
+        rss = rec["peak_rss_bytes"]
+        print(f"   {scale:>4}x {key:<30} {rec['seconds']:>8.3f}s  {rec['items']:>11,} {rec['unit']:<9}"
+              f" {rec['items_per_sec'] or 0:>13,.0f}/s  {(rss or 0) / 2 ** 20:>7,.0f} MB")
+    return results, failed
+
+
+# ---------- Baseline ----------
+def compare(current, baseline, time_tol, mem_tol, min_seconds):
+    """List of regression messages (empty = pass); failed stages are regressions."""
+    regressions = []
+    for scale, names in current.get("failed", {}).items():
+        for name in names:
+            regressions.append(f"{scale} {name}: failed")
+    for scale, entries in current["results"].items():
+        base_entries = baseline["results"].get(scale, {})
+        for key, rec in entries.items():
+            base = base_entries.get(key)
+            if base is None:
+                print(f"   {scale} {key}: not in baseline")
+                continue
+            if base["seconds"] >= min_seconds and rec["seconds"] > base["seconds"] * (1 + time_tol):
+                regressions.append(f"{scale} {key}: {rec['seconds']:.3f}s vs baseline {base['seconds']:.3f}s "
+                                   f"({rec['seconds'] / base['seconds'] - 1:+.0%})")
+            rss, base_rss = rec.get("peak_rss_bytes"), base.get("peak_rss_bytes")
+            if rss and base_rss and rss > base_rss * (1 + mem_tol) and rss - base_rss > MEMORY_SLACK:
+                regressions.append(f"{scale} {key}: peak RSS {rss / 2 ** 20:,.0f} MB vs baseline "
+                                   f"{base_rss / 2 ** 20:,.0f} MB ({rss / base_rss - 1:+.0%})")
+        failed = set(current.get("failed", {}).get(scale, ()))
+        for key in sorted(base_entries.keys() - entries.keys()):
+            if key.split(".", 1)[0] not in failed:
+                print(f"   {scale} {key}: in baseline but not run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SDT pipeline scaling benchmark with a stored baseline.")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated campus scale factors")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the best is kept")
+    parser.add_argument("--work-dir", default=str(HERE / "work"), help="generated campuses and results")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.35)
+    parser.add_argument("--memory-tolerance", type=float, default=0.15)
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="baseline stages shorter than this are not timed (noise)")
+    parser.add_argument("--neo4j", action="store_true",
+                        help="also run the Neo4j ingest stages (writes to NEO4J_URI; use a scratch database)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))} (choose from {', '.join(STAGES)})")
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    with_neo4j = args.neo4j and neo4j_available()
+    if not args.neo4j:
+        print("ℹ️  Neo4j stages skipped (run with --neo4j against a scratch database).")
+
+    current = {"machine": machine(), "campus": BASE_CAMPUS,
+               "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": {}, "failed": {}}
+    for scale in scales:
+        print(f"\n📏 Scale {scale}x")
+        results, failed = run_scale(work_dir, scale, stages, args.repeat, with_neo4j)
+        current["results"][f"{scale}x"] = results
+        if failed:
+            current["failed"][f"{scale}x"] = failed
+
+    results_path = work_dir / "results.json"
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\n📄 Results written to: {results_path}")
+
+    if args.update_baseline:
+        if current["failed"]:
+            sys.exit("❌ Stages failed; baseline not updated: " + ", ".join(
+                f"{scale} {name}" for scale, names in current["failed"].items() for name in names))
+        baseline = {"machine": current["machine"], "campus": current["campus"],
+                    "created": current["created"], "results": {}}
+        if os.path.exists(args.baseline):  # keep scales / stages that were not re-run
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline["results"] = json.load(f).get("results", {})
+        for scale, entries in current["results"].items():
+            baseline["results"].setdefault(scale, {}).update(entries)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"📌 Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("campus") != current["campus"]:
+        sys.exit("❌ Baseline was recorded for different campus parameters; re-create it with --update-baseline.")
+    if baseline.get("machine") != current["machine"]:
+        print(f"⚠️  Baseline machine {baseline.get('machine')} differs from this one {current['machine']}; "
+              f"timings may not be comparable.")
+
+    print(f"\n🔎 Comparing with {args.baseline} (time +{args.time_tolerance:.0%}, "
+          f"memory +{args.memory_tolerance:.0%})")
+    regressions = compare(current, baseline, args.time_tolerance, args.memory_tolerance, args.min_seconds)
+    if regressions:
+        bar = "!" * 72
+        print(f"\n{bar}\n❌ PERFORMANCE REGRESSION ({len(regressions)})")
+        for message in regressions:
+            print(f"   - {message}")
+        print(bar)
+        sys.exit(1)
+    print("✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
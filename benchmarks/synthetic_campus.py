@@ -0,0 +1,253 @@
+# synthetic_campus.py
+# Parameterized synthetic campus for the pipeline benchmarks (bench_pipeline.py).
+#
+# One campus = N buildings, each with M assets (building elements and
+# equipment), K energy meters (IfcSensor) and T months of 15-minute meter
+# readings. Every output is derived from the same seeded random stream, so a
+# given parameter set always produces byte-identical files, and the ids agree
+# across files (the meter AssetIDs and carbon_items.csv asset_ids are the IFC
+# GlobalIds of the equipment / elements):
+#
+#   campus.ifc              IFC4 model (spaces, elements, equipment, sensors,
+#                           property sets), input of extract_ifc_properties.py
+#   data/carbon_items.csv   A1-A3 / A5 / C1 items per element, daily B6 items
+#                           per equipment (carbon_id, lifecycle_stage, quantity,
+#                           unit, factor_id, asset_id, description)
+#   data/emission_factors.csv   factors referenced by carbon_items.csv
+#   data/B6_Energy.csv      meter readings (Timestamp, SensorID, Value, Unit, AssetID)
+#
+# Entities are created with ifcopenshell's low-level API rather than
+# ifcopenshell.api (make_ntu_campus_ifc.py), which keeps a 100x campus
+# generating in seconds.
+#
+# Usage:
+#   python synthetic_campus.py out/campus_10x --buildings 20 --assets 40 --sensors 3 --months 1
+
+import argparse
+import csv
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import ifcopenshell
+import ifcopenshell.guid
+
+# IfcClass -> (pset name, {property: (low, high) or [choices]}); element
+# classes carry a material, equipment classes an energy / power property
+ELEMENTS = {
+    "IfcWall":   ("Pset_Material", {"Material": ["Brick", "Concrete"], "Thickness_mm": (100, 300)}),
+    "IfcSlab":   ("Pset_Material", {"Material": ["Concrete"], "Thickness_mm": (150, 350)}),
+    "IfcRoof":   ("Pset_EnergyUse", {"EnergyUse_kWh": (50, 300)}),
+    "IfcBeam":   ("Pset_Material", {"Material": ["Steel", "Concrete"], "Length_mm": (2000, 9000)}),
+    "IfcColumn": ("Pset_Material", {"Material": ["Steel", "Concrete"], "Height_mm": (3000, 4500)}),
+    "IfcWindow": ("Pset_Material", {"Material": ["Glass"], "Area_m2": (1, 6)}),
+}
+EQUIPMENT = {
+    "IfcUnitaryEquipment": ("Pset_AHU_Performance", {"Power_kW": (2, 8), "FlowRate_m3h": (800, 2400)}),
+    "IfcFan":              ("Pset_Equipment", {"PowerRating_kW": (0.2, 1.5)}),
+    "IfcLightFixture":     ("Pset_Equipment", {"PowerRating_kW": (0.02, 0.2)}),
+    "IfcPump":             ("Pset_Equipment", {"PowerRating_kW": (0.5, 4)}),
+}
+EQUIPMENT_SHARE = 0.3
+
+# Pset material -> emission factor of the element's A1-A3 item
+MATERIAL_FACTORS = {"Concrete": "EF_CONCRETE", "Brick": "EF_BRICK", "Steel": "EF_STEEL", "Glass": "EF_GLASS"}
+FACTORS = [
+    {"id": "EF_ELEC_GRID", "unit": "kgCO2e/kWh", "value": 0.5},
+    {"id": "EF_FILTER", "unit": "kgCO2e/unit", "value": 12.3},
+    {"id": "EF_CONCRETE", "unit": "kgCO2e/kg", "value": 0.13},
+    {"id": "EF_BRICK", "unit": "kgCO2e/kg", "value": 0.24},
+    {"id": "EF_STEEL", "unit": "kgCO2e/kg", "value": 1.85},
+    {"id": "EF_GLASS", "unit": "kgCO2e/kg", "value": 1.44},
+    {"id": "EF_SITE_DIESEL", "unit": "kgCO2e/MJ", "value": 0.074},
+    {"id": "EF_WASTE", "unit": "kgCO2e/t", "value": 21.0},
+]
+
+READING_MINUTES = 15
+DAYS_PER_MONTH = 30
+START = datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+
+class Campus:
+    """Seeded id / value source shared by all generated files."""
+
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+
+    def guid(self):
+        return ifcopenshell.guid.compress(uuid.UUID(int=self.rnd.getrandbits(128)).hex)
+
+    def value(self, spec):
+        if isinstance(spec, list):
+            return self.rnd.choice(spec)
+        return round(self.rnd.uniform(*spec), 3)
+
+
+# ---------- IFC ----------
+def _pset(model, campus, product, name, props):
+    values = []
+    for key, value in props.items():
+        nominal = model.create_entity("IfcLabel", value) if isinstance(value, str) \
+            else model.create_entity("IfcReal", float(value))
+        values.append(model.create_entity("IfcPropertySingleValue", Name=key, NominalValue=nominal))
+    pset = model.create_entity("IfcPropertySet", GlobalId=campus.guid(), Name=name, HasProperties=values)
+    model.create_entity("IfcRelDefinesByProperties", GlobalId=campus.guid(),
+                        RelatedObjects=[product], RelatingPropertyDefinition=pset)
+
+
+def _aggregate(model, campus, parent, children):
+    model.create_entity("IfcRelAggregates", GlobalId=campus.guid(),
+                        RelatingObject=parent, RelatedObjects=children)
+
+
+def _contain(model, campus, storey, products):
+    model.create_entity("IfcRelContainedInSpatialStructure", GlobalId=campus.guid(),
+                        RelatingStructure=storey, RelatedElements=products)
+
+
+def build_ifc(campus, buildings, assets, sensors):
+    """IFC4 model plus the asset table [(GlobalId, name, IfcClass, props)] and meter list."""
+    model = ifcopenshell.file(schema="IFC4")
+    project = model.create_entity("IfcProject", GlobalId=campus.guid(), Name="Synthetic Campus")
+    site = model.create_entity("IfcSite", GlobalId=campus.guid(), Name="Synthetic Campus Site")
+    _aggregate(model, campus, project, [site])
+
+    equipment_classes, element_classes = list(EQUIPMENT), list(ELEMENTS)
+    table, meters, blds = [], [], []
+    for b in range(buildings):
+        tag = f"B{b + 1:04d}"
+        building = model.create_entity("IfcBuilding", GlobalId=campus.guid(), Name=f"Building_{tag}")
+        storeys = [model.create_entity("IfcBuildingStorey", GlobalId=campus.guid(), Name=f"{tag}_Level_{i + 1}",
+                                       Elevation=4.5 * i) for i in range(2)]
+        _aggregate(model, campus, building, storeys)
+        blds.append(building)
+        for i, storey in enumerate(storeys):
+            space = model.create_entity("IfcSpace", GlobalId=campus.guid(), Name=f"{tag}_Space_{i + 1}")
+            _aggregate(model, campus, storey, [space])
+            _pset(model, campus, space, "Pset_Area", {"GrossArea_m2": campus.value((40, 400)),
+                                                      "Volume_m3": campus.value((120, 1600))})
+
+        n_equipment = max(1, round(assets * EQUIPMENT_SHARE))
+        products, equipment = [], []
+        for a in range(assets):
+            is_equipment = a < n_equipment
+            classes = equipment_classes if is_equipment else element_classes
+            cls = classes[a % len(classes)]
+            pset_name, spec = (EQUIPMENT if is_equipment else ELEMENTS)[cls]
+            props = {k: campus.value(v) for k, v in spec.items()}
+            guid = campus.guid()
+            product = model.create_entity(cls, GlobalId=guid, Name=f"{tag}_{cls[3:]}_{a + 1}")
+            _pset(model, campus, product, pset_name, props)
+            products.append(product)
+            table.append((guid, product.Name, cls, props))
+            if is_equipment:
+                equipment.append(guid)
+
+        sensor_products = []
+        for k in range(sensors):
+            guid = campus.guid()
+            sensor = model.create_entity("IfcSensor", GlobalId=guid, Name=f"{tag}_EnergyMeter_{k + 1}")
+            _pset(model, campus, sensor, "Pset_Sensor", {"SensorType": "ENERGY"})
+            sensor_products.append(sensor)
+            meters.append((guid, equipment[k % len(equipment)]))
+
+        _contain(model, campus, storeys[0], products[::2] + sensor_products)
+        _contain(model, campus, storeys[1], products[1::2])
+    _aggregate(model, campus, site, blds)
+    return model, table, meters
+
+
+# ---------- Carbon items ----------
+def carbon_rows(campus, table, months):
+    for guid, name, cls, props in table:
+        if cls in ELEMENTS:
+            factor = MATERIAL_FACTORS[props.get("Material", "Concrete")]
+            kg = round(campus.rnd.uniform(200, 20000), 1)
+            yield (f"CI_{guid}_A1A3", "A1-A3", kg, "kg", factor, guid, f"{name} material")
+            yield (f"CI_{guid}_A5", "A5", round(kg * 0.02, 1), "MJ", "EF_SITE_DIESEL", guid, f"{name} installation")
+            yield (f"CI_{guid}_C1", "C1", round(kg / 1000, 3), "t", "EF_WASTE", guid, f"{name} demolition")
+        else:
+            power = next(v for k, v in props.items() if "Power" in k)
+            yield (f"CI_{guid}_A1A3", "A1-A3", 1, "unit", "EF_FILTER", guid, f"{name} unit")
+            for d in range(months * DAYS_PER_MONTH):
+                day = (START + timedelta(days=d)).strftime("%Y-%m-%d")
+                kwh = round(power * 24 * campus.rnd.uniform(0.2, 0.6), 2)
+                yield (f"CI_{guid}_B6_{day}", "B6", kwh, "kWh", "EF_ELEC_GRID", guid,
+                       f"{name} operational energy {day}")
+
+
+# ---------- Meter readings ----------
+def meter_rows(campus, meters, months):
+    """15-minute readings, interleaved by timestamp like a meter export."""
+    steps = months * DAYS_PER_MONTH * 24 * 60 // READING_MINUTES
+    rnd = campus.rnd
+    base = [rnd.uniform(0.5, 6.0) for _ in meters]
+    for step in range(steps):
+        ts = (START + timedelta(minutes=READING_MINUTES * step)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        hour = (step * READING_MINUTES // 60) % 24
+        load = 1.0 if 8 <= hour < 20 else 0.35
+        for (sensor, asset), b in zip(meters, base):
+            yield (ts, sensor, f"{b * load * rnd.uniform(0.8, 1.2):.3f}", "kWh", asset)
+
+
+def _write_csv(path, header, rows):
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
+
+
+def generate(out_dir, buildings=2, assets=40, sensors=3, months=1, seed=42):
+    """Write one campus to ``out_dir``; returns its manifest (parameters, paths, counts)."""
+    data_dir = os.path.join(out_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    campus = Campus(seed)
+    model, table, meters = build_ifc(campus, buildings, assets, sensors)
+    ifc_path = os.path.join(out_dir, "campus.ifc")
+    model.header.file_name.time_stamp = START.strftime("%Y-%m-%dT%H:%M:%S")  # reproducible header
+    model.write(ifc_path)
+
+    paths = {
+        "ifc": ifc_path,
+        "carbon_items": os.path.join(data_dir, "carbon_items.csv"),
+        "factors": os.path.join(data_dir, "emission_factors.csv"),
+        "meter": os.path.join(data_dir, "B6_Energy.csv"),
+    }
+    items = _write_csv(paths["carbon_items"],
+                       ["carbon_id", "lifecycle_stage", "quantity", "unit", "factor_id", "asset_id", "description"],
+                       carbon_rows(campus, table, months))
+    _write_csv(paths["factors"], ["id", "unit", "value"], ([f["id"], f["unit"], f["value"]] for f in FACTORS))
+    readings = _write_csv(paths["meter"], ["Timestamp", "SensorID", "Value", "Unit", "AssetID"],
+                          meter_rows(campus, meters, months))
+
+    manifest = {
+        "params": {"buildings": buildings, "assets": assets, "sensors": sensors, "months": months, "seed": seed},
+        "paths": {k: os.path.relpath(v, out_dir) for k, v in paths.items()},
+        "counts": {"assets": len(table), "sensors": len(meters), "carbon_items": items, "readings": readings},
+    }
+    with open(os.path.join(out_dir, "campus.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic campus (IFC, carbon items, meter CSV).")
+    parser.add_argument("out_dir")
+    parser.add_argument("--buildings", type=int, default=2)
+    parser.add_argument("--assets", type=int, default=40, help="assets per building")
+    parser.add_argument("--sensors", type=int, default=3, help="energy meters per building")
+    parser.add_argument("--months", type=int, default=1, help="months of 15-minute readings")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    m = generate(args.out_dir, args.buildings, args.assets, args.sensors, args.months, args.seed)
+    c = m["counts"]
+    print(f"✅ Campus written to: {args.out_dir}")
+    print(f"🏢 {args.buildings} buildings, {c['assets']} assets, {c['sensors']} meters, "
+          f"{c['carbon_items']} carbon items, {c['readings']} readings")
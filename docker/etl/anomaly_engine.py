@@ -0,0 +1,237 @@
+"""
+SDT Anomaly Engine
+------------------
+Streaming TH3 anomaly rules evaluated on each Observation chunk as it
+is ingested (SDT_ANOMALY=1 in observations mode), instead of periodic
+whole-graph Cypher scans.
+
+Rules see every reading in kWh: values are converted with the same unit
+table as observation_stream (Wh / MWh / MJ ... -> kWh), so rule limits
+are kWh per reading whatever unit a meter reports in. Readings in a unit
+that is not an energy unit (e.g. kW) are not evaluated and are counted
+in ``skipped``. A reading not later than the sensor's last evaluated one
+(a re-ingested or overlapping file after a warm start, or an
+out-of-order row) is not evaluated or pushed either and is counted in
+``stale``, so it cannot enter a z-score window twice or turn a rate
+backwards.
+
+Rule kinds (see anomaly_rules.json):
+
+    threshold   value above ``max`` or below ``min``
+    rate        |value change| / hours since the previous reading above ``max_per_hour``
+    zscore      |value - mean| / std of the last ``window`` readings above ``z``
+                (after at least ``min_count`` readings)
+
+State is kept per sensor: the previous value and time, and one ring
+buffer (``array('d')`` of ``window`` floats) with a running sum and sum
+of squares per distinct z-score window, so every reading costs O(1)
+whatever the history length;
+the sums are recomputed from the buffer each time it wraps, which keeps
+floating-point drift bounded at amortized O(1).
+
+Each alert becomes a WorkflowTask with a deterministic id
+(``TASK_<rule>_<observation id>``), so re-ingesting a file does not
+duplicate tasks. A rule does not fire again for the same sensor within
+its ``cooldown_minutes``. The tasks are written by run_etl.py in the
+same transaction as the chunk's Observations, i.e. they are visible as
+soon as the chunk commits.
+"""
+
+import json
+import math
+import os
+import pickle
+from array import array
+from datetime import datetime
+
+from observation_stream import KWH_PER_UNIT
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "anomaly_rules.json")
+
+TASK_UNWIND = """
+UNWIND $tasks AS t
+MATCH (o:Observation {id: t.observation})
+MERGE (task:WorkflowTask {id: t.id})
+ON CREATE SET task.type = t.type,
+              task.status = "Open",
+              task.createdAt = datetime(),
+              task.triggerRule = t.rule,
+              task.severity = t.severity,
+              task.detail = t.detail
+MERGE (task)-[:TRIGGERED_BY]->(o)
+WITH task, t
+MATCH (a:Asset {id: t.asset})
+MERGE (task)-[:ASSOCIATED_WITH_ASSET]->(a)
+"""
+
+# -------------------------------------------------------------------
+# Per-sensor state
+# -------------------------------------------------------------------
+
+class Ring:
+    """Fixed-size ring buffer of the last ``window`` readings with running sums."""
+
+    __slots__ = ("values", "head", "count", "total", "total_sq")
+
+    def __init__(self, window):
+        self.values = array("d", bytes(8 * window))
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        ring = self.values
+        old = ring[self.head]
+        ring[self.head] = value
+        self.head += 1
+        if self.count < len(ring):
+            self.count += 1
+            self.total += value
+            self.total_sq += value * value
+        else:
+            self.total += value - old
+            self.total_sq += value * value - old * old
+        if self.head == len(ring):
+            self.head = 0
+            self.total = math.fsum(ring)
+            self.total_sq = math.fsum(v * v for v in ring)
+
+    def mean_std(self):
+        n = self.count
+        mean = self.total / n
+        return mean, math.sqrt(max(self.total_sq / n - mean * mean, 0.0))
+
+
+class SensorState:
+    """Last reading plus one ring per z-score window."""
+
+    __slots__ = ("last_value", "last_time", "rings", "fired")
+
+    def __init__(self, windows):
+        self.last_value = None
+        self.last_time = None
+        self.rings = {w: Ring(w) for w in windows}
+        self.fired = {}  # rule id -> time of the last alert
+
+# -------------------------------------------------------------------
+# Engine
+# -------------------------------------------------------------------
+
+def load_rules(path=None):
+    with open(path or DEFAULT_RULES, encoding="utf-8") as f:
+        return json.load(f)["rules"]
+
+
+def parse_time(text):
+    return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+
+
+class AnomalyEngine:
+    """Evaluates ``rules`` reading by reading over columnar Observation chunks."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.windows = tuple(sorted({r["window"] for r in rules if r["kind"] == "zscore"}))
+        self.sensors = {}
+        self.readings = 0
+        self.skipped = 0
+        self.stale = 0
+        self.alerts = 0
+
+    def process(self, observations):
+        """WorkflowTask parameter maps for one chunk (see observation_stream)."""
+        tasks = []
+        windows = self.windows
+        sensors = self.sensors
+        scales = {}
+        skipped = 0
+        stale = 0
+        for obs_id, t, sensor, asset, raw, unit in zip(
+            observations["id"], observations["t"], observations["sensor"],
+            observations["asset"], observations["value"], observations["unit"],
+        ):
+            scale = scales.get(unit)
+            if scale is None:
+                scale = scales[unit] = KWH_PER_UNIT.get(unit.strip().lower(), 0.0)
+            if not scale:
+                skipped += 1
+                continue
+            value = raw * scale
+            state = sensors.get(sensor)
+            if state is None:
+                state = sensors[sensor] = SensorState(windows)
+            ts = parse_time(t)
+            if state.last_time is not None and ts <= state.last_time:
+                stale += 1
+                continue
+            for rule in self.rules:
+                detail = self._check(rule, state, value, ts)
+                if detail is None:
+                    continue
+                last = state.fired.get(rule["id"])
+                if last is not None and ts - last < 60.0 * rule.get("cooldown_minutes", 0):
+                    continue
+                state.fired[rule["id"]] = ts
+                tasks.append({
+                    "id": f"TASK_{rule['id']}_{obs_id}",
+                    "type": rule.get("task_type", "Inspect_Asset"),
+                    "rule": rule["id"],
+                    "severity": rule.get("severity", "medium"),
+                    "detail": detail,
+                    "observation": obs_id,
+                    "asset": asset,
+                })
+            for ring in state.rings.values():
+                ring.push(value)
+            state.last_value = value
+            state.last_time = ts
+        self.readings += len(observations["id"]) - skipped - stale
+        self.skipped += skipped
+        self.stale += stale
+        self.alerts += len(tasks)
+        return tasks
+
+    @staticmethod
+    def _check(rule, state, value, ts):
+        kind = rule["kind"]
+        if kind == "threshold":
+            if "max" in rule and value > rule["max"]:
+                return f"value {value:g} kWh > {rule['max']:g} kWh"
+            if "min" in rule and value < rule["min"]:
+                return f"value {value:g} kWh < {rule['min']:g} kWh"
+        elif kind == "rate":
+            if state.last_time is not None and ts > state.last_time:
+                rate = abs(value - state.last_value) * 3600.0 / (ts - state.last_time)
+                if rate > rule["max_per_hour"]:
+                    return f"rate {rate:g} kWh/h > {rule['max_per_hour']:g} kWh/h"
+        elif kind == "zscore":
+            ring = state.rings[rule["window"]]
+            if ring.count >= rule.get("min_count", rule["window"]):
+                mean, std = ring.mean_std()
+                if std > 0.0:
+                    z = (value - mean) / std
+                    if abs(z) > rule["z"]:
+                        return f"z-score {z:.2f} (mean {mean:g}, std {std:g})"
+        else:
+            raise ValueError(f"Unknown rule kind: {kind!r}")
+        return None
+
+    # ---------- Warm start between runs ----------
+    def save_state(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump({"windows": self.windows, "sensors": self.sensors}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    def load_state(self, path):
+        """Resume the per-sensor state of a previous run (same z-score windows only)."""
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+        if saved.get("windows") != self.windows:
+            return False
+        self.sensors = saved["sensors"]
+        return True
@@ -0,0 +1,114 @@
+"""
+SDT Observation Throughput Benchmark
+------------------------------------
+Readings/sec of the B6 meter ingest path on one core.
+
+This script:
+1. Generates a synthetic meter CSV (Timestamp, SensorID, Value, Unit, AssetID)
+2. Runs chunked parse -> unit conversion -> kgCO2e with a no-op writer
+3. Reports readings/sec and checks the kgCO2e total against a per-row loop
+4. With ``--anomaly``, also runs the streaming anomaly rules on every chunk
+
+The Neo4j write is not included; compare the result with the
+"readings/sec" line printed by ``SDT_MODE=observations python run_etl.py``.
+
+Usage:
+    python bench_observations.py --readings 1000000
+    python bench_observations.py --readings 1000000 --anomaly
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from anomaly_engine import AnomalyEngine, load_rules
+from observation_stream import KWH_PER_UNIT, iter_observation_chunks
+
+UNITS = ["kWh", "kWh", "kWh", "Wh", "MWh", "kW"]
+KG_PER_KWH = 0.5  # EF_ELEC_GRID seed value
+
+# -------------------------------------------------------------------
+# Synthetic data
+# -------------------------------------------------------------------
+
+def generate_meter_csv(path, readings, sensors=200, seed=42):
+    """15-minute readings from ``sensors`` meters, interleaved by timestamp."""
+    rnd = random.Random(seed)
+    start = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "SensorID", "Value", "Unit", "AssetID"])
+        for n in range(readings):
+            step, sensor = divmod(n, sensors)
+            ts = (start + timedelta(minutes=15 * step)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            writer.writerow([
+                ts,
+                f"SENSOR_{sensor:04d}",
+                f"{rnd.uniform(0.0, 50.0):.3f}",
+                UNITS[sensor % len(UNITS)],
+                f"ASSET_{sensor // 4:04d}",
+            ])
+
+
+def reference_kg(path):
+    total = 0.0
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            scale = KWH_PER_UNIT.get(r["Unit"].lower())
+            if scale is not None:
+                total += float(r["Value"]) * scale * KG_PER_KWH
+    return total
+
+# -------------------------------------------------------------------
+# Benchmark
+# -------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--path", default="outputs/bench_meter.csv")
+    parser.add_argument("--anomaly", action="store_true",
+                        help="also evaluate anomaly_rules.json on every chunk")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the generated CSV after the run")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.path) or ".", exist_ok=True)
+    print(f"Generating {args.readings:,} synthetic readings: {args.path}")
+    generate_meter_csv(args.path, args.readings)
+
+    engine = AnomalyEngine(load_rules()) if args.anomaly else None
+    readings = carbon_items = 0
+    kg = rule_seconds = 0.0
+    started = time.perf_counter()
+    for observations, carbon, _ in iter_observation_chunks(args.path, KG_PER_KWH, args.chunk_size):
+        readings += len(observations["id"])
+        carbon_items += len(carbon["id"])
+        kg += sum(carbon["kg"])
+        if engine is not None:
+            t0 = time.perf_counter()
+            engine.process(observations)
+            rule_seconds += time.perf_counter() - t0
+    elapsed = time.perf_counter() - started
+
+    expected = reference_kg(args.path)
+    assert readings == args.readings, f"reading count mismatch: {readings} != {args.readings}"
+    assert abs(kg - expected) <= 1e-6 * max(1.0, expected), f"kgCO2e mismatch: {kg} != {expected}"
+    print(f"Readings: {readings:,} ({carbon_items:,} CarbonItems) in {elapsed:.2f}s "
+          f"({readings / elapsed:,.0f} readings/sec)")
+    print(f"Total: {kg:,.1f} kgCO2e")
+    if engine is not None:
+        print(f"Anomaly rules: {engine.alerts:,} alerts, "
+              f"{rule_seconds / readings * 1e6:.2f} us/reading ({rule_seconds:.2f}s)")
+
+    if not args.keep:
+        os.remove(args.path)
+
+
+if __name__ == "__main__":
+    main()
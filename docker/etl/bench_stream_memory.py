@@ -0,0 +1,119 @@
+"""
+SDT Streaming Memory Benchmark
+------------------------------
+Memory-ceiling benchmark for the streaming CarbonItem reader.
+
+This script:
+1. Generates a synthetic carbon_items.csv of the requested size
+2. Runs reader -> coercion -> batching with a no-op writer
+3. Reports rows/sec and the peak RSS of the process
+
+Peak RSS should stay roughly constant whether the file is 10 MB or
+several GB; with ``--materialize`` the old ``list(csv.DictReader(f))``
+behaviour is measured instead for comparison (use a small file).
+
+Usage:
+    python bench_stream_memory.py --size-gb 2
+    python bench_stream_memory.py --size-gb 0.05 --materialize
+"""
+
+import argparse
+import csv
+import os
+import random
+import resource
+import sys
+import time
+
+from carbon_stream import coerce_carbon_row, iter_batches, iter_carbon_rows
+
+STAGES = [("B2", "unit"), ("B4", "unit"), ("B6", "kWh")]
+
+# -------------------------------------------------------------------
+# Synthetic data
+# -------------------------------------------------------------------
+
+def generate_carbon_csv(path, size_bytes, seed=42):
+    """Write CarbonItem rows until the file reaches ``size_bytes``."""
+    rnd = random.Random(seed)
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["carbon_id", "lifecycle_stage", "quantity", "unit"])
+        while f.tell() < size_bytes:
+            # Write in blocks so f.tell() is not called for every row
+            for _ in range(10000):
+                stage, unit = rnd.choice(STAGES)
+                writer.writerow([
+                    f"CI_{stage}_{rows:010d}",
+                    stage,
+                    f"{rnd.uniform(0.1, 5000.0):.3f}",
+                    unit,
+                ])
+                rows += 1
+    return rows
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# -------------------------------------------------------------------
+# Benchmark
+# -------------------------------------------------------------------
+
+def consume_streaming(path, batch_size):
+    n = 0
+    for batch in iter_batches(iter_carbon_rows(path), batch_size):
+        n += len(batch)
+    return n
+
+
+def consume_materialized(path, batch_size):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    items = [coerce_carbon_row(r) for r in rows]
+    n = 0
+    for batch in iter_batches(items, batch_size):
+        n += len(batch)
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--path", default="outputs/bench_carbon_items.csv")
+    parser.add_argument("--materialize", action="store_true",
+                        help="measure the list()-based reader instead")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the generated CSV after the run")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.path) or ".", exist_ok=True)
+    size_bytes = int(args.size_gb * 1024 ** 3)
+
+    print(f"Generating {args.size_gb:g} GB synthetic CSV: {args.path}")
+    generated = generate_carbon_csv(args.path, size_bytes)
+    baseline_mb = peak_rss_mb()
+
+    mode = "materialized" if args.materialize else "streaming"
+    consume = consume_materialized if args.materialize else consume_streaming
+
+    started = time.perf_counter()
+    n = consume(args.path, args.batch_size)
+    elapsed = time.perf_counter() - started
+
+    assert n == generated, f"row count mismatch: {n} != {generated}"
+    print(f"Mode: {mode}")
+    print(f"Rows: {n:,} in {elapsed:.1f}s ({n / elapsed:,.0f} rows/sec)")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB (after generation: {baseline_mb:.1f} MB)")
+
+    if not args.keep:
+        os.remove(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+SDT Carbon Engine
+-----------------
+Offline EN 15978 lifecycle carbon calculation over columnar arrays.
+
+CarbonItems, EmissionFactors and LifecycleStages are loaded once (from
+Neo4j, from carbon_items.csv + a factor CSV, or from a saved ``.npz``
+snapshot) into a ``CarbonDataset``:
+
+    items:   quantity (in the base unit of its dimension), dimension,
+             asset / stage / factor codes (int32 indexes, -1 = none)
+    factors: value (in the factor's own unit), kgCO2e per base unit
+             per unit of value, dimension
+
+Unit normalization and the item -> factor join are then a handful of
+numpy operations, and per-asset / per-stage totals are one ``bincount``,
+so a what-if scenario (e.g. a different grid factor) over millions of
+items costs milliseconds and never touches Neo4j.
+
+Base units: kWh (energy), kg (mass), m3, m2, m, unit (count).
+Items without a factor link (carbon_items.csv has no factor_id column,
+and run_etl does not create LINKED_TO_FACTOR for it) get the default
+factor of their stage and unit dimension from ``DEFAULT_FACTORS``, the
+same pairing as the init.cypher demo items. Items whose unit does not
+match their factor's dimension or whose factor or quantity is not a
+finite number (e.g. an unrecognized "kg CO2e/kWh" factor unit), items
+still without a factor and items without a stage contribute 0 and are
+counted in ``Totals.unmatched``, ``Totals.unfactored`` and
+``Totals.unstaged``.
+
+Usage:
+    python carbon_engine.py --carbon data/carbon_items.csv --scenario EF_ELEC_GRID=0.3
+    python carbon_engine.py --neo4j --save outputs/carbon_snapshot.npz
+    python carbon_engine.py --load outputs/carbon_snapshot.npz --scenario EF_ELEC_GRID=0.2
+    python carbon_engine.py --synthetic 5000000 --scenario EF_ELEC_GRID=0.3
+"""
+
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from observation_stream import KWH_PER_UNIT
+from pipeline_metrics import metrics
+
+# Seed emission factors from init.cypher, used when no factor file is given
+SEED_FACTORS = [
+    {"id": "EF_ELEC_GRID", "unit": "kgCO2e/kWh", "value": 0.5},
+    {"id": "EF_FILTER", "unit": "kgCO2e/unit", "value": 12.3},
+]
+
+# (stage, unit dimension) -> factor for items without a factor link,
+# as linked in init.cypher (CI_B6_ELEC_0001, CI_B4_FILTER_0001)
+DEFAULT_FACTORS = {
+    ("B6", "energy"): "EF_ELEC_GRID",
+    ("B2", "count"): "EF_FILTER",
+    ("B4", "count"): "EF_FILTER",
+}
+
+# -------------------------------------------------------------------
+# Units
+# -------------------------------------------------------------------
+
+DIMENSIONS = ["energy", "mass", "volume", "area", "length", "count"]
+
+# unit -> (dimension, base units per unit)
+UNITS = {u: ("energy", s) for u, s in KWH_PER_UNIT.items()}
+UNITS.update({
+    "g": ("mass", 1e-3), "kg": ("mass", 1.0), "t": ("mass", 1e3), "tonne": ("mass", 1e3),
+    "l": ("volume", 1e-3), "m3": ("volume", 1.0),
+    "m2": ("area", 1.0),
+    "m": ("length", 1.0),
+    "unit": ("count", 1.0), "pcs": ("count", 1.0), "ea": ("count", 1.0), "nr": ("count", 1.0),
+})
+
+# kgCO2e per unit of the factor numerator
+CO2E_UNITS = {"gco2e": 1e-3, "kgco2e": 1.0, "tco2e": 1e3}
+
+
+def unit_info(unit):
+    """(dimension code, scale to base unit); (-1, nan) for unknown units."""
+    dim, scale = UNITS.get((unit or "").strip().lower(), (None, np.nan))
+    return (DIMENSIONS.index(dim) if dim else -1), scale
+
+
+def normalize(quantities, units):
+    """Vectorized: quantities in base units and their dimension codes."""
+    names, inverse = np.unique(np.asarray(units, dtype=str), return_inverse=True)
+    info = [unit_info(u) for u in names]
+    dims = np.array([d for d, _ in info], dtype=np.int8)
+    scales = np.array([s for _, s in info], dtype=np.float64)
+    return np.asarray(quantities, dtype=np.float64) * scales[inverse], dims[inverse]
+
+
+def _quantity(value):
+    """float, NaN for a missing or unparseable quantity (counted as unmatched)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def factor_info(unit):
+    """(dimension code, kgCO2e per base unit per unit of value), e.g. for "tCO2e/MWh"."""
+    num, _, den = (unit or "kgCO2e/unit").partition("/")
+    dim, scale = unit_info(den or "unit")
+    return dim, CO2E_UNITS.get(num.strip().lower(), np.nan) / scale
+
+# -------------------------------------------------------------------
+# Dataset
+# -------------------------------------------------------------------
+
+class _Codes:
+    """String -> dense int code."""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for n in names:
+            self.code(n)
+
+    def code(self, name):
+        if not name:
+            return -1
+        c = self.index.get(name)
+        if c is None:
+            c = self.index[name] = len(self.names)
+            self.names.append(name)
+        return c
+
+
+def default_factor(stage, unit):
+    """Factor id from ``DEFAULT_FACTORS`` for an item without a factor link, or None."""
+    dim = UNITS.get((unit or "").strip().lower(), (None,))[0]
+    return DEFAULT_FACTORS.get(((stage or "").strip().upper(), dim))
+
+
+class CarbonDataset:
+    """Columnar CarbonItems plus the factor and stage tables they point into."""
+
+    defaulted = 0  # items that got their factor from DEFAULT_FACTORS
+
+    def __init__(self, item_ids, quantity, dim, asset, stage, factor,
+                 assets, stages, factor_ids, factor_dim, factor_value, factor_scale):
+        self.item_ids = item_ids
+        self.quantity = quantity        # base units
+        self.dim = dim                  # int8 dimension code
+        self.asset = asset              # int32 index into assets, -1 = none
+        self.stage = stage              # int32 index into stages
+        self.factor = factor            # int32 index into factor_ids, -1 = none
+        self.assets = assets
+        self.stages = stages
+        self.factor_ids = factor_ids
+        self.factor_dim = factor_dim
+        self.factor_value = factor_value
+        self.factor_scale = factor_scale  # kgCO2e per base unit = value * scale
+
+    def __len__(self):
+        return len(self.quantity)
+
+    # ---------- Builders ----------
+    @classmethod
+    def from_rows(cls, items, factors, stages=()):
+        """
+        Build from dict rows: items with id, stage, quantity, unit and
+        optional asset / factor; factors with id, value, unit.
+        """
+        factor_codes = _Codes(f["id"] for f in factors)
+        finfo = [factor_info(f.get("unit")) for f in factors]
+        assets, stage_codes = _Codes(), _Codes(stages)
+
+        ids, qty, units, a, s, fc = [], [], [], [], [], []
+        defaulted = 0
+        for r in items:
+            ids.append(r["id"])
+            qty.append(_quantity(r["quantity"]))
+            units.append(r.get("unit") or "")
+            a.append(assets.code(r.get("asset")))
+            s.append(stage_codes.code(r["stage"]))
+            factor = r.get("factor")
+            if not factor:
+                factor = default_factor(r["stage"], r.get("unit"))
+                if factor in factor_codes.index:
+                    defaulted += 1
+            fc.append(factor_codes.index.get(factor or "", -1))
+
+        quantity, dim = normalize(qty, units) if ids else (np.empty(0), np.empty(0, np.int8))
+        dataset = cls(
+            np.array(ids, dtype=object), quantity, dim,
+            np.array(a, dtype=np.int32), np.array(s, dtype=np.int32), np.array(fc, dtype=np.int32),
+            assets.names, stage_codes.names, factor_codes.names,
+            np.array([d for d, _ in finfo], dtype=np.int8),
+            np.array([float(f["value"]) for f in factors], dtype=np.float64),
+            np.array([k for _, k in finfo], dtype=np.float64),
+        )
+        dataset.defaulted = defaulted
+        return dataset
+
+    @classmethod
+    def from_csv(cls, carbon_csv, factors_csv=None):
+        """carbon_items.csv (carbon_id, lifecycle_stage, quantity, unit[, factor_id, asset_id])."""
+        factors = SEED_FACTORS
+        if factors_csv is not None:
+            with open(factors_csv, newline="", encoding="utf-8") as f:
+                factors = list(csv.DictReader(f))
+        with open(carbon_csv, newline="", encoding="utf-8") as f:
+            items = ({
+                "id": r["carbon_id"], "stage": r["lifecycle_stage"],
+                "quantity": r["quantity"], "unit": r["unit"],
+                "factor": r.get("factor_id"), "asset": r.get("asset_id"),
+            } for r in csv.DictReader(f))
+            return cls.from_rows(items, factors)
+
+    @classmethod
+    def from_neo4j(cls, session):
+        """Read all live CarbonItems with their stage, factor and asset links."""
+        factors = [r.data() for r in session.run(
+            "MATCH (f:EmissionFactor) RETURN f.id AS id, f.value AS value, f.unit AS unit")]
+        stages = [r["code"] for r in session.run(
+            "MATCH (s:LifecycleStage) RETURN s.code AS code ORDER BY code")]
+        items = (r.data() for r in session.run(
+            """
+            MATCH (c:CarbonItem)
+            WHERE NOT coalesce(c.deleted, false)
+            OPTIONAL MATCH (c)-[:LINKED_TO_FACTOR]->(f:EmissionFactor)
+            OPTIONAL MATCH (a:Asset)-[:HAS_CARBON_ITEM]->(c)
+            RETURN c.id AS id, c.stage AS stage, c.quantity AS quantity, c.unit AS unit,
+                   f.id AS factor, a.id AS asset
+            """))
+        return cls.from_rows(items, factors, stages)
+
+    # ---------- Snapshots ----------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path, quantity=self.quantity, dim=self.dim, asset=self.asset,
+            stage=self.stage, factor=self.factor, factor_dim=self.factor_dim,
+            factor_value=self.factor_value, factor_scale=self.factor_scale, item_ids=self.item_ids.astype(str),
+            assets=np.array(self.assets, dtype=str), stages=np.array(self.stages, dtype=str),
+            factor_ids=np.array(self.factor_ids, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path)
+        return cls(
+            z["item_ids"].astype(object), z["quantity"], z["dim"], z["asset"], z["stage"],
+            z["factor"], z["assets"].tolist(), z["stages"].tolist(), z["factor_ids"].tolist(),
+            z["factor_dim"], z["factor_value"], z["factor_scale"],
+        )
+
+# -------------------------------------------------------------------
+# Calculation
+# -------------------------------------------------------------------
+
+class Totals:
+    """kgCO2e per item and per (asset, stage); row ``-1`` collects items without an asset."""
+
+    def __init__(self, dataset, item_kg, unfactored, unmatched, unstaged=0):
+        self.dataset = dataset
+        self.item_kg = item_kg
+        self.unfactored = unfactored
+        self.unmatched = unmatched
+        self.unstaged = unstaged
+        n_rows, n_stages = len(dataset.assets) + 1, len(dataset.stages)
+        if n_stages == 0:
+            self.by_asset_stage = np.zeros((n_rows, 0))
+            return
+        # items without a stage (code -1) carry 0 kg; park them in cell 0
+        cell = np.where(dataset.stage >= 0, (dataset.asset + 1) * n_stages + dataset.stage, 0)
+        self.by_asset_stage = np.bincount(
+            cell, weights=item_kg, minlength=n_rows * n_stages,
+        ).reshape(n_rows, n_stages)
+
+    @property
+    def total(self):
+        return float(self.by_asset_stage.sum())
+
+    def by_stage(self):
+        return dict(zip(self.dataset.stages, self.by_asset_stage.sum(axis=0).tolist()))
+
+    def by_asset(self):
+        sums = self.by_asset_stage.sum(axis=1).tolist()
+        out = dict(zip(self.dataset.assets, sums[1:]))
+        if sums[0]:
+            out[None] = sums[0]
+        return out
+
+
+def compute(dataset, overrides=None):
+    """
+    Totals for ``dataset``; ``overrides`` maps factor ids to a new value in
+    the factor's own unit (e.g. ``{"EF_ELEC_GRID": 0.3}``).
+    """
+    values = dataset.factor_value
+    if overrides:
+        values = values.copy()
+        for fid, value in overrides.items():
+            if fid not in dataset.factor_ids:
+                raise KeyError(f"Unknown emission factor: {fid}")
+            values[dataset.factor_ids.index(fid)] = value
+    factor_kg = values * dataset.factor_scale
+    # sentinel slot for items without a factor (code -1 -> last entry)
+    kg_table = np.append(factor_kg, 0.0)
+    dim_table = np.append(dataset.factor_dim, -2).astype(np.int8)
+    f = dataset.factor
+    staged = dataset.stage >= 0
+    factored = f >= 0
+    kg = dataset.quantity * kg_table[f]
+    matched = (dim_table[f] == dataset.dim) & (dataset.dim >= 0) & staged & np.isfinite(kg)
+    item_kg = np.where(matched, kg, 0.0)
+    return Totals(dataset, item_kg,
+                  unfactored=int((staged & ~factored).sum()),
+                  unmatched=int((staged & factored & ~matched).sum()),
+                  unstaged=int((~staged).sum()))
+
+
+def scenario(dataset, overrides, baseline=None):
+    """(scenario totals, kgCO2e change per stage versus ``baseline``)."""
+    baseline = baseline or compute(dataset)
+    result = compute(dataset, overrides)
+    delta = (result.by_asset_stage - baseline.by_asset_stage).sum(axis=0)
+    return result, dict(zip(dataset.stages, delta.tolist()))
+
+# -------------------------------------------------------------------
+# Entry point
+# -------------------------------------------------------------------
+
+def synthetic(n, assets=1000, seed=42):
+    """``n`` random B2/B4/B6 items over ``assets`` assets, linked to the seed factors."""
+    rng = np.random.default_rng(seed)
+    stages = ["B2", "B4", "B6"]
+    stage = rng.integers(0, 3, n).astype(np.int32)
+    b6 = stage == 2
+    quantity = np.where(b6, rng.uniform(1, 5000, n), rng.integers(1, 5, n)).astype(np.float64)
+    count_dim, _ = unit_info("unit")
+    energy_dim, _ = unit_info("kWh")
+    finfo = [factor_info(f["unit"]) for f in SEED_FACTORS]
+    return CarbonDataset(
+        np.array([f"CI_{i:09d}" for i in range(n)], dtype=object), quantity,
+        np.where(b6, energy_dim, count_dim).astype(np.int8),
+        rng.integers(0, assets, n).astype(np.int32), stage,
+        np.where(b6, 0, 1).astype(np.int32),
+        [f"ASSET_{i:05d}" for i in range(assets)], stages,
+        [f["id"] for f in SEED_FACTORS],
+        np.array([d for d, _ in finfo], dtype=np.int8),
+        np.array([f["value"] for f in SEED_FACTORS], dtype=np.float64),
+        np.array([k for _, k in finfo], dtype=np.float64),
+    )
+
+
+def _parse_override(text):
+    fid, _, value = text.partition("=")
+    return fid, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--carbon", help="carbon_items.csv")
+    source.add_argument("--neo4j", action="store_true", help="read items from Neo4j (NEO4J_* env)")
+    source.add_argument("--load", help="saved .npz snapshot")
+    source.add_argument("--synthetic", type=int, metavar="N", help="N random items (benchmark)")
+    parser.add_argument("--factors", help="emission factor CSV (id,unit,value); defaults to init.cypher seeds")
+    parser.add_argument("--scenario", action="append", type=_parse_override, default=[],
+                        metavar="FACTOR_ID=VALUE", help="override a factor value (repeatable)")
+    parser.add_argument("--save", help="write the loaded dataset as an .npz snapshot")
+    parser.add_argument("--top", type=int, default=10, help="assets to print")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with metrics.stage("load_items", unit="items") as st:
+        if args.carbon:
+            dataset = CarbonDataset.from_csv(args.carbon, args.factors)
+        elif args.load:
+            dataset = CarbonDataset.load(args.load)
+        elif args.synthetic:
+            dataset = synthetic(args.synthetic)
+        else:
+            from neo4j import GraphDatabase
+            driver = metrics.instrument_driver(GraphDatabase.driver(
+                os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+                auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "testpassword")),
+            ))
+            with driver, driver.session() as session:
+                dataset = CarbonDataset.from_neo4j(session)
+        st.count(len(dataset))
+    print(f"Loaded {len(dataset):,} CarbonItems in {time.perf_counter() - started:.2f}s")
+    if dataset.defaulted:
+        print(f"{dataset.defaulted:,} items without a factor link use the default factor of "
+              f"their stage and unit")
+    if args.save:
+        dataset.save(args.save)
+        print(f"Snapshot written to: {args.save}")
+
+    started = time.perf_counter()
+    with metrics.stage("aggregate", unit="items") as st:
+        base = compute(dataset)
+        st.count(len(dataset))
+    elapsed = time.perf_counter() - started
+    print(f"Baseline: {base.total:,.1f} kgCO2e ({elapsed * 1000:.1f} ms; "
+          f"{base.unfactored} unfactored, {base.unmatched} unmatched units, {base.unstaged} without stage)")
+    for stage, kg in base.by_stage().items():
+        print(f"  {stage:<4} {kg:>16,.1f} kgCO2e")
+    top = sorted(base.by_asset().items(), key=lambda kv: -kv[1])[:args.top]
+    for asset, kg in top:
+        print(f"  {asset or '(no asset)':<24} {kg:>16,.1f} kgCO2e")
+
+    if args.scenario:
+        overrides = dict(args.scenario)
+        started = time.perf_counter()
+        result, delta = scenario(dataset, overrides, base)
+        elapsed = time.perf_counter() - started
+        label = ", ".join(f"{k}={v:g}" for k, v in overrides.items())
+        print(f"Scenario {label}: {result.total:,.1f} kgCO2e ({elapsed * 1000:.1f} ms)")
+        for stage, kg in delta.items():
+            print(f"  {stage:<4} {kg:>+16,.1f} kgCO2e")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+SDT Carbon Stream
+-----------------
+Streaming reader for lifecycle carbon CSV files.
+
+The pipeline is a chain of generators:
+
+    read CSV row -> coerce types -> group into batches -> (writer)
+
+Only one batch is materialized at a time, so memory stays flat whatever
+the file size and the first batch can be written while the rest of the
+file is still being parsed.
+"""
+
+import csv
+from itertools import islice
+
+# -------------------------------------------------------------------
+# Type coercion
+# -------------------------------------------------------------------
+
+def coerce_carbon_row(r):
+    """Map one CSV row to the parameter map used by the CarbonItem writer."""
+    return {
+        "id": r["carbon_id"],
+        "stage": r["lifecycle_stage"],
+        "qty": float(r["quantity"]),
+        "unit": r["unit"],
+    }
+
+# -------------------------------------------------------------------
+# Generators
+# -------------------------------------------------------------------
+
+def iter_carbon_rows(path):
+    """Yield coerced CarbonItem parameter maps, one CSV line at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            yield coerce_carbon_row(r)
+
+
+def iter_batches(items, batch_size):
+    """Group any iterable into lists of at most ``batch_size`` items."""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,199 @@
+"""
+SDT Delta Manifest
+------------------
+Local change-detection manifest for incremental ETL runs.
+
+The manifest is a small SQLite file that remembers, per source file:
+- a file fingerprint (size, mtime, SHA-256), so an untouched file is
+  skipped without being parsed, and
+- a content hash per row keyed by ``carbon_id``, so only inserted or
+  changed rows are sent to Neo4j.
+
+Rows that were in the previous load but are missing from the current
+file are reported as deleted and can be tombstoned by the runner. They
+are only forgotten by a commit that tombstoned them; otherwise they stay
+in the manifest (and the file fingerprint is not recorded, so the next
+run parses the file again) until a tombstoning run flags them.
+
+Manifest updates are staged during the run and only applied by
+``commit()`` after the writes succeeded, so a failed run is simply
+retried in full next time. The file fingerprint ``commit`` records is
+the one taken before the rows were parsed: a file replaced during the
+run differs from it and is loaded again.
+"""
+
+import hashlib
+import os
+import sqlite3
+from itertools import islice
+
+LOOKUP_CHUNK = 500  # stays under SQLite's host-parameter limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    source   TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS row_hashes (
+    source    TEXT NOT NULL,
+    carbon_id TEXT NOT NULL,
+    hash      BLOB NOT NULL,
+    PRIMARY KEY (source, carbon_id)
+) WITHOUT ROWID;
+"""
+
+# -------------------------------------------------------------------
+# Fingerprints
+# -------------------------------------------------------------------
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """(size, mtime_ns, sha256 hex) of ``path``, hashed in 1 MiB chunks."""
+    st = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return st.st_size, st.st_mtime_ns, h.hexdigest()
+
+
+def row_hash(item):
+    """16-byte content hash of a coerced CarbonItem parameter map."""
+    payload = "\x1f".join(f"{k}={item[k]!r}" for k in sorted(item))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+# -------------------------------------------------------------------
+# Manifest
+# -------------------------------------------------------------------
+
+class DeltaManifest:
+    def __init__(self, path, source):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.source = source
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.conn.executescript("""
+            CREATE TEMP TABLE staged (
+                carbon_id TEXT PRIMARY KEY,
+                hash      BLOB NOT NULL,
+                dirty     INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self.inserted = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    def close(self):
+        self.conn.close()
+
+    # -- file level --------------------------------------------------
+
+    def file_unchanged(self, path):
+        """True if ``path`` matches the fingerprint recorded at the last commit."""
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, sha256 FROM files WHERE source = ?",
+            (self.source,),
+        ).fetchone()
+        if row is None:
+            return False
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime_ns) == (row[0], row[1]):
+            return True
+        # Touched but possibly identical: fall back to the content hash
+        return st.st_size == row[0] and file_fingerprint(path)[2] == row[2]
+
+    # -- row level ---------------------------------------------------
+
+    def _previous_hashes(self, ids):
+        marks = ",".join("?" * len(ids))
+        cur = self.conn.execute(
+            f"SELECT carbon_id, hash FROM row_hashes "
+            f"WHERE source = ? AND carbon_id IN ({marks})",
+            (self.source, *ids),
+        )
+        return dict(cur.fetchall())
+
+    def filter_changed(self, items):
+        """
+        Yield only items that are new or whose content hash changed.
+
+        Every item seen is staged, so deletions can be computed afterwards.
+        """
+        it = iter(items)
+        while True:
+            chunk = list(islice(it, LOOKUP_CHUNK))
+            if not chunk:
+                return
+            previous = self._previous_hashes(list({item["id"] for item in chunk}))
+            staged = []
+            changed = []
+            for item in chunk:
+                h = row_hash(item)
+                old = previous.get(item["id"])
+                if old is None:
+                    self.inserted += 1
+                elif old != h:
+                    self.changed += 1
+                else:
+                    self.unchanged += 1
+                    staged.append((item["id"], h, 0))
+                    continue
+                staged.append((item["id"], h, 1))
+                changed.append(item)
+            # A carbon_id repeated in the file stays dirty if any copy was
+            self.conn.executemany(
+                "INSERT INTO staged VALUES (?, ?, ?) ON CONFLICT(carbon_id) "
+                "DO UPDATE SET hash = excluded.hash, dirty = MAX(dirty, excluded.dirty)",
+                staged,
+            )
+            yield from changed
+
+    def iter_deleted(self, batch_size):
+        """Yield lists of carbon_ids present in the last load but not in this one."""
+        cur = self.conn.execute(
+            "SELECT r.carbon_id FROM row_hashes r "
+            "WHERE r.source = ? AND NOT EXISTS "
+            "(SELECT 1 FROM staged s WHERE s.carbon_id = r.carbon_id)",
+            (self.source,),
+        )
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [r[0] for r in rows]
+
+    # -- commit ------------------------------------------------------
+
+    def commit(self, fingerprint, tombstoned=False):
+        """
+        Apply this run's inserts and changes to the stored manifest.
+
+        ``fingerprint`` is the ``file_fingerprint`` of the source taken
+        before its rows were parsed. Deleted rows are dropped only if
+        ``tombstoned``; kept ones make the next run parse the file again.
+        """
+        size, mtime_ns, sha = fingerprint
+        missing = ("WHERE source = ? AND NOT EXISTS "
+                   "(SELECT 1 FROM staged s WHERE s.carbon_id = row_hashes.carbon_id)")
+        with self.conn:
+            if tombstoned:
+                self.conn.execute(f"DELETE FROM row_hashes {missing}", (self.source,))
+                pending = False
+            else:
+                pending = self.conn.execute(
+                    f"SELECT 1 FROM row_hashes {missing} LIMIT 1", (self.source,)
+                ).fetchone() is not None
+            self.conn.execute(
+                "INSERT OR REPLACE INTO row_hashes (source, carbon_id, hash) "
+                "SELECT ?, carbon_id, hash FROM staged WHERE dirty = 1",
+                (self.source,),
+            )
+            if pending:
+                self.conn.execute("DELETE FROM files WHERE source = ?", (self.source,))
+            else:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (self.source, size, mtime_ns, sha),
+                )
+            self.conn.execute("DELETE FROM staged")
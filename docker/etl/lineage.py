@@ -0,0 +1,321 @@
+"""
+SDT Lineage
+-----------
+Bounded-depth, cached PROV lineage lookups for audit traceability.
+
+"Which sources and activities produced this CarbonItem / Observation /
+report figure?" is answered level by level instead of by one open-ended
+variable-length traversal:
+
+    level 0   activities that PROV_GENERATED the node
+              (for a CarbonRollup: its precomputed ``activities`` list)
+    level k   activities that PROV_GENERATED a ProvenanceEntity used by
+              an activity of level k-1
+
+Every level is one ``UNWIND`` over ids, starting from id-constrained
+nodes and expanding only their own low-degree PROV edges. The cost of a
+lookup therefore depends on ``depth`` and the number of ids asked for,
+not on the length of the PROV history. Activity summaries (name, time,
+tool, used entities, agents) are fetched once per activity and shared
+by all results.
+
+Results are kept in an LRU cache with a TTL. Before a lookup the
+service checks, at most every ``poll`` seconds, for activities whose
+``lastExecutedAt`` (database time, bumped by every ETL batch, see
+provenance.py) is later than its last check. Cached results that such an
+activity touches (it generated the root or one of the upstream entities)
+are dropped. The stamp each activity was handled at is remembered, so an
+activity that keeps showing up while an ingest runs is only re-checked
+when it wrote another batch.
+``invalidate`` drops entries directly, e.g. from the ETL process itself.
+
+Usage:
+    python lineage.py CarbonItem CI_B6_ELEC_0001 [--depth 3]
+    python lineage.py CarbonItem --ids-file audit_ids.txt --json > audit.json
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+
+LABELS = ("CarbonItem", "Observation", "CarbonRollup", "ProvenanceEntity")
+MAX_DEPTH = 5
+BATCH_SIZE = 1000
+
+GENERATED_BY = """
+UNWIND $ids AS id
+MATCH (n:%s {id: id})
+RETURN id, [(act:ProvenanceActivity)-[:PROV_GENERATED]->(n) | act.id] AS acts
+"""
+
+ROLLUP_ACTIVITIES = """
+UNWIND $ids AS id
+MATCH (n:CarbonRollup {id: id})
+RETURN id, coalesce(n.activities, []) AS acts
+"""
+
+ACTIVITY_SUMMARY = """
+UNWIND $ids AS id
+MATCH (act:ProvenanceActivity {id: id})
+RETURN act.id AS id, act.name AS name, act.source AS source, act.tool AS tool,
+       toString(act.executedAt) AS executedAt,
+       toString(coalesce(act.lastExecutedAt, act.executedAt)) AS lastExecutedAt,
+       [(act)-[:PROV_USED]->(e:ProvenanceEntity) | e.id] AS used,
+       [(act)-[:PROV_ASSOCIATED_WITH]->(g:ProvenanceAgent) | g.id] AS agents,
+       head([(act)-[:PART_OF_ACTIVITY]->(run:ProvenanceActivity) | run.id]) AS partOf
+"""
+
+NEW_ACTIVITIES = """
+MATCH (act:ProvenanceActivity)
+WHERE act.lastExecutedAt > datetime($since) - duration({seconds: $slack})
+RETURN act.id AS id, act.lastExecutedAt.epochMillis AS stamp
+"""
+
+# A batch stamps lastExecutedAt before it commits; checks look this many
+# seconds further back so a batch committed just after a check is not missed
+COMMIT_SLACK = 30
+
+# -------------------------------------------------------------------
+# Cache
+# -------------------------------------------------------------------
+
+class TTLCache:
+    """LRU mapping whose entries also expire ``ttl`` seconds after insertion."""
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def items(self):
+        """Snapshot of (key, value) pairs; does not touch LRU order or counters."""
+        return [(k, v) for k, (_, v) in self._data.items()]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# -------------------------------------------------------------------
+# Service
+# -------------------------------------------------------------------
+
+class LineageService:
+    """Lineage lookups over one driver; safe to share within a process (not across threads)."""
+
+    def __init__(self, driver, depth=2, maxsize=10000, ttl=300.0, poll=5.0):
+        self.driver = driver
+        self.depth = depth
+        self.cache = TTLCache(maxsize, ttl)
+        self.activities = TTLCache(maxsize, ttl)
+        self.poll = poll
+        self._checked_at = 0.0
+        self._since = None
+        self._handled = {}  # activity id -> lastExecutedAt (epoch ms) already handled
+
+    # ---------- Public API ----------
+    def lineage(self, label, node_id, depth=None):
+        return self.lineage_many(label, [node_id], depth)[node_id]
+
+    def lineage_many(self, label, ids, depth=None):
+        """
+        ``{id: lineage}`` for many nodes of one label. A lineage is a dict
+        with the node id, its ``activities`` (summaries, nearest first, with
+        the ``level`` they were found at), the source ``entities`` and the
+        ``agents`` involved.
+        """
+        if label not in LABELS:
+            raise ValueError(f"Unsupported label: {label!r} (expected one of {', '.join(LABELS)})")
+        depth = min(self.depth if depth is None else depth, MAX_DEPTH)
+        with self.driver.session() as session:
+            self._check_new_activities(session)
+            out, missing = {}, []
+            for node_id in dict.fromkeys(ids):
+                hit = self.cache.get((label, node_id, depth))
+                if hit is None:
+                    missing.append(node_id)
+                else:
+                    out[node_id] = hit
+            for i in range(0, len(missing), BATCH_SIZE):
+                batch = missing[i:i + BATCH_SIZE]
+                for node_id, result in self._resolve(session, label, batch, depth).items():
+                    self.cache.put((label, node_id, depth), result)
+                    out[node_id] = result
+        return out
+
+    def invalidate(self, ids=None):
+        """Drop cached results for ``ids`` (roots or upstream entities); all if None."""
+        if ids is None:
+            self.cache.clear()
+            self.activities.clear()
+            return
+        ids = set(ids)
+        for key, result in self.cache.items():
+            if key[1] in ids or ids & set(result["entities"]):
+                self.cache.pop(key)
+
+    # ---------- Traversal ----------
+    def _resolve(self, session, label, ids, depth):
+        query = ROLLUP_ACTIVITIES if label == "CarbonRollup" else GENERATED_BY % label
+        frontier = {r["id"]: r["acts"] for r in session.run(query, ids=ids)}
+        levels = {node_id: [set(frontier.get(node_id, ()))] for node_id in ids}
+
+        for _ in range(1, depth):
+            acts = set().union(*(lv[-1] for lv in levels.values()))
+            if not acts:
+                break
+            summaries = self._summaries(session, acts)
+            used = {e for a in acts for e in summaries.get(a, {}).get("used", ())}
+            upstream = {r["id"]: set(r["acts"]) for r in
+                        session.run(GENERATED_BY % "ProvenanceEntity", ids=sorted(used))}
+            for lv in levels.values():
+                nxt = set()
+                for a in lv[-1]:
+                    for e in summaries.get(a, {}).get("used", ()):
+                        nxt |= upstream.get(e, set())
+                seen = set().union(*lv)
+                lv.append(nxt - seen)
+
+        summaries = self._summaries(session, {a for lv in levels.values() for s in lv for a in s})
+        results = {}
+        for node_id, lv in levels.items():
+            activities = []
+            for level, acts in enumerate(lv):
+                for a in sorted(acts):
+                    if a in summaries:
+                        activities.append(dict(summaries[a], level=level))
+            results[node_id] = {
+                "id": node_id,
+                "label": label,
+                "activities": activities,
+                "entities": sorted({e for a in activities for e in a["used"]}),
+                "agents": sorted({g for a in activities for g in a["agents"]}),
+            }
+        return results
+
+    def _summaries(self, session, act_ids):
+        out, missing = {}, []
+        for a in act_ids:
+            hit = self.activities.get(a)
+            if hit is None:
+                missing.append(a)
+            else:
+                out[a] = hit
+        for i in range(0, len(missing), BATCH_SIZE):
+            for r in session.run(ACTIVITY_SUMMARY, ids=missing[i:i + BATCH_SIZE]):
+                summary = r.data()
+                self.activities.put(summary["id"], summary)
+                out[summary["id"]] = summary
+        return out
+
+    # ---------- Invalidation ----------
+    def _check_new_activities(self, session):
+        now = time.monotonic()
+        if now - self._checked_at < self.poll:
+            return
+        self._checked_at = now
+        stamp = session.run("RETURN toString(datetime()) AS now").single()["now"]
+        if self._since is not None and len(self.cache):
+            recent = {r["id"]: r["stamp"] for r in
+                      session.run(NEW_ACTIVITIES, since=self._since, slack=COMMIT_SLACK)}
+            new = [a for a, at in recent.items() if at > self._handled.get(a, -1)]
+            if new:
+                self._drop_touched(session, new)
+            # activities older than the look-back window are never returned again
+            self._handled = recent
+        self._since = stamp
+
+    def _drop_touched(self, session, new_acts):
+        for a in new_acts:
+            self.activities.pop(a)
+        new = set(new_acts)
+        by_label = {}
+        for key, result in self.cache.items():
+            if new & {a["id"] for a in result["activities"]}:
+                self.cache.pop(key)
+                continue
+            by_label.setdefault(key[0], set()).add(key[1])
+            by_label.setdefault("ProvenanceEntity", set()).update(result["entities"])
+        touched = set()
+        for label, ids in by_label.items():
+            query = ROLLUP_ACTIVITIES if label == "CarbonRollup" else GENERATED_BY % label
+            ids = sorted(ids)
+            for i in range(0, len(ids), BATCH_SIZE):
+                for r in session.run(query, ids=ids[i:i + BATCH_SIZE]):
+                    if new & set(r["acts"]):
+                        touched.add(r["id"])
+        if touched:
+            self.invalidate(touched)
+
+# -------------------------------------------------------------------
+# Entry point
+# -------------------------------------------------------------------
+
+def main():
+    from neo4j import GraphDatabase
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("label", choices=LABELS)
+    parser.add_argument("ids", nargs="*")
+    parser.add_argument("--ids-file", help="file with one id per line")
+    parser.add_argument("--depth", type=int, default=2, help=f"activity levels (max {MAX_DEPTH})")
+    parser.add_argument("--json", action="store_true", help="print the lineage as JSON")
+    args = parser.parse_args()
+
+    ids = list(args.ids)
+    if args.ids_file:
+        with open(args.ids_file, encoding="utf-8") as f:
+            ids += [line.strip() for line in f if line.strip()]
+    if not ids:
+        parser.error("no ids given")
+
+    driver = GraphDatabase.driver(
+        os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+        auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "testpassword")),
+    )
+    with driver:
+        service = LineageService(driver, depth=args.depth)
+        started = time.perf_counter()
+        results = service.lineage_many(args.label, ids)
+        elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for node_id, result in results.items():
+        print(f"{args.label} {node_id}")
+        for a in result["activities"]:
+            print(f"  [{a['level']}] {a['id']}  {a['name']}  {a['executedAt']}  used={','.join(a['used'])}")
+        if not result["activities"]:
+            print("  (no provenance recorded)")
+    print(f"{len(results)} lineages in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+SDT Observation Stream
+----------------------
+Chunked reader for IoT meter CSV files (B6 operational energy).
+
+Column layout follows "ETL mapping table.md" (campus_energy.csv):
+
+    Timestamp, SensorID, Value, Unit, AssetID
+
+The file is read in chunks of ``chunk_size`` rows. Each chunk is turned
+into column arrays once, and the unit conversion (Wh / kWh / MWh / MJ /
+GJ -> kWh) and the kWh -> kgCO2e multiplication by the emission factor
+run as numpy operations over the whole chunk, not per reading. A chunk
+is handed to the writer as columnar parameters (one list per field), so
+the Bolt message does not repeat the field names for every reading.
+
+Timestamps are rewritten to one form, UTC "YYYY-MM-DDTHH:MM:SSZ" (naive
+readings are taken as UTC), before the Observation / CarbonItem ids and
+rollup hour buckets are built from them, so a meter file re-exported
+with a different timestamp style maps onto the same nodes. A chunk that
+is entirely "YYYY-MM-DDTHH:MM..." is converted with numpy (its distinct
+second/offset suffixes are parsed once each); anything else (space
+separator, missing minutes) is parsed per reading.
+
+Readings with an unparseable value or timestamp are dropped; readings
+in a unit that is not an energy unit (e.g. kW) are kept as Observations
+but get no CarbonItem, since they cannot be converted to kWh without an
+interval.
+
+Run directly for a dry run of the transform (no Neo4j), e.g. to time a
+meter file before ingesting it:
+
+    python observation_stream.py data/B6_Energy_1month.csv --factor 0.5
+"""
+
+import argparse
+import csv
+import re
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+import numpy as np
+
+# kWh per unit; also used for the denominator of the emission factor unit
+KWH_PER_UNIT = {
+    "wh": 1e-3,
+    "kwh": 1.0,
+    "mwh": 1e3,
+    "gwh": 1e6,
+    "mj": 1.0 / 3.6,
+    "gj": 1e3 / 3.6,
+}
+
+COLUMNS = ("Timestamp", "SensorID", "Value", "Unit", "AssetID")
+
+# -------------------------------------------------------------------
+# Vectorized transforms
+# -------------------------------------------------------------------
+
+def kwh_per_unit(unit):
+    return KWH_PER_UNIT.get(unit.strip().lower(), np.nan)
+
+
+def factor_per_kwh(value, unit):
+    """kgCO2e per kWh for an EmissionFactor ``value`` given in ``unit`` (e.g. kgCO2e/MWh)."""
+    denominator = unit.split("/", 1)[1] if "/" in unit else "kWh"
+    per_kwh = value / kwh_per_unit(denominator)
+    if np.isnan(per_kwh):
+        raise ValueError(f"Emission factor unit is not per energy: {unit!r}")
+    return float(per_kwh)
+
+
+def to_kwh(values, units):
+    """Convert ``values`` to kWh; NaN where the unit is not an energy unit."""
+    names, inverse = np.unique(np.asarray(units), return_inverse=True)
+    scale = np.array([kwh_per_unit(u) for u in names], dtype=np.float64)
+    return values * scale[inverse]
+
+
+def _floats(column):
+    try:
+        return np.array(column, dtype=np.float64)
+    except ValueError:  # blanks or junk somewhere in the chunk
+        out = np.empty(len(column), dtype=np.float64)
+        for i, v in enumerate(column):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+# "YYYY-MM-DDTHH:MM": digit positions and their separators
+_TS_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15]
+_TS_SEPARATORS = {4: "-", 7: "-", 10: "T", 13: ":"}
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_TS_CANONICAL_TAIL = re.compile(r":[0-5][0-9]Z")
+
+
+def _utc(dt):
+    """Seconds since the epoch (UTC) of a datetime; naive ones are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _fast_utc(arr):
+    """
+    ``(UTC datetime64[s], already canonical)`` for a chunk that is entirely
+    valid zero-padded "YYYY-MM-DDTHH:MM...", else None.
+
+    The prefix is checked and converted column-wise on the codepoints;
+    the remainder (":SS", ".fff", "Z", "+08:00") takes only a handful of
+    distinct values per chunk, each parsed once by ``datetime.fromisoformat``.
+    """
+    width = arr.dtype.itemsize // 4
+    if width < 16:
+        return None
+    cp = arr.view(np.uint32).reshape(len(arr), width)
+    for pos, ch in _TS_SEPARATORS.items():
+        if not (cp[:, pos] == ord(ch)).all():
+            return None
+    d = cp[:, _TS_DIGITS].astype(np.int64) - ord("0")
+    if not ((d >= 0) & (d <= 9)).all():
+        return None
+    hour, minute = d[:, 8] * 10 + d[:, 9], d[:, 10] * 10 + d[:, 11]
+    if not ((hour <= 23) & (minute <= 59)).all():
+        return None
+    try:  # month/day ranges, leap years
+        days = arr.astype("U10").astype("datetime64[D]")
+    except ValueError:
+        return None
+
+    tail_codes = np.ascontiguousarray(cp[:, 16:]).view(np.dtype((np.void, 4 * (width - 16)))).ravel()
+    tails, inverse = np.unique(tail_codes, return_inverse=True)
+    shift = np.empty(len(tails), dtype=np.int64)
+    canonical = True
+    for i, code in enumerate(tails):
+        tail = np.frombuffer(code.tobytes(), dtype=np.uint32)
+        text = "".join(map(chr, tail[tail > 0])).rstrip()
+        try:
+            shift[i] = _utc(datetime.fromisoformat("1970-01-01T00:00" + text))
+        except ValueError:
+            return None
+        canonical = canonical and _TS_CANONICAL_TAIL.fullmatch(text) is not None
+    seconds = hour * 3600 + minute * 60 + shift[inverse.ravel()]
+    return days.astype("datetime64[s]") + seconds.astype("timedelta64[s]"), canonical
+
+
+def parse_timestamps(ts):
+    """
+    (canonical timestamps, validity mask).
+
+    Every valid timestamp is rewritten as UTC "YYYY-MM-DDTHH:MM:SSZ"
+    (naive ones are taken as UTC, fractions of a second are dropped), so
+    the same instant written two ways gets the same Observation id and
+    hour bucket.
+    """
+    arr = np.asarray(ts, dtype=str)
+    fast = _fast_utc(arr) if len(arr) else None
+    if fast is not None:
+        utc, canonical = fast
+        if canonical and arr.dtype.itemsize == 20 * 4:  # already "...:SSZ" throughout
+            return list(ts), np.ones(len(ts), dtype=bool)
+        return (np.datetime_as_string(utc, unit="s", timezone="UTC").tolist(),
+                np.ones(len(ts), dtype=bool))
+    out = []
+    ok = np.ones(len(ts), dtype=bool)
+    for i, t in enumerate(ts):
+        try:
+            seconds = _utc(datetime.fromisoformat(t.strip()))
+            out.append(datetime.fromtimestamp(seconds, timezone.utc).strftime(_TS_FORMAT))
+        except (ValueError, OverflowError, OSError):
+            out.append(t)
+            ok[i] = False
+    return out, ok
+
+# -------------------------------------------------------------------
+# Chunks
+# -------------------------------------------------------------------
+
+def transform_chunk(rows, kg_per_kwh):
+    """
+    Columnar Observation/CarbonItem parameters for one chunk of CSV rows.
+
+    Returns ``(observations, carbon, rejected)`` where ``observations``
+    and ``carbon`` map field names to equal-length lists.
+    """
+    ts, sensor, raw, unit, asset = (list(c) for c in zip(*rows))
+    values = _floats(raw)
+    ts, ts_ok = parse_timestamps(ts)
+    ok = ~np.isnan(values) & ts_ok
+    rejected = int(len(values) - ok.sum())
+    if rejected:
+        keep = np.flatnonzero(ok).tolist()
+        ts, sensor, unit, asset = ([col[i] for i in keep] for col in (ts, sensor, unit, asset))
+        values = values[ok]
+
+    kwh = to_kwh(values, unit)
+    kg = kwh * kg_per_kwh
+    obs_ids = [f"OBS_{s}_{t}" for s, t in zip(sensor, ts)]
+
+    observations = {
+        "id": obs_ids,
+        "t": ts,
+        "sensor": sensor,
+        "asset": asset,
+        "value": values.tolist(),
+        "unit": unit,
+    }
+
+    energy = ~np.isnan(kwh)
+    idx = np.flatnonzero(energy).tolist()
+    if len(idx) == len(obs_ids):
+        carbon_obs, carbon_asset = obs_ids, asset
+    else:
+        carbon_obs = [obs_ids[i] for i in idx]
+        carbon_asset = [asset[i] for i in idx]
+    # rollup hour bucket "YYYY-MM-DDTHH": a fixed-width cut of the canonical timestamps
+    hours = np.asarray(ts)[energy].astype("U13").tolist()
+    carbon = {
+        "id": [f"CI_B6_{o}" for o in carbon_obs],
+        "obs": carbon_obs,
+        "asset": carbon_asset,
+        "hour": hours,
+        "kwh": kwh[energy].tolist(),
+        "kg": kg[energy].tolist(),
+    }
+    return observations, carbon, rejected
+
+
+def iter_observation_chunks(path, kg_per_kwh, chunk_size=5000):
+    """Yield ``transform_chunk`` results for ``chunk_size`` CSV rows at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = [header.index(c) for c in COLUMNS]
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            rows = [[r[p] for p in positions] for r in rows if len(r) >= len(header)]
+            if rows:
+                yield transform_chunk(rows, kg_per_kwh)
+
+# -------------------------------------------------------------------
+# Dry run
+# -------------------------------------------------------------------
+
+def main():
+    from pipeline_metrics import metrics
+
+    parser = argparse.ArgumentParser(description="Transform a meter CSV without writing it.")
+    parser.add_argument("path")
+    parser.add_argument("--factor", type=float, default=0.5, help="kgCO2e per kWh")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    readings = carbon_items = rejected = 0
+    kg = 0.0
+    started = time.perf_counter()
+    with metrics.stage("transform", unit="readings") as st:
+        for observations, carbon, dropped in iter_observation_chunks(args.path, args.factor, args.chunk_size):
+            readings += len(observations["id"])
+            carbon_items += len(carbon["id"])
+            rejected += dropped
+            kg += sum(carbon["kg"])
+        st.count(readings)
+        st.set(carbon_items=carbon_items)
+    elapsed = time.perf_counter() - started
+    print(f"Transformed {readings:,} readings ({carbon_items:,} CarbonItems, {rejected} rejected) "
+          f"in {elapsed:.2f}s ({readings / elapsed if elapsed > 0 else 0.0:,.0f} readings/sec)")
+    print(f"Total: {kg:,.1f} kgCO2e")
+
+
+if __name__ == "__main__":
+    main()
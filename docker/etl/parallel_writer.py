@@ -0,0 +1,192 @@
+"""
+SDT Parallel Writer
+-------------------
+Multi-worker Neo4j writer for the ETL runner.
+
+N writer threads share one driver (and therefore one Bolt connection
+pool); each thread owns its own session. Rows are routed to workers by
+a stable hash of their key, so a given ``carbon_id`` is only ever
+written by one worker and concurrent MERGEs on the ``carbonItem_id``
+unique constraint never contend for the same index entry. Each worker
+is fed through its own bounded queue, which gives back-pressure to the
+CSV reader when Neo4j falls behind.
+
+Transient failures (deadlocks, leader switches, dropped connections)
+are retried with jittered exponential backoff. If a worker fails, the
+remaining workers are still stopped and joined before the error is
+re-raised.
+"""
+
+import queue
+import random
+import threading
+import time
+import zlib
+
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+RETRYABLE_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+
+_STOP = object()
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+
+def partition_of(key, partitions):
+    """Stable partition index for ``key`` (crc32, unlike the salted hash())."""
+    return zlib.crc32(str(key).encode("utf-8")) % partitions
+
+
+def write_with_retry(session, work, batch, max_retries=5, base_delay=0.2):
+    """Run ``work(tx, batch)`` in a write transaction; return the retry count.
+
+    Uses an explicit transaction rather than ``session.execute_write``,
+    which has its own retry loop: nesting the two would multiply the
+    retry budget per batch.
+    """
+    attempt = 0
+    while True:
+        try:
+            with session.begin_transaction() as tx:
+                work(tx, batch)
+                tx.commit()
+            return attempt
+        except RETRYABLE_ERRORS:
+            if attempt >= max_retries:
+                raise
+            delay = base_delay * (2 ** attempt) * random.uniform(0.5, 1.0)
+            time.sleep(delay)
+            attempt += 1
+
+
+class WorkerStats:
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.rows = 0
+        self.batches = 0
+        self.retries = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+# -------------------------------------------------------------------
+# Writer pool
+# -------------------------------------------------------------------
+
+class ParallelWriter:
+    """
+    Partitioned pool of writer threads.
+
+    ``work`` is a transaction function ``work(tx, batch)`` such as
+    ``write_carbon_batch``, or a list with one per worker (e.g. bound to
+    that worker's own provenance part); ``key`` names the field used for
+    partitioning.
+    """
+
+    def __init__(self, driver, work, workers=4, batch_size=5000, key="id",
+                 queue_depth=2, max_retries=5, base_delay=0.2):
+        self.driver = driver
+        self.work = work
+        self.workers = workers
+        self.batch_size = batch_size
+        self.key = key
+        self.queue_depth = queue_depth
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.stats = [WorkerStats(i) for i in range(workers)]
+        self._error = None
+
+    def _worker(self, worker_id, inbox):
+        stats = self.stats[worker_id]
+        work = self.work[worker_id] if isinstance(self.work, (list, tuple)) else self.work
+        try:
+            with self.driver.session() as session:
+                while True:
+                    batch = inbox.get()
+                    if batch is _STOP:
+                        return
+                    started = time.perf_counter()
+                    stats.retries += write_with_retry(
+                        session, work, batch,
+                        self.max_retries, self.base_delay,
+                    )
+                    stats.busy_seconds += time.perf_counter() - started
+                    stats.rows += len(batch)
+                    stats.batches += 1
+        except Exception as exc:  # surfaced to the caller by write()
+            self._error = exc
+
+    def _put(self, inbox, item):
+        # Never block forever on a queue whose worker has died
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                inbox.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _stop(self, inbox):
+        """Queue ``_STOP`` without raising; after a failure, pending batches are dropped."""
+        while True:
+            if self._error is not None:
+                try:
+                    while True:
+                        inbox.get_nowait()
+                except queue.Empty:
+                    pass
+            try:
+                inbox.put(_STOP, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, items):
+        """Route ``items`` to the workers, wait for completion, return row count."""
+        inboxes = [queue.Queue(maxsize=self.queue_depth) for _ in range(self.workers)]
+        threads = [
+            threading.Thread(target=self._worker, args=(i, inboxes[i]),
+                             name=f"sdt-writer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in threads:
+            t.start()
+
+        buffers = [[] for _ in range(self.workers)]
+        try:
+            for item in items:
+                p = partition_of(item[self.key], self.workers)
+                buf = buffers[p]
+                buf.append(item)
+                if len(buf) >= self.batch_size:
+                    self._put(inboxes[p], buf)
+                    buffers[p] = []
+            for p, buf in enumerate(buffers):
+                if buf:
+                    self._put(inboxes[p], buf)
+        finally:
+            # Every worker gets _STOP, also when another one failed, so no
+            # thread or session outlives write(); _stop never raises, so an
+            # exception from the loop above is not masked.
+            for inbox in inboxes:
+                self._stop(inbox)
+            for t in threads:
+                t.join()
+
+        if self._error is not None:
+            raise self._error
+        return sum(s.rows for s in self.stats)
+
+    def report(self, elapsed):
+        """Print per-worker and aggregate throughput."""
+        for s in self.stats:
+            print(f"  writer-{s.worker_id}: {s.rows} rows, {s.batches} batches, "
+                  f"{s.retries} retries, {s.rows_per_sec:,.0f} rows/sec")
+        total = sum(s.rows for s in self.stats)
+        rate = total / elapsed if elapsed > 0 else 0.0
+        print(f"  total: {total} rows in {elapsed:.2f}s "
+              f"({rate:,.0f} rows/sec across {self.workers} writers)")
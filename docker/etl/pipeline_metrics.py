@@ -0,0 +1,423 @@
+# pipeline_metrics.py
+# Per-stage instrumentation shared by the SDT pipeline scripts
+# (extract_ifc_properties.py, etl_ifc_to_ttl.py, validate_shacl.py,
+# generate_integration_summary.py and docker/etl/run_etl.py). One copy in
+# TH2-integration/generate_input_data/ifc serves the TH1/TH2 scripts (next to
+# graph_cache.py); an identical one in docker/etl is mounted into the ETL image.
+#
+# Each script wraps its stages:
+#
+#   from pipeline_metrics import metrics
+#   with metrics.stage("rdf_generation", unit="rows") as st:
+#       for row in rows:
+#           ...
+#           st.count()
+#       st.set(triples=total)
+#   driver = metrics.instrument_driver(GraphDatabase.driver(...))
+#
+# and every stage records wall-clock and CPU seconds, items and items/sec
+# (plus any extra counts given to ``set``), the process peak RSS at its end
+# and how much the stage raised it, the peak RSS of finished child processes
+# (process pools), and the Neo4j queries / transactions run through an
+# instrumented driver. Round trips = queries + transaction commits.
+#
+# Recording is cheap and always on; nothing is printed or written unless
+#   SDT_METRICS=<file>      trace written at exit, by suffix:
+#                             .json   this run (script, stages, totals)
+#                             .jsonl  one line per run appended (pipeline trace)
+#                             .prom   Prometheus text format; lines of other
+#                                     scripts already in the file are kept, so
+#                                     one file can serve a node_exporter
+#                                     textfile collector for the whole pipeline
+#   SDT_PROFILE=<dir>       cProfile each top-level stage to
+#                           <dir>/<script>.<stage>.prof (snakeviz, pstats)
+#   SDT_TRACEMALLOC=<n>     trace Python allocations; per stage the traced peak
+#                           and the top <n> allocating lines (JSON trace only)
+#
+# Usage (any script):
+#   SDT_METRICS=outputs/pipeline.jsonl python etl_ifc_to_ttl.py
+#   SDT_METRICS=outputs/sdt.prom SDT_PROFILE=outputs/prof python validate_shacl.py
+#   python pipeline_metrics.py outputs/pipeline.jsonl     # table of a trace
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak RSS is then not reported
+    resource = None
+
+METRICS_PATH = os.getenv("SDT_METRICS") or None
+PROFILE_DIR = os.getenv("SDT_PROFILE") or None
+TRACEMALLOC_TOP = int(os.getenv("SDT_TRACEMALLOC", "0") or 0)
+
+# ru_maxrss is in KiB on Linux, bytes on macOS
+_RSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss():
+    """(peak RSS of this process, peak RSS of its largest finished child) in bytes."""
+    if resource is None:
+        return None, None
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_SCALE,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * _RSS_SCALE)
+
+
+# ---------- Neo4j round trips ----------
+class _CountingTx:
+    def __init__(self, tx, counters):
+        self._tx = tx
+        self._counters = counters
+        self._committed = False
+
+    def run(self, *args, **kwargs):
+        self._counters.add("queries")
+        return self._tx.run(*args, **kwargs)
+
+    def commit(self):
+        self._committed = True
+        self._counters.add("transactions")
+        return self._tx.commit()
+
+    def __enter__(self):
+        self._tx.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None and not self._committed:  # leaving the block commits
+            self._counters.add("transactions")
+        return self._tx.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class _CountingSession:
+    def __init__(self, session, counters):
+        self._session = session
+        self._counters = counters
+
+    def run(self, *args, **kwargs):
+        self._counters.add("queries")
+        return self._session.run(*args, **kwargs)
+
+    def _managed(self, execute, work, *args, **kwargs):
+        self._counters.add("transactions")
+        counters = self._counters
+        return execute(lambda tx, *a, **kw: work(_CountingTx(tx, counters), *a, **kw), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._managed(self._session.execute_write, work, *args, **kwargs)
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._managed(self._session.execute_read, work, *args, **kwargs)
+
+    def begin_transaction(self, *args, **kwargs):
+        return _CountingTx(self._session.begin_transaction(*args, **kwargs), self._counters)
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._session.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class _CountingDriver:
+    def __init__(self, driver, counters):
+        self._driver = driver
+        self._counters = counters
+
+    def session(self, *args, **kwargs):
+        return _CountingSession(self._driver.session(*args, **kwargs), self._counters)
+
+    def __enter__(self):
+        self._driver.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._driver.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class Counters:
+    """Thread-safe named counters (writer threads share one driver)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {"queries": 0, "transactions": 0}
+
+    def add(self, name, n=1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+
+# ---------- Stages ----------
+class Stage:
+    """Handle yielded by ``Metrics.stage``; counts the stage's items."""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.extra = {}
+
+    def count(self, n=1):
+        self.items += n
+
+    def set(self, **values):
+        self.extra.update(values)
+
+
+class Metrics:
+    def __init__(self, script=None):
+        self.script = script or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        self.started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self.stages = []
+        self.neo4j = Counters()
+        self._depth = 0
+        if TRACEMALLOC_TOP and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def instrument_driver(self, driver):
+        """Wrap a neo4j Driver so its sessions count queries and transactions."""
+        return _CountingDriver(driver, self.neo4j)
+
+    @contextmanager
+    def stage(self, name, unit="items"):
+        st = Stage(name, unit)
+        rss0, _ = peak_rss()
+        neo0 = self.neo4j.snapshot()
+        profiler = None
+        if PROFILE_DIR and self._depth == 0:
+            profiler = cProfile.Profile()
+        if TRACEMALLOC_TOP:
+            tracemalloc.reset_peak()
+        self._depth += 1
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        error = None
+        try:
+            yield st
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            seconds = time.perf_counter() - t0
+            cpu = time.process_time() - cpu0
+            self._depth -= 1
+            rec = self._record(st, seconds, cpu, rss0, neo0, profiler)
+            if error:
+                rec["error"] = error
+            self.stages.append(rec)
+            if METRICS_PATH:
+                print(format_stage(rec))
+
+    def _record(self, st, seconds, cpu, rss0, neo0, profiler):
+        rec = {"stage": st.name, "seconds": round(seconds, 6), "cpu_seconds": round(cpu, 6),
+               "unit": st.unit, "items": st.items,
+               "items_per_sec": round(st.items / seconds, 1) if seconds > 0 else None}
+        for key, value in st.extra.items():
+            rec[key] = value
+            if isinstance(value, (int, float)) and seconds > 0:
+                rec[f"{key}_per_sec"] = round(value / seconds, 1)
+        rss, children = peak_rss()
+        if rss is not None:
+            rec["peak_rss_bytes"] = rss
+            rec["peak_rss_growth_bytes"] = rss - rss0
+            rec["children_peak_rss_bytes"] = children
+        neo = self.neo4j.snapshot()
+        queries = neo["queries"] - neo0["queries"]
+        transactions = neo["transactions"] - neo0["transactions"]
+        if queries or transactions:
+            rec["neo4j_queries"] = queries
+            rec["neo4j_transactions"] = transactions
+            rec["neo4j_round_trips"] = queries + transactions
+        if TRACEMALLOC_TOP and tracemalloc.is_tracing():
+            rec["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:TRACEMALLOC_TOP]
+            rec["tracemalloc_top"] = [{"where": str(s.traceback), "bytes": s.size, "count": s.count}
+                                      for s in stats]
+        if profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{self.script}.{st.name}.prof")
+            profiler.dump_stats(path)
+            rec["profile"] = path
+        return rec
+
+    # ---------- Output ----------
+    def trace(self):
+        rss, children = peak_rss()
+        neo = self.neo4j.snapshot()
+        return {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started": self.started,
+            "seconds": round(time.perf_counter() - self.t0, 6),
+            "peak_rss_bytes": rss,
+            "children_peak_rss_bytes": children,
+            "neo4j_queries": neo["queries"],
+            "neo4j_transactions": neo["transactions"],
+            "neo4j_round_trips": neo["queries"] + neo["transactions"],
+            "stages": self.stages,
+        }
+
+    def write(self, path=None):
+        path = path or METRICS_PATH
+        if not path:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        trace = self.trace()
+        if path.endswith(".jsonl"):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace) + "\n")
+        elif path.endswith(".prom"):
+            _write_atomic(path, _merge_prometheus(path, self.script, prometheus_lines(trace)))
+        else:
+            _write_atomic(path, json.dumps(trace, indent=2) + "\n")
+        return path
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# ---------- Prometheus text format ----------
+GAUGES = [
+    ("seconds", "sdt_stage_seconds", "Wall-clock seconds of the stage"),
+    ("cpu_seconds", "sdt_stage_cpu_seconds", "CPU seconds of the stage (this process)"),
+    ("items", "sdt_stage_items", "Items processed by the stage"),
+    ("items_per_sec", "sdt_stage_items_per_second", "Items per second"),
+    ("peak_rss_bytes", "sdt_stage_peak_rss_bytes", "Process peak RSS at the end of the stage"),
+    ("peak_rss_growth_bytes", "sdt_stage_peak_rss_growth_bytes", "Peak RSS increase during the stage"),
+    ("children_peak_rss_bytes", "sdt_stage_children_peak_rss_bytes", "Peak RSS of finished child processes"),
+    ("neo4j_queries", "sdt_stage_neo4j_queries", "Neo4j queries run in the stage"),
+    ("neo4j_transactions", "sdt_stage_neo4j_transactions", "Neo4j transactions committed in the stage"),
+    ("neo4j_round_trips", "sdt_stage_neo4j_round_trips", "Neo4j round trips (queries + commits)"),
+    ("tracemalloc_peak_bytes", "sdt_stage_tracemalloc_peak_bytes", "Peak traced Python allocations"),
+]
+RUN_GAUGES = [
+    ("seconds", "sdt_run_seconds", "Wall-clock seconds of the script run"),
+    ("peak_rss_bytes", "sdt_run_peak_rss_bytes", "Peak RSS of the script run"),
+    ("neo4j_round_trips", "sdt_run_neo4j_round_trips", "Neo4j round trips of the script run"),
+]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_lines(trace):
+    """{metric name: (help, [sample lines])} for one run."""
+    script = _label(trace["script"])
+    out = {}
+    for key, name, help_text in GAUGES:
+        for rec in trace["stages"]:
+            if rec.get(key) is not None:
+                labels = f'script="{script}",stage="{_label(rec["stage"])}"'
+                if key.startswith("items"):
+                    labels += f',unit="{_label(rec["unit"])}"'
+                out.setdefault(name, (help_text, []))[1].append(f"{name}{{{labels}}} {rec[key]}")
+    for key, name, help_text in RUN_GAUGES:
+        if trace.get(key) is not None:
+            out[name] = (help_text, [f'{name}{{script="{script}"}} {trace[key]}'])
+    return out
+
+
+def _merge_prometheus(path, script, lines):
+    """Keep samples of other scripts from an existing file, replace this script's."""
+    own = f'script="{_label(script)}"'
+    merged = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("#") or not line or own in line:
+                    continue
+                name = line.split("{", 1)[0].split(" ", 1)[0]
+                merged.setdefault(name, ("", []))[1].append(line)
+    except OSError:
+        pass
+    helps = {name: help_text for _, name, help_text in GAUGES + RUN_GAUGES}
+    for name, (help_text, samples) in lines.items():
+        helps[name] = help_text
+        merged.setdefault(name, ("", []))[1].extend(samples)
+    text = []
+    for name in sorted(merged):
+        samples = merged[name][1]
+        text.append(f"# HELP {name} {helps.get(name, name)}")
+        text.append(f"# TYPE {name} gauge")
+        text.extend(samples)
+    return "\n".join(text) + "\n"
+
+
+# ---------- Console ----------
+def _mb(n):
+    return f"{n / 1e6:,.0f} MB" if n is not None else "n/a"
+
+
+def format_stage(rec):
+    line = f"⏱️  {rec['stage']}: {rec['seconds']:.2f}s"
+    if "error" in rec:
+        line += f" (failed: {rec['error']})"
+    if rec["items"]:
+        line += f", {rec['items']:,} {rec['unit']} ({rec['items_per_sec']:,.0f}/s)"
+    if "peak_rss_bytes" in rec:
+        line += f", peak RSS {_mb(rec['peak_rss_bytes'])} (+{_mb(rec['peak_rss_growth_bytes'])})"
+    if "neo4j_round_trips" in rec:
+        line += f", {rec['neo4j_round_trips']:,} Neo4j round trips"
+    return line
+
+
+metrics = Metrics()
+
+
+@atexit.register
+def _write_at_exit():
+    if METRICS_PATH and metrics.stages:
+        print(f"📈 Metrics written to: {metrics.write()}")
+
+
+def main():
+    """Print the stages of a .json/.jsonl trace as a table."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show an SDT_METRICS trace.")
+    parser.add_argument("trace")
+    args = parser.parse_args()
+    with open(args.trace, encoding="utf-8") as f:
+        runs = [json.loads(line) for line in f if line.strip()] if args.trace.endswith(".jsonl") \
+            else [json.load(f)]
+    for run in runs:
+        print(f"{run['script']} ({run['started']}): {run['seconds']:.2f}s, "
+              f"peak RSS {_mb(run.get('peak_rss_bytes'))}, {run.get('neo4j_round_trips', 0):,} Neo4j round trips")
+        for rec in run["stages"]:
+            print("  " + format_stage(rec))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+SDT Carbon Rollups
+------------------
+Pre-aggregated kgCO2e per asset, lifecycle stage and time bucket.
+
+Each ``CarbonRollup`` node holds the totals of one
+(asset, stage, grain, bucket) cell:
+
+    grain   bucket            example
+    hour    YYYY-MM-DDTHH     2025-10-01T14
+    day     YYYY-MM-DD        2025-10-01
+    month   YYYY-MM           2025-10
+
+Buckets are cut from the observation timestamp as written in the source
+(UTC for the demo meters). The observation ingest in ``run_etl.py``
+updates the rollups in the same transaction as the CarbonItems, by the
+difference between the new and the previously stored values, so
+re-ingesting a file leaves them unchanged. ``rebuild`` recomputes them
+from the raw CarbonItems (backfill, or after an emission factor changed).
+
+Dashboards read rollups first (``carbon_by_bucket``), so their cost
+depends on the number of buckets, not on the raw history; the raw
+per-item aggregation is only used when no rollup exists yet.
+
+Usage:
+    python rollups.py rebuild
+    python rollups.py query --grain day --start 2025-10-01 --end 2025-11-01 [--asset ASSET_AHU_01]
+"""
+
+import argparse
+import os
+
+GRAINS = {"hour": 13, "day": 10, "month": 7}  # bucket = left(timestamp, n)
+
+# Applies one transaction's deltas; rows are (a, stage, hour, dkg, dkwh, dn, acts)
+# where ``acts`` are the ids of the ProvenanceActivities behind the items, kept
+# on the rollup as its lineage summary (see lineage.py)
+ROLLUP_APPLY = """
+UNWIND [["hour", hour], ["day", left(hour, 10)], ["month", left(hour, 7)]] AS g
+MERGE (r:CarbonRollup {id: a.id + "|" + stage + "|" + g[0] + "|" + g[1]})
+ON CREATE SET r.asset = a.id,
+              r.stage = stage,
+              r.grain = g[0],
+              r.bucket = g[1],
+              r.kgCO2e = 0.0,
+              r.kWh = 0.0,
+              r.items = 0,
+              r.activities = []
+SET r.kgCO2e = r.kgCO2e + dkg,
+    r.kWh = r.kWh + dkwh,
+    r.items = r.items + dn,
+    r.activities = r.activities + [x IN acts WHERE NOT x IN r.activities]
+MERGE (a)-[:HAS_ROLLUP]->(r)
+"""
+
+ROLLUP_CLEAR = """
+MATCH (r:CarbonRollup)
+CALL { WITH r DETACH DELETE r } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+ROLLUP_REBUILD = """
+MATCH (a:Asset)-[:HAS_CARBON_ITEM]->(c:CarbonItem)<-[:HAS_RESULT]-(o:Observation)
+WHERE NOT coalesce(c.deleted, false)
+OPTIONAL MATCH (c)-[:LINKED_TO_FACTOR]->(f:EmissionFactor)
+WITH a, c, o, f, [(act:ProvenanceActivity)-[:PROV_GENERATED]->(c) | act.id] AS c_acts
+WITH a, c.stage AS stage, left(toString(o.observedAt), 13) AS hour,
+     sum(coalesce(c.kgCO2e, c.quantity * f.value, 0.0)) AS dkg,
+     sum(CASE WHEN c.unit = "kWh" THEN c.quantity ELSE 0.0 END) AS dkwh,
+     count(c) AS dn,
+     reduce(s = [], l IN collect(c_acts) | s + [x IN l WHERE NOT x IN s]) AS acts
+CALL {
+  WITH a, stage, hour, dkg, dkwh, dn, acts
+""" + ROLLUP_APPLY + """
+} IN TRANSACTIONS OF 5000 ROWS
+"""
+
+ROLLUP_QUERY = """
+MATCH (r:CarbonRollup)
+WHERE r.grain = $grain AND r.bucket >= $start AND r.bucket < $end
+  AND ($asset IS NULL OR r.asset = $asset)
+  AND ($stage IS NULL OR r.stage = $stage)
+RETURN r.asset AS asset, r.stage AS stage, r.bucket AS bucket,
+       r.kgCO2e AS kgCO2e, r.kWh AS kWh, r.items AS items
+ORDER BY bucket, asset, stage
+"""
+
+# Same result shape computed from the raw items (Q1 style)
+RAW_QUERY = """
+MATCH (a:Asset)-[:HAS_CARBON_ITEM]->(c:CarbonItem)<-[:HAS_RESULT]-(o:Observation)
+WHERE ($asset IS NULL OR a.id = $asset)
+  AND ($stage IS NULL OR c.stage = $stage)
+  AND NOT coalesce(c.deleted, false)
+WITH a, c, left(toString(o.observedAt), $width) AS bucket
+WHERE bucket >= $start AND bucket < $end
+OPTIONAL MATCH (c)-[:LINKED_TO_FACTOR]->(f:EmissionFactor)
+RETURN a.id AS asset, c.stage AS stage, bucket,
+       sum(coalesce(c.kgCO2e, c.quantity * f.value, 0.0)) AS kgCO2e,
+       sum(CASE WHEN c.unit = "kWh" THEN c.quantity ELSE 0.0 END) AS kWh,
+       count(c) AS items
+ORDER BY bucket, asset, stage
+"""
+
+# -------------------------------------------------------------------
+# API
+# -------------------------------------------------------------------
+
+def rebuild(session):
+    """Recompute all rollups from the raw CarbonItems (auto-commit session)."""
+    session.run(ROLLUP_CLEAR).consume()
+    summary = session.run(ROLLUP_REBUILD).consume()
+    return summary.counters.nodes_created
+
+
+def carbon_by_bucket(session, grain, start, end, asset=None, stage=None):
+    """
+    kgCO2e per (bucket, asset, stage) for buckets in ``[start, end)``.
+
+    ``start``/``end`` are bucket strings of any precision, e.g. "2025-10"
+    or "2025-10-01". Returns ``(rows, source)`` where ``source`` is
+    "rollup" or "raw".
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain: {grain!r} (expected one of {', '.join(GRAINS)})")
+    params = {"grain": grain, "start": start, "end": end, "asset": asset, "stage": stage}
+    rows = [r.data() for r in session.run(ROLLUP_QUERY, params)]
+    if rows or session.run("MATCH (r:CarbonRollup) RETURN r LIMIT 1").single():
+        return rows, "rollup"
+    rows = [r.data() for r in session.run(RAW_QUERY, params, width=GRAINS[grain])]
+    return rows, "raw"
+
+# -------------------------------------------------------------------
+# Entry point
+# -------------------------------------------------------------------
+
+def main():
+    from neo4j import GraphDatabase
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="recompute all rollups from raw CarbonItems")
+    q = sub.add_parser("query", help="print kgCO2e per bucket")
+    q.add_argument("--grain", choices=list(GRAINS), default="day")
+    q.add_argument("--start", required=True)
+    q.add_argument("--end", required=True)
+    q.add_argument("--asset")
+    q.add_argument("--stage")
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(
+        os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+        auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "testpassword")),
+    )
+    with driver, driver.session() as session:
+        if args.command == "rebuild":
+            print(f"Rebuilt rollups: {rebuild(session)} CarbonRollup nodes.")
+            return
+        rows, source = carbon_by_bucket(session, args.grain, args.start, args.end,
+                                        args.asset, args.stage)
+        print(f"{len(rows)} buckets (from {source})")
+        for r in rows:
+            print(f"{r['bucket']:<14} {r['asset']:<20} {r['stage']:<4} "
+                  f"{r['kgCO2e']:>14,.3f} kgCO2e {r['kWh']:>14,.3f} kWh {r['items']:>8}")
+
+
+if __name__ == "__main__":
+    main()
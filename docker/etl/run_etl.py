@@ -12,13 +12,23 @@ This script:
 NOTE:
 - This is a research-grade, reproducible ETL runner.
 - Data schemas are assumed to be ontology-aligned beforehand.
+- Stage timings, rows/sec, peak RSS and Neo4j round trips are recorded
+  with pipeline_metrics.py (SDT_METRICS=<file> writes them).
 """
 
 import os
-import csv
+import time
+from functools import partial
 from neo4j import GraphDatabase
 from datetime import datetime
 
+from carbon_stream import iter_batches, iter_carbon_rows
+from delta_manifest import DeltaManifest
+from parallel_writer import ParallelWriter
+from pipeline_metrics import metrics
+from provenance import ProvenanceRecorder
+from rollups import ROLLUP_APPLY
+
 # -------------------------------------------------------------------
 # Neo4j connection (provided via docker-compose environment variables)
 # -------------------------------------------------------------------
@@ -27,9 +37,10 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "testpassword")
 
-driver = GraphDatabase.driver(
-    NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)
-)
+driver = metrics.instrument_driver(GraphDatabase.driver(
+    NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD),
+    max_connection_pool_size=int(os.getenv("SDT_POOL_SIZE", "100")),
+))
 
 # -------------------------------------------------------------------
 # Paths & configuration
@@ -39,43 +50,292 @@ DATA_DIR = "./data"
 PIPELINE_NAME = os.getenv("SDT_PIPELINE", "demo_lifecycle_carbon")
 INGESTION_TIME = datetime.utcnow().isoformat()
 
+# Rows per UNWIND chunk; each chunk is committed in its own transaction
+BATCH_SIZE = int(os.getenv("SDT_BATCH_SIZE", "5000"))
+
+# Writer threads sharing the driver; 1 keeps the single-session path
+WRITERS = int(os.getenv("SDT_WRITERS", "1"))
+
+# Incremental mode: only write rows whose content hash changed since the last run
+INCREMENTAL = os.getenv("SDT_INCREMENTAL", "0") == "1"
+TOMBSTONE = os.getenv("SDT_TOMBSTONE", "0") == "1"
+MANIFEST_PATH = os.getenv("SDT_MANIFEST", "./outputs/etl_manifest.sqlite")
+
+# "carbon" ingests carbon_items.csv; "observations" ingests a B6 meter CSV
+MODE = os.getenv("SDT_MODE", "carbon")
+OBSERVATION_FILE = os.getenv("SDT_OBSERVATION_FILE", "B6_Energy_1month.csv")
+EMISSION_FACTOR_ID = os.getenv("SDT_EMISSION_FACTOR", "EF_ELEC_GRID")
+
+# Streaming anomaly rules on ingested Observations (see anomaly_engine.py)
+ANOMALY = os.getenv("SDT_ANOMALY", "0") == "1"
+ANOMALY_RULES = os.getenv("SDT_ANOMALY_RULES") or None
+ANOMALY_STATE = os.getenv("SDT_ANOMALY_STATE", "./outputs/anomaly_state.pkl")
+
 # -------------------------------------------------------------------
-# Helper: create provenance node
+# Helper: record the ingest activity (see provenance.py)
 # -------------------------------------------------------------------
 
-def create_provenance(tx, source_file):
-    tx.run(
-        """
-        MERGE (p:ProvenanceActivity {
-            name: $pipeline,
-            executedAt: datetime($time),
-            source: $source
-        })
-        """,
-        pipeline=PIPELINE_NAME,
-        time=INGESTION_TIME,
-        source=source_file
-    )
+def record_provenance(path, writers=1):
+    """Record one ProvenanceActivity (and a part per writer) per source file; returns its recorder."""
+    recorder = ProvenanceRecorder(PIPELINE_NAME, path, executed_at=INGESTION_TIME, writers=writers)
+    with metrics.stage("provenance"), driver.session() as session:
+        session.execute_write(recorder.record)
+    print(f"Provenance activity: {recorder.activity_id} ({len(recorder.part_ids)} parts)")
+    return recorder
+
+
+def finish_provenance(recorder):
+    with driver.session() as session:
+        session.execute_write(recorder.finish)
 
 # -------------------------------------------------------------------
 # ETL Step: ingest lifecycle carbon items (example CSV)
 # -------------------------------------------------------------------
 
-def ingest_carbon_items(tx, rows):
-    for r in rows:
-        tx.run(
-            """
-            MERGE (c:CarbonItem {id: $id})
-            SET c.stage = $stage,
-                c.quantity = $qty,
-                c.unit = $unit
-            """,
-            id=r["carbon_id"],
-            stage=r["lifecycle_stage"],
-            qty=float(r["quantity"]),
-            unit=r["unit"]
+CARBON_ITEM_UNWIND = """
+UNWIND $rows AS r
+MERGE (c:CarbonItem {id: r.id})
+SET c.stage = r.stage,
+    c.quantity = r.qty,
+    c.unit = r.unit
+REMOVE c.deleted, c.deletedAt
+WITH c
+MATCH (act:ProvenanceActivity {id: $act})
+MERGE (act)-[:PROV_GENERATED]->(c)
+WITH DISTINCT act
+SET act.lastExecutedAt = datetime.realtime()
+"""
+
+
+def write_carbon_batch(tx, batch, act=None):
+    tx.run(CARBON_ITEM_UNWIND, rows=batch, act=act).consume()
+
+
+def ingest_carbon_items(session, batches, act=None):
+    """
+    Write CarbonItems as parameterized UNWIND chunks.
+
+    ``batches`` is any iterable of coerced row lists (see carbon_stream),
+    consumed lazily so each chunk is committed before the next one is read.
+    One Bolt round-trip and one transaction per chunk, so neither the
+    round-trip count nor the transaction state grows with the row count.
+    Each item is linked to the part activity ``act`` in the same statement.
+    """
+    written = 0
+    n_batches = 0
+    started = time.perf_counter()
+
+    for batch in batches:
+        session.execute_write(write_carbon_batch, batch, act)
+        written += len(batch)
+        n_batches += 1
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f"Wrote {written} rows in {elapsed:.2f}s "
+          f"({rate:,.0f} rows/sec, {n_batches} batches).")
+    return written
+
+
+def ingest_carbon_items_parallel(items, workers, parts=None):
+    """
+    Write CarbonItems through a pool of writer threads.
+
+    Rows are partitioned by ``carbon_id`` hash so no two writers ever
+    MERGE the same CarbonItem concurrently, and writer n links its items
+    to its own part activity ``parts[n]``, so no two writers lock the
+    same ProvenanceActivity either.
+    """
+    parts = parts or [None] * workers
+    writer = ParallelWriter(driver, [partial(write_carbon_batch, act=p) for p in parts],
+                            workers=workers, batch_size=BATCH_SIZE)
+    started = time.perf_counter()
+    written = writer.write(items)
+    writer.report(time.perf_counter() - started)
+    return written
+
+
+CARBON_ITEM_TOMBSTONE = """
+UNWIND $ids AS id
+MATCH (c:CarbonItem {id: id})
+SET c.deleted = true,
+    c.deletedAt = datetime($time)
+"""
+
+
+def write_tombstone_batch(tx, ids):
+    tx.run(CARBON_ITEM_TOMBSTONE, ids=ids, time=INGESTION_TIME).consume()
+
+
+def tombstone_deleted(session, manifest):
+    """
+    Flag CarbonItems that disappeared from the source file since the last load.
+
+    A tombstoned item that reappears in a later file is an insert for the
+    manifest; CARBON_ITEM_UNWIND clears the flags again.
+    """
+    tombstoned = 0
+    for ids in manifest.iter_deleted(BATCH_SIZE):
+        session.execute_write(write_tombstone_batch, ids)
+        tombstoned += len(ids)
+    return tombstoned
+
+# -------------------------------------------------------------------
+# ETL Step: ingest B6 meter readings (SOSA Observations)
+# -------------------------------------------------------------------
+
+# Parameters are columnar ($o.id, $o.t, ...: one list per field)
+SENSOR_UNWIND = """
+UNWIND $pairs AS p
+MERGE (a:Asset {id: p[0]})
+MERGE (s:Sensor {id: p[1]})
+MERGE (a)-[:MONITORED_BY]->(s)
+"""
+
+OBSERVATION_UNWIND = """
+UNWIND range(0, size($o.id) - 1) AS i
+MATCH (a:Asset {id: $o.asset[i]})
+MATCH (s:Sensor {id: $o.sensor[i]})
+MERGE (o:Observation {id: $o.id[i]})
+SET o.metric = "Energy",
+    o.value = $o.value[i],
+    o.unit = $o.unit[i],
+    o.observedAt = datetime($o.t[i]),
+    o.source = $source
+MERGE (a)-[:HAS_OBSERVATION]->(o)
+MERGE (o)-[:MADE_BY_SENSOR]->(s)
+WITH o
+MATCH (act:ProvenanceActivity {id: $act})
+MERGE (act)-[:PROV_GENERATED]->(o)
+WITH DISTINCT act
+SET act.lastExecutedAt = datetime.realtime()
+"""
+
+OBSERVATION_CARBON_UNWIND = """
+MATCH (st:LifecycleStage {code: "B6"})
+MATCH (f:EmissionFactor {id: $factor})
+OPTIONAL MATCH (act:ProvenanceActivity {id: $act})
+UNWIND range(0, size($c.id) - 1) AS i
+MATCH (a:Asset {id: $c.asset[i]})
+MATCH (o:Observation {id: $c.obs[i]})
+MERGE (c:CarbonItem {id: $c.id[i]})
+WITH st, f, act, a, o, c, i,
+     coalesce(c.kgCO2e, 0.0) AS old_kg,
+     coalesce(c.quantity, 0.0) AS old_kwh,
+     c.stage IS NULL AS created
+SET c.stage = "B6",
+    c.quantity = $c.kwh[i],
+    c.unit = "kWh",
+    c.kgCO2e = $c.kg[i],
+    c.description = "Metered operational electricity"
+MERGE (o)-[:HAS_RESULT]->(c)
+MERGE (c)-[:PART_OF_STAGE]->(st)
+MERGE (c)-[:LINKED_TO_FACTOR]->(f)
+MERGE (a)-[:HAS_CARBON_ITEM]->(c)
+FOREACH (_ IN CASE WHEN act IS NULL THEN [] ELSE [1] END |
+  MERGE (act)-[:PROV_GENERATED]->(c))
+WITH a, "B6" AS stage, $c.hour[i] AS hour,
+     sum($c.kg[i] - old_kg) AS dkg,
+     sum($c.kwh[i] - old_kwh) AS dkwh,
+     sum(CASE WHEN created THEN 1 ELSE 0 END) AS dn,
+     collect(DISTINCT act.id) AS acts
+""" + ROLLUP_APPLY
+
+
+# observation_stream (numpy) and anomaly_engine are imported by the
+# observation functions only, so the default carbon mode runs without numpy
+
+def load_emission_factor(tx, factor_id):
+    from observation_stream import factor_per_kwh
+
+    record = tx.run(
+        "MATCH (f:EmissionFactor {id: $id}) RETURN f.value AS value, f.unit AS unit",
+        id=factor_id,
+    ).single()
+    if record is None:
+        raise LookupError(f"EmissionFactor not found: {factor_id}")
+    return factor_per_kwh(record["value"], record["unit"] or "kgCO2e/kWh")
+
+
+def write_observation_chunk(tx, chunk, source, act=None, tasks=()):
+    from anomaly_engine import TASK_UNWIND
+
+    observations, carbon, _ = chunk
+    pairs = sorted(set(zip(observations["asset"], observations["sensor"])))
+    tx.run(SENSOR_UNWIND, pairs=pairs).consume()
+    tx.run(OBSERVATION_UNWIND, o=observations, source=source, act=act).consume()
+    if carbon["id"]:
+        tx.run(OBSERVATION_CARBON_UNWIND, c=carbon, factor=EMISSION_FACTOR_ID, act=act).consume()
+    if tasks:
+        tx.run(TASK_UNWIND, tasks=tasks).consume()
+
+
+def ingest_observations(session, chunks, source, act=None, engine=None):
+    """
+    Write one transaction per chunk: Asset/Sensor links, Observations,
+    then the B6 CarbonItems derived from them and their rollup deltas
+    (see rollups.py), then the WorkflowTasks raised by ``engine``.
+    Rules are evaluated before the write, so a retried transaction
+    does not feed the readings to the engine twice.
+    """
+    written = 0
+    carbon_items = 0
+    rejected = 0
+    alerts = 0
+    started = time.perf_counter()
+
+    for chunk in chunks:
+        tasks = engine.process(chunk[0]) if engine is not None else ()
+        session.execute_write(write_observation_chunk, chunk, source, act, tasks)
+        written += len(chunk[0]["id"])
+        carbon_items += len(chunk[1]["id"])
+        rejected += chunk[2]
+        alerts += len(tasks)
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f"Wrote {written} readings ({carbon_items} CarbonItems) in {elapsed:.2f}s "
+          f"({rate:,.0f} readings/sec, {rejected} rejected).")
+    if engine is not None:
+        print(f"Anomaly rules raised {alerts} WorkflowTasks "
+              f"({engine.skipped} readings in non-energy units skipped, "
+              f"{engine.stale} already seen or out of order).")
+    return written
+
+
+def run_observations():
+    from anomaly_engine import AnomalyEngine, load_rules
+    from observation_stream import iter_observation_chunks
+
+    obs_file = os.path.join(DATA_DIR, OBSERVATION_FILE)
+    if not os.path.exists(obs_file):
+        raise FileNotFoundError(
+            f"Expected data file not found: {OBSERVATION_FILE}"
         )
 
+    engine = None
+    if ANOMALY:
+        engine = AnomalyEngine(load_rules(ANOMALY_RULES))
+        if engine.load_state(ANOMALY_STATE):
+            print(f"Anomaly state resumed for {len(engine.sensors)} sensors.")
+
+    recorder = record_provenance(obs_file)
+    with driver.session() as session:
+        kg_per_kwh = session.execute_read(load_emission_factor, EMISSION_FACTOR_ID)
+        print(f"Emission factor: {EMISSION_FACTOR_ID} = {kg_per_kwh} kgCO2e/kWh")
+        chunks = iter_observation_chunks(obs_file, kg_per_kwh, BATCH_SIZE)
+        with metrics.stage("ingest_observations", unit="readings") as st:
+            written = ingest_observations(session, chunks, OBSERVATION_FILE,
+                                          recorder.part_ids[0], engine)
+            st.count(written)
+    finish_provenance(recorder)
+
+    if engine is not None:
+        engine.save_state(ANOMALY_STATE)
+
+    print("ETL completed successfully.")
+    print(f"Ingested {written} Observation instances.")
+
 # -------------------------------------------------------------------
 # Main ETL pipeline
 # -------------------------------------------------------------------
@@ -84,6 +344,10 @@ def run():
     print("Starting SDT ETL pipeline...")
     print(f"Pipeline: {PIPELINE_NAME}")
 
+    if MODE == "observations":
+        run_observations()
+        return
+
     carbon_file = os.path.join(DATA_DIR, "carbon_items.csv")
 
     if not os.path.exists(carbon_file):
@@ -91,16 +355,42 @@ def run():
             "Expected data file not found: carbon_items.csv"
         )
 
-    with open(carbon_file, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    manifest = None
+    items = iter_carbon_rows(carbon_file)
+    if INCREMENTAL:
+        manifest = DeltaManifest(MANIFEST_PATH, "carbon_items.csv")
+        if manifest.file_unchanged(carbon_file):
+            manifest.close()
+            print("carbon_items.csv unchanged since last load; nothing to ingest.")
+            return
+        items = manifest.filter_changed(items)
 
-    with driver.session() as session:
-        session.execute_write(create_provenance, "carbon_items.csv")
-        session.execute_write(ingest_carbon_items, rows)
+    # Fingerprinted before the (lazy) parse starts; the manifest records this one
+    recorder = record_provenance(carbon_file, max(WRITERS, 1))
+
+    with metrics.stage("ingest_carbon_items", unit="rows") as st:
+        if WRITERS > 1:
+            written = ingest_carbon_items_parallel(items, WRITERS, recorder.part_ids)
+        else:
+            with driver.session() as session:
+                written = ingest_carbon_items(session, iter_batches(items, BATCH_SIZE),
+                                              recorder.part_ids[0])
+        st.count(written)
+    finish_provenance(recorder)
+
+    if manifest is not None:
+        tombstoned = 0
+        if TOMBSTONE:
+            with metrics.stage("tombstone", unit="rows") as st, driver.session() as session:
+                tombstoned = tombstone_deleted(session, manifest)
+                st.count(tombstoned)
+        manifest.commit(recorder.fingerprint, tombstoned=TOMBSTONE)
+        manifest.close()
+        print(f"Delta: {manifest.inserted} inserted, {manifest.changed} changed, "
+              f"{manifest.unchanged} unchanged, {tombstoned} tombstoned.")
 
     print("ETL completed successfully.")
-    print(f"Ingested {len(rows)} CarbonItem instances.")
+    print(f"Ingested {written} CarbonItem instances.")
 
 # -------------------------------------------------------------------
 # Entry point
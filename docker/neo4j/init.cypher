@@ -26,9 +26,15 @@ FOR (n:Asset) REQUIRE n.id IS UNIQUE;
 CREATE CONSTRAINT observation_id IF NOT EXISTS
 FOR (n:Observation) REQUIRE n.id IS UNIQUE;
 
+CREATE CONSTRAINT sensor_id IF NOT EXISTS
+FOR (n:Sensor) REQUIRE n.id IS UNIQUE;
+
 CREATE CONSTRAINT carbonItem_id IF NOT EXISTS
 FOR (n:CarbonItem) REQUIRE n.id IS UNIQUE;
 
+CREATE CONSTRAINT carbonRollup_id IF NOT EXISTS
+FOR (n:CarbonRollup) REQUIRE n.id IS UNIQUE;
+
 CREATE CONSTRAINT lifecycleStage_code IF NOT EXISTS
 FOR (n:LifecycleStage) REQUIRE n.code IS UNIQUE;
 
@@ -57,6 +63,15 @@ FOR (n:CarbonItem) ON (n.stage);
 CREATE INDEX observation_time IF NOT EXISTS
 FOR (n:Observation) ON (n.observedAt);
 
+CREATE INDEX carbonRollup_bucket IF NOT EXISTS
+FOR (n:CarbonRollup) ON (n.grain, n.bucket);
+
+CREATE INDEX provActivity_executedAt IF NOT EXISTS
+FOR (n:ProvenanceActivity) ON (n.executedAt);
+
+CREATE INDEX provActivity_lastExecutedAt IF NOT EXISTS
+FOR (n:ProvenanceActivity) ON (n.lastExecutedAt);
+
 CREATE INDEX workflowTask_status IF NOT EXISTS
 FOR (n:WorkflowTask) ON (n.status);
 
@@ -100,7 +115,8 @@ UNWIND [
   {name:"ASSOCIATED_WITH_ASSET", from:"WorkflowTask", to:"Asset"},
   {name:"PROV_USED", from:"ProvenanceActivity", to:"ProvenanceEntity"},
   {name:"PROV_GENERATED", from:"ProvenanceActivity", to:"ProvenanceEntity"},
-  {name:"PROV_ASSOCIATED_WITH", from:"ProvenanceActivity", to:"ProvenanceAgent"}
+  {name:"PROV_ASSOCIATED_WITH", from:"ProvenanceActivity", to:"ProvenanceAgent"},
+  {name:"PART_OF_ACTIVITY", from:"ProvenanceActivity", to:"ProvenanceActivity"}
 ] AS r
 MERGE (rel:Relation {name: r.name})
 SET rel.domain = r.from, rel.range = r.to
@@ -238,7 +254,7 @@ MERGE (s)-[:SUMMARIZES]->(a);
 // 8) DEMO QUERIES (comments only; run in Neo4j Browser)
 // ----------------------------------------------------------------------------
 //
-// (Q1) Compute carbon for B6 electricity item:
+// (Q1) Compute carbon for B6 electricity item (single item; for dashboards use Q4):
 // MATCH (c:CarbonItem {id:"CI_B6_ELEC_0001"})-[:LINKED_TO_FACTOR]->(f:EmissionFactor)
 // RETURN c.id, c.quantity, c.unit, f.value AS factor, (c.quantity * f.value) AS kgCO2e;
 //
@@ -251,4 +267,11 @@ MERGE (s)-[:SUMMARIZES]->(a);
 // MATCH (t:WorkflowTask {id:"TASK_0001"})-[:TRIGGERED_BY]->(o:Observation)
 // OPTIONAL MATCH (act:ProvenanceActivity)-[:PROV_GENERATED]->(c:CarbonItem)
 // RETURN t.id, t.type, o.metric, o.value, o.observedAt, collect(DISTINCT act.id) AS provActivities;
+//
+// (Q4) Daily operational carbon per asset from the rollups (kept up to date by
+//      SDT_MODE=observations ingests; backfill with `python rollups.py rebuild`):
+// MATCH (r:CarbonRollup)
+// WHERE r.grain = "day" AND r.bucket >= "2025-10-01" AND r.bucket < "2025-11-01"
+// RETURN r.asset, r.stage, r.bucket, r.kgCO2e, r.kWh
+// ORDER BY r.bucket, r.asset;
 // ============================================================================
@@ -0,0 +1,39 @@
+# conftest.py
+# The pipeline modules are plain scripts in their stage directories (no
+# package); put those directories on sys.path so tests can import them.
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+
+for sub in (
+    "docker/etl",
+    "TH2-integration",
+    "TH2-integration/generate_input_data/ifc",
+    "TH5-ai_ingestion",
+):
+    path = str(REPO / sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope="session")
+def neo4j_driver():
+    """Driver for NEO4J_URI; tests using it are skipped when no database answers."""
+    neo4j = pytest.importorskip("neo4j")
+    driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+        auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "testpassword")),
+        connection_timeout=5,
+    )
+    try:
+        driver.verify_connectivity()
+    except Exception as e:
+        driver.close()
+        pytest.skip(f"Neo4j not reachable: {type(e).__name__}")
+    yield driver
+    driver.close()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from rdflib import URIRef
+
+from ai_ingest_runner import IngestRunner, ResponseCache, file_sink
+from stub_model_server import Handler, Server
+
+EX = "http://example.org/sdt#"
+ROWS = [
+    {"ObservationID": f"OBS_{i}", "Quantity": str(10 * i), "Unit": "kWh",
+     "LifecycleModule": "B6", "Activity": "Metering", "CarbonResult": str(5 * i)}
+    for i in range(1, 4)
+]
+
+
+class CountingHandler(Handler):
+    """Stub endpoint that counts POSTs and answers the first ``failures`` with 429."""
+
+    posts = 0
+    failures = 0
+
+    def do_POST(self):
+        with self.lock:
+            cls = type(self)
+            cls.posts += 1
+            fail = cls.failures > 0
+            if fail:
+                cls.failures -= 1
+        if fail:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send(429, {"error": {"message": "rate limited (stub)"}}, {"Retry-After": "1"})
+            return
+        super().do_POST()
+
+
+@pytest.fixture
+def stub():
+    CountingHandler.posts = CountingHandler.failures = 0
+    server = Server(("127.0.0.1", 0), CountingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    server.shutdown()
+    server.server_close()
+
+
+def ingest(endpoint, cache_dir, rows):
+    """One runner invocation; returns (stats, merged graph)."""
+    runner = IngestRunner(endpoint, None, ResponseCache(cache_dir), concurrency=2, rate=0)
+    sink = file_sink(None)
+    asyncio.run(runner.run(iter(rows), 2, sink))
+    return runner.stats, sink.graph
+
+
+def quantity(graph, obs_id):
+    return graph.value(URIRef(EX + f"Observation_{obs_id}"), URIRef(EX + "hasQuantity"))
+
+
+def test_rerun_is_served_from_the_cache(stub, tmp_path):
+    stats, first = ingest(stub, tmp_path / "cache", ROWS)
+    assert (stats["requested"], stats["cached"], stats["failed"]) == (3, 0, 0)
+
+    stats, second = ingest(stub, tmp_path / "cache", ROWS)
+    assert (stats["requested"], stats["cached"]) == (0, 3)
+    assert CountingHandler.posts == 3
+    assert set(second) == set(first) and len(first) > 0
+
+
+def test_edited_row_misses_the_cache(stub, tmp_path):
+    ingest(stub, tmp_path / "cache", ROWS)
+    edited = [dict(ROWS[0], Quantity="99")] + ROWS[1:]
+
+    stats, graph = ingest(stub, tmp_path / "cache", edited)
+    assert (stats["requested"], stats["cached"]) == (1, 2)
+    assert float(quantity(graph, "OBS_1")) == 99.0
+
+
+def test_429_is_retried_after_retry_after(stub, tmp_path):
+    CountingHandler.failures = 1
+    started = time.perf_counter()
+    stats, graph = ingest(stub, tmp_path / "cache", ROWS[:1])
+    assert time.perf_counter() - started >= 1.0
+    assert (stats["requested"], stats["failed"]) == (1, 0)
+    assert CountingHandler.posts == 2
+    assert quantity(graph, "OBS_1") is not None
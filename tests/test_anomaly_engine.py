@@ -0,0 +1,109 @@
+import pickle
+
+import pytest
+
+from anomaly_engine import AnomalyEngine
+
+
+def chunk(values, units="kWh", sensor="S1", start=0):
+    """Columnar Observation parameters, one reading every 15 minutes."""
+    n = len(values)
+    units = [units] * n if isinstance(units, str) else units
+    times = [f"2026-01-01T{(start + i) // 4:02d}:{(start + i) % 4 * 15:02d}:00" for i in range(n)]
+    return {
+        "id": [f"OBS_{sensor}_{t}" for t in times],
+        "t": times,
+        "sensor": [sensor] * n,
+        "asset": ["A1"] * n,
+        "value": list(values),
+        "unit": units,
+    }
+
+
+def zscore(window, rule_id=None):
+    return {"id": rule_id or f"Z{window}", "kind": "zscore", "window": window, "min_count": window, "z": 4.0}
+
+
+def test_rules_see_readings_in_kwh():
+    engine = AnomalyEngine([{"id": "HIGH", "kind": "threshold", "max": 100.0}])
+    tasks = engine.process(chunk([50.0, 50000.0, 0.05, 150000.0, 360.0],
+                                 ["kWh", "Wh", "MWh", "Wh", "MJ"]))
+    assert [t["observation"][-8:] for t in tasks] == ["00:45:00"]
+    assert tasks[0]["detail"] == "value 150 kWh > 100 kWh"
+    assert engine.readings == 5 and engine.skipped == 0
+
+
+def test_rate_uses_kwh():
+    engine = AnomalyEngine([{"id": "STEP", "kind": "rate", "max_per_hour": 200.0}])
+    tasks = engine.process(chunk([10.0, 10000.0, 0.01, 100.0], ["kWh", "Wh", "MWh", "kWh"]))
+    assert [t["detail"] for t in tasks] == ["rate 360 kWh/h > 200 kWh/h"]
+
+
+def test_non_energy_readings_are_skipped():
+    engine = AnomalyEngine([{"id": "HIGH", "kind": "threshold", "max": 100.0}])
+    assert engine.process(chunk([500.0, 5.0], ["kW", "kWh"])) == []
+    assert engine.readings == 1 and engine.skipped == 1
+
+
+def test_each_zscore_window_has_its_own_ring():
+    engine = AnomalyEngine([zscore(4), zscore(8)])
+    engine.process(chunk([float(v) for v in range(1, 11)]))
+    rings = engine.sensors["S1"].rings
+    assert rings[4].mean_std()[0] == pytest.approx(8.5)
+    assert rings[8].mean_std()[0] == pytest.approx(6.5)
+
+
+def test_short_window_is_not_diluted_by_the_long_one():
+    engine = AnomalyEngine([zscore(4), zscore(8)])
+    values = [1.0, -1.0, 1.0, -1.0, 49.0, 51.0, 49.0, 51.0, 60.0]
+    last = chunk(values)["id"][-1]
+    tasks = engine.process(chunk(values))
+    # last 4 readings: mean 50, std 1 -> z 10; last 8: mean 25, std 25 -> z 1.4
+    assert [t["rule"] for t in tasks if t["observation"] == last] == ["Z4"]
+
+
+def test_state_round_trip_requires_same_windows(tmp_path):
+    path = str(tmp_path / "state.pkl")
+    engine = AnomalyEngine([zscore(4), zscore(8)])
+    engine.process(chunk([1.0, 2.0, 3.0]))
+    engine.save_state(path)
+
+    resumed = AnomalyEngine([zscore(8, "B"), zscore(4, "A")])
+    assert resumed.load_state(path)
+    assert resumed.sensors["S1"].rings[4].count == 3
+    assert not AnomalyEngine([zscore(4)]).load_state(path)
+
+    with open(path, "wb") as f:  # single shared ring of the previous format
+        pickle.dump({"window": 8, "sensors": {}}, f)
+    assert not engine.load_state(path)
+
+
+def test_reprocessing_after_load_state_does_not_refill_rings(tmp_path):
+    path = str(tmp_path / "state.pkl")
+    rules = [zscore(8), {"id": "HIGH", "kind": "threshold", "max": 100.0}]
+    engine = AnomalyEngine(rules)
+    first = chunk([1.0, 2.0, 3.0, 500.0])
+    assert [t["rule"] for t in engine.process(first)] == ["HIGH"]
+    engine.save_state(path)
+
+    resumed = AnomalyEngine(rules)
+    assert resumed.load_state(path)
+    assert resumed.process(first) == []
+    state = resumed.sensors["S1"]
+    assert state.rings[8].count == 4
+    assert resumed.readings == 0 and resumed.stale == 4
+
+    # an overlapping file: only the reading after the saved state counts
+    resumed.process(chunk([3.0, 500.0, 4.0], start=2))
+    assert state.rings[8].count == 5
+    assert resumed.readings == 1 and resumed.stale == 6
+
+
+def test_out_of_order_reading_does_not_move_last_time():
+    engine = AnomalyEngine([{"id": "STEP", "kind": "rate", "max_per_hour": 200.0}])
+    engine.process(chunk([10.0, 20.0]))
+    last_time = engine.sensors["S1"].last_time
+    assert engine.process(chunk([900.0])) == []
+    assert engine.sensors["S1"].last_time == last_time
+    assert engine.sensors["S1"].last_value == 20.0
+    assert engine.stale == 1
@@ -0,0 +1,115 @@
+import csv
+
+import numpy as np
+import pytest
+
+from carbon_engine import CarbonDataset, compute, factor_info, normalize, scenario, unit_info
+
+FACTORS = [
+    {"id": "EF_ELEC_GRID", "unit": "kgCO2e/kWh", "value": 0.5},
+    {"id": "EF_FILTER", "unit": "kgCO2e/unit", "value": 12.3},
+    {"id": "EF_STEEL", "unit": "tCO2e/t", "value": 1.85},
+    {"id": "EF_GAS", "unit": "gCO2e/MJ", "value": 56.0},
+]
+
+
+def item(id, stage, quantity, unit, factor=None, asset=None):
+    return {"id": id, "stage": stage, "quantity": quantity, "unit": unit, "factor": factor, "asset": asset}
+
+
+@pytest.mark.parametrize("unit, dim, scale", [
+    ("Wh", "energy", 1e-3), ("kWh", "energy", 1.0), (" MWh ", "energy", 1e3), ("MJ", "energy", 1 / 3.6),
+    ("g", "mass", 1e-3), ("t", "mass", 1e3), ("L", "volume", 1e-3), ("pcs", "count", 1.0),
+])
+def test_unit_info(unit, dim, scale):
+    code, s = unit_info(unit)
+    assert code >= 0 and s == pytest.approx(scale)
+    assert code == unit_info({"energy": "kWh", "mass": "kg", "volume": "m3", "count": "unit"}[dim])[0]
+
+
+def test_normalize_is_vectorized_over_mixed_units():
+    quantity, dim = normalize([1500, 2, 3, 7], ["Wh", "MWh", "t", "furlong"])
+    assert quantity[:3].tolist() == pytest.approx([1.5, 2000.0, 3000.0])
+    assert np.isnan(quantity[3]) and dim[3] == -1
+    assert dim[0] == dim[1] != dim[2]
+
+
+def test_factor_units_convert_to_kg_per_base_unit():
+    assert factor_info("tCO2e/MWh")[1] == pytest.approx(1.0)       # 1 t/MWh = 1 kg/kWh
+    assert factor_info("gCO2e/MJ")[1] == pytest.approx(3.6e-3)     # per kWh
+    assert factor_info("kgCO2e/unit") == (unit_info("unit")[0], 1.0)
+
+
+def test_factor_join_and_unit_mismatch():
+    ds = CarbonDataset.from_rows([
+        item("CI_1", "A1-A3", 2, "t", "EF_STEEL", "A"),      # 2 t * 1.85 tCO2e/t
+        item("CI_2", "B6", 1500, "Wh", "EF_ELEC_GRID", "A"),  # 1.5 kWh * 0.5
+        item("CI_3", "A5", 100, "MJ", "EF_GAS", "B"),         # 100 MJ * 56 g/MJ
+        item("CI_4", "B6", 3, "kg", "EF_ELEC_GRID", "B"),     # mass vs energy factor
+        item("CI_5", "A1-A3", 1, "kg", "EF_UNKNOWN", "B"),
+    ], FACTORS)
+    totals = compute(ds)
+    assert totals.item_kg.tolist() == pytest.approx([3700.0, 0.75, 5.6, 0.0, 0.0])
+    assert (totals.unmatched, totals.unfactored, totals.unstaged) == (1, 1, 0)
+    assert totals.by_asset() == pytest.approx({"A": 3700.75, "B": 5.6})
+    assert totals.by_stage() == pytest.approx({"A1-A3": 3700.0, "B6": 0.75, "A5": 5.6})
+
+
+def test_repo_csv_schema_uses_default_factors(tmp_path):
+    path = tmp_path / "carbon_items.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["carbon_id", "lifecycle_stage", "quantity", "unit"])
+        writer.writerows([["CI_B6_1", "B6", "1000", "kWh"], ["CI_B4_1", "B4", "2", "unit"],
+                          ["CI_A5_1", "A5", "10", "kWh"]])
+    ds = CarbonDataset.from_csv(path)
+    assert ds.defaulted == 2
+    base = compute(ds)
+    assert base.total == pytest.approx(500.0 + 24.6)
+    assert base.unfactored == 1
+    result, delta = scenario(ds, {"EF_ELEC_GRID": 0.3}, base)
+    assert result.total == pytest.approx(300.0 + 24.6)
+    assert delta["B6"] == pytest.approx(-200.0)
+
+
+def test_explicit_factor_is_not_replaced_by_default():
+    ds = CarbonDataset.from_rows([item("CI_1", "B6", 10, "kWh", "EF_GAS")], FACTORS)
+    assert ds.defaulted == 0
+    assert compute(ds).total == pytest.approx(10 * 3.6 * 0.056)
+
+
+def test_items_without_stage_are_counted_not_crashing():
+    ds = CarbonDataset.from_rows([
+        item("CI_1", "", 10, "kWh", "EF_ELEC_GRID", "A"),
+        item("CI_2", None, 1, "unit", "EF_FILTER"),
+        item("CI_3", "B6", 4, "kWh", "EF_ELEC_GRID", "A"),
+    ], FACTORS)
+    totals = compute(ds)
+    assert totals.unstaged == 2 and totals.unfactored == 0 and totals.unmatched == 0
+    assert totals.total == pytest.approx(2.0)
+    assert totals.by_asset() == pytest.approx({"A": 2.0})
+
+
+def test_only_unstaged_items():
+    totals = compute(CarbonDataset.from_rows([item("CI_1", "", 1, "kWh", "EF_ELEC_GRID")], FACTORS))
+    assert totals.total == 0.0 and totals.unstaged == 1
+
+
+def test_snapshot_round_trip(tmp_path):
+    ds = CarbonDataset.from_rows([item("CI_1", "B6", 1000, "kWh", asset="A")], FACTORS)
+    ds.save(str(tmp_path / "snap.npz"))
+    loaded = CarbonDataset.load(str(tmp_path / "snap.npz"))
+    assert compute(loaded).by_asset() == compute(ds).by_asset() == pytest.approx({"A": 500.0})
+
+
+def test_unrecognized_factor_unit_is_counted_not_dropped():
+    factors = [{"id": "EF_ODD", "unit": "kg CO2e/kWh", "value": 0.5}]
+    assert np.isnan(factor_info("kg CO2e/kWh")[1])
+    ds = CarbonDataset.from_rows([
+        item("CI_1", "B6", 10, "kWh", "EF_ODD"),
+        item("CI_2", "B6", None, "kWh", "EF_ELEC_GRID"),
+        item("CI_3", "B6", 4, "kWh", "EF_ELEC_GRID"),
+    ], factors + FACTORS)
+    totals = compute(ds)
+    assert totals.total == pytest.approx(2.0)
+    assert (totals.unmatched, totals.unfactored, totals.unstaged) == (2, 0, 0)
@@ -0,0 +1,68 @@
+import csv
+
+from export_neo4j_import import ImportWriter, admin_command, export_assets, export_carbon_items
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def read_rows(w, name):
+    with open(w.dir / f"{name}.csv", newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def export(tmp_path, carbon_rows):
+    ifc = write_csv(tmp_path / "props.csv", ["GlobalId", "Name", "IfcClass"],
+                    [["G1", "Wall 1", "IfcWall"], ["G1", "Wall 1", "IfcWall"], ["G2", "AHU", "IfcUnitaryEquipment"]])
+    carbon = write_csv(tmp_path / "carbon_items.csv",
+                       ["carbon_id", "lifecycle_stage", "quantity", "unit", "asset_id", "factor_id"],
+                       carbon_rows)
+    w = ImportWriter(tmp_path / "out")
+    try:
+        assets = export_assets(w, ifc)
+        export_carbon_items(w, carbon, "ACT_TEST", assets, {"EF_ELEC_GRID"})
+    finally:
+        w.close()
+    return w
+
+
+def test_assets_are_deduplicated(tmp_path):
+    w = export(tmp_path, [])
+    assert [r[0] for r in read_rows(w, "assets")] == ["G1", "G2"]
+
+
+def test_repeated_carbon_id_keeps_last_row(tmp_path):
+    w = export(tmp_path, [
+        ["CI_1", "A1-A3", "10", "kg", "G1", ""],
+        ["CI_2", "B6", "100", "kWh", "G2", "EF_ELEC_GRID"],
+        ["CI_1", "A5", "12", "MJ", "G2", ""],
+    ])
+    items = read_rows(w, "carbon_items")
+    assert [(r[0], r[1], float(r[2])) for r in items] == [("CI_2", "B6", 100.0), ("CI_1", "A5", 12.0)]
+    assert read_rows(w, "rel_has_carbon_item") == [["G2", "CI_2", "HAS_CARBON_ITEM"],
+                                                   ["G2", "CI_1", "HAS_CARBON_ITEM"]]
+    assert read_rows(w, "rel_part_of_stage") == [["CI_2", "B6", "PART_OF_STAGE"],
+                                                 ["CI_1", "A5", "PART_OF_STAGE"]]
+    assert len(read_rows(w, "rel_prov_generated")) == 2
+
+
+def test_blank_quantity_rows_are_skipped(tmp_path):
+    w = export(tmp_path, [
+        ["CI_1", "A1-A3", "10", "kg", "", ""],
+        ["CI_2", "A5", "", "MJ", "", ""],
+        ["CI_1", "A1-A3", "n/a", "kg", "", ""],
+    ])
+    assert [(r[0], float(r[2])) for r in read_rows(w, "carbon_items")] == [("CI_1", 10.0)]
+    assert w.counts["carbon_items"] == 1
+
+
+def test_admin_command_lists_only_non_empty_files(tmp_path):
+    w = export(tmp_path, [["CI_1", "A5", "1", "MJ", "", ""]])
+    command = admin_command(w)
+    assert "--nodes=/import/carbon_items.csv" in command
+    assert "--relationships=/import/rel_linked_to_factor.csv" not in command
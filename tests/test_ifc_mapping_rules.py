@@ -0,0 +1,51 @@
+import pytest
+
+import ifc_mapping_rules as rules
+
+
+def test_overlapping_patterns_all_match():
+    table = rules._CompiledTable(enumerate([
+        {"match": "contains", "pattern": "Power"},
+        {"match": "regex", "pattern": r"Power_k?W"},
+        {"match": "contains", "pattern": "kW"},
+    ]))
+    assert table.matches("Power_kW") == {0, 1, 2}
+    assert table.matches("PowerRating") == {0}
+    assert table.matches("FlowRate") == set()
+
+
+def test_exact_rules_match_whole_text_only():
+    table = rules._CompiledTable(enumerate([
+        {"match": "exact", "pattern": "IfcFan"},
+        {"match": "contains", "pattern": "Fan"},
+    ]))
+    assert table.matches("IfcFan") == {0, 1}
+    assert table.matches("IfcFanType") == {1}
+
+
+def test_unknown_match_kind_is_rejected():
+    with pytest.raises(ValueError):
+        rules._CompiledTable([(0, {"match": "prefix", "pattern": "Ifc"})])
+
+
+def test_unit_comes_from_first_rule_with_unit_when_patterns_overlap(monkeypatch):
+    table = [
+        {"field": "Property", "match": "contains", "pattern": "Power", "unit": None},
+        {"field": "Property", "match": "contains", "pattern": "Power_kW", "unit": "kW"},
+        {"field": "Property", "match": "contains", "pattern": "_kW", "unit": "kWh"},
+    ]
+    monkeypatch.setattr(rules, "OPERATIONAL_RULES", table)
+    monkeypatch.setattr(rules, "_op_tables", {"Property": rules._CompiledTable(enumerate(table))})
+    rules.classify.cache_clear()
+    try:
+        decision = rules.classify("IfcUnitaryEquipment", "Pset_AHU_Performance", "Power_kW")
+        assert decision.operational and decision.unit == "kW"
+    finally:
+        rules.classify.cache_clear()
+
+
+def test_sample_decisions():
+    assert rules.classify("IfcSensor", "Pset_Sensor", "SensorType").asset_class == rules.SOSA.Sensor
+    d = rules.classify("IfcUnitaryEquipment", "Pset_AHU_Performance", "Power_kW")
+    assert (d.asset_class, d.operational, d.unit) == (rules.SDT.Asset, True, "kWh")
+    assert not rules.classify("IfcSpace", "Pset_Area", "GrossArea_m2").operational
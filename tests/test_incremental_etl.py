@@ -0,0 +1,128 @@
+import csv
+
+import pytest
+
+from carbon_stream import iter_carbon_rows
+from delta_manifest import DeltaManifest, file_fingerprint
+
+FIELDS = ["carbon_id", "lifecycle_stage", "quantity", "unit"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+
+def load(manifest_path, csv_path, tombstone=True):
+    """One incremental run: (ids written, ids reported deleted)."""
+    manifest = DeltaManifest(str(manifest_path), "carbon_items.csv")
+    fingerprint = file_fingerprint(csv_path)
+    written = [item["id"] for item in manifest.filter_changed(iter_carbon_rows(csv_path))]
+    deleted = [i for ids in manifest.iter_deleted(100) for i in ids]
+    manifest.commit(fingerprint, tombstoned=tombstone)
+    manifest.close()
+    return written, deleted
+
+
+def unchanged(manifest_path, csv_path):
+    manifest = DeltaManifest(str(manifest_path), "carbon_items.csv")
+    try:
+        return manifest.file_unchanged(csv_path)
+    finally:
+        manifest.close()
+
+
+def test_tombstoned_row_is_rewritten_when_it_reappears(tmp_path):
+    manifest, data = tmp_path / "manifest.sqlite", tmp_path / "carbon_items.csv"
+    a, b = ["CI_A", "A1-A3", "10", "kg"], ["CI_B", "A5", "2", "MJ"]
+
+    write_csv(data, [a, b])
+    assert load(manifest, data) == (["CI_A", "CI_B"], [])
+    write_csv(data, [a])
+    assert load(manifest, data) == ([], ["CI_B"])
+    write_csv(data, [a, b])
+    assert load(manifest, data) == (["CI_B"], [])
+
+
+def test_deleted_rows_are_kept_until_a_tombstoning_run(tmp_path):
+    manifest, data = tmp_path / "manifest.sqlite", tmp_path / "carbon_items.csv"
+    a, b = ["CI_A", "A1-A3", "10", "kg"], ["CI_B", "A5", "2", "MJ"]
+
+    write_csv(data, [a, b])
+    load(manifest, data)
+    write_csv(data, [a])
+    assert load(manifest, data, tombstone=False) == ([], ["CI_B"])
+    # CI_B is still live in Neo4j: the file is parsed again and still reports it
+    assert not unchanged(manifest, data)
+    assert load(manifest, data, tombstone=False) == ([], ["CI_B"])
+    assert load(manifest, data, tombstone=True) == ([], ["CI_B"])
+    assert unchanged(manifest, data)
+    assert load(manifest, data) == ([], [])
+
+
+def test_file_replaced_during_the_run_is_loaded_again(tmp_path):
+    manifest, data = tmp_path / "manifest.sqlite", tmp_path / "carbon_items.csv"
+    write_csv(data, [["CI_A", "A1-A3", "10", "kg"]])
+    fingerprint = file_fingerprint(data)
+    db = DeltaManifest(str(manifest), "carbon_items.csv")
+    list(db.filter_changed(iter_carbon_rows(data)))
+    write_csv(data, [["CI_A", "A1-A3", "10", "kg"], ["CI_C", "C1", "1", "kg"]])  # replaced mid-run
+    db.commit(fingerprint, tombstoned=True)
+    db.close()
+
+    assert not unchanged(manifest, data)
+    assert load(manifest, data) == (["CI_C"], [])
+
+
+@pytest.fixture
+def run_etl():
+    pytest.importorskip("neo4j")
+    import run_etl
+    return run_etl
+
+
+def test_reingested_carbon_item_is_live_again(neo4j_driver, run_etl):
+    item = {"id": "CI_TEST_TOMBSTONE", "stage": "A5", "qty": 2.0, "unit": "MJ"}
+    query = "MATCH (c:CarbonItem {id: $id}) RETURN c.deleted AS deleted, c.deletedAt AS at"
+    with neo4j_driver.session() as session:
+        try:
+            session.execute_write(run_etl.write_carbon_batch, [item])
+            session.execute_write(run_etl.write_tombstone_batch, [item["id"]])
+            assert session.run(query, id=item["id"]).single()["deleted"] is True
+
+            session.execute_write(run_etl.write_carbon_batch, [item])
+            record = session.run(query, id=item["id"]).single()
+            assert record["deleted"] is None and record["at"] is None
+        finally:
+            session.run("MATCH (c:CarbonItem {id: $id}) DETACH DELETE c", id=item["id"]).consume()
+
+
+class RecordingTx:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, query, **params):
+        self.calls.append((query, params))
+        return self
+
+    def consume(self):
+        pass
+
+
+def test_recorder_has_one_part_activity_per_writer(tmp_path):
+    from provenance import ProvenanceRecorder
+
+    data = tmp_path / "carbon_items.csv"
+    write_csv(data, [["CI_A", "A1-A3", "10", "kg"]])
+    recorder = ProvenanceRecorder("test", str(data), writers=3)
+    assert recorder.part_ids == [f"{recorder.activity_id}_W{n}" for n in range(3)]
+    assert ProvenanceRecorder("test", str(data)).part_ids == [recorder.activity_id + "_W0"]
+
+    tx = RecordingTx()
+    recorder.record(tx)
+    recorder.finish(tx)
+    (merge, params), (finish, finish_params) = tx.calls
+    assert params["parts"] == recorder.part_ids and "PART_OF_ACTIVITY" in merge
+    assert finish_params == {"id": recorder.activity_id} and "lastExecutedAt" in finish
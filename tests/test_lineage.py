@@ -0,0 +1,194 @@
+import pytest
+
+import lineage
+from lineage import LineageService, TTLCache
+
+# ---------- In-memory PROV graph (no Neo4j needed) ----------
+
+class Result(list):
+    def single(self):
+        return self[0]
+
+
+class Record(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeGraph:
+    """PROV_GENERATED / PROV_USED edges plus a database clock in epoch ms."""
+
+    def __init__(self):
+        self.generated = {}   # node id -> activity ids
+        self.used = {}        # activity id -> entity ids
+        self.stamps = {}      # activity id -> lastExecutedAt
+        self.clock = 1_000_000
+        self.queries = []
+
+    def write(self, act, node, used=()):
+        self.clock += 1000
+        self.generated.setdefault(node, set()).add(act)
+        self.used.setdefault(act, set()).update(used)
+        self.stamps[act] = self.clock
+
+    def session(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        g = self.graph
+        self.graph.queries.append(query)
+        if query.startswith("RETURN toString(datetime())"):
+            return Result([Record(now=g.clock)])
+        if query == lineage.NEW_ACTIVITIES:
+            since = params["since"] - params["slack"] * 1000
+            return Result(Record(id=a, stamp=t) for a, t in g.stamps.items() if t > since)
+        if query == lineage.ACTIVITY_SUMMARY:
+            return Result(Record(id=a, name=f"ingest {a}", source=None, tool="run_etl.py",
+                                 executedAt=None, lastExecutedAt=None, partOf=None,
+                                 used=sorted(g.used.get(a, ())), agents=["AGENT_ETL"])
+                          for a in params["ids"] if a in g.used)
+        if "PROV_GENERATED" in query:
+            return Result(Record(id=i, acts=sorted(g.generated.get(i, ())))
+                          for i in params["ids"] if i in g.generated)
+        raise AssertionError(f"unexpected query: {query}")
+
+
+def generated_by_queries(graph):
+    return sum("PROV_GENERATED" in q for q in graph.queries)
+
+
+@pytest.fixture
+def graph():
+    g = FakeGraph()
+    g.write("ACT_SRC", "E_RAW", used=["E_SITE"])
+    g.write("ACT_INGEST", "CI_1", used=["E_RAW"])
+    g.write("ACT_INGEST", "CI_2", used=["E_RAW"])
+    return g
+
+
+def test_ttl_cache_evicts_lru_and_expires(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(lineage.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10.0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # "b" is least recently used
+    assert cache.get("b") is None and cache.get("a") == 1
+    now[0] = 11.0
+    assert cache.get("a") is None and len(cache) == 1
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_levels_follow_used_entities_up_to_depth(graph):
+    service = LineageService(graph, poll=0.0)
+    deep = service.lineage("CarbonItem", "CI_1", depth=2)
+    assert [(a["id"], a["level"]) for a in deep["activities"]] == [("ACT_INGEST", 0), ("ACT_SRC", 1)]
+    assert deep["entities"] == ["E_RAW", "E_SITE"]
+    assert deep["agents"] == ["AGENT_ETL"]
+    shallow = service.lineage("CarbonItem", "CI_1", depth=1)
+    assert [a["id"] for a in shallow["activities"]] == ["ACT_INGEST"]
+    with pytest.raises(ValueError):
+        service.lineage("Asset", "A1")
+
+
+def test_cached_lookup_issues_no_traversal(graph):
+    service = LineageService(graph, poll=3600.0)
+    first = service.lineage_many("CarbonItem", ["CI_1", "CI_2"])
+    before = generated_by_queries(graph)
+    assert service.lineage_many("CarbonItem", ["CI_1", "CI_2"]) == first
+    assert generated_by_queries(graph) == before
+
+
+def test_new_activity_drops_only_what_it_touches(graph):
+    service = LineageService(graph, poll=0.0)
+    service.lineage_many("CarbonItem", ["CI_1", "CI_2"])
+    graph.write("ACT_FIX", "CI_1", used=["E_PATCH"])
+
+    result = service.lineage_many("CarbonItem", ["CI_1", "CI_2"])
+    assert {a["id"] for a in result["CI_1"]["activities"]} == {"ACT_INGEST", "ACT_FIX", "ACT_SRC"}
+    assert ("CarbonItem", "CI_2", 2) in dict(service.cache.items())
+
+
+def test_running_activity_is_rechecked_only_when_its_stamp_moves(graph):
+    service = LineageService(graph, poll=0.0)
+    service.lineage("CarbonItem", "CI_1")
+    service.lineage("CarbonItem", "CI_1")  # ACT_INGEST is in the look-back window: handled once
+    settled = generated_by_queries(graph)
+    for _ in range(3):
+        service.lineage("CarbonItem", "CI_1")
+    assert generated_by_queries(graph) == settled
+    assert service.cache.hits >= 3
+
+    graph.write("ACT_INGEST", "CI_3", used=["E_RAW"])  # another batch of the same run
+    service.lineage("CarbonItem", "CI_1")
+    assert generated_by_queries(graph) > settled
+    after = generated_by_queries(graph)
+    service.lineage("CarbonItem", "CI_1")
+    assert generated_by_queries(graph) == after
+
+
+def test_invalidate_by_upstream_entity(graph):
+    service = LineageService(graph, poll=3600.0)
+    service.lineage_many("CarbonItem", ["CI_1", "CI_2"])
+    service.invalidate(["E_SITE"])
+    assert len(service.cache) == 0
+    service.lineage_many("CarbonItem", ["CI_1", "CI_2"])
+    service.invalidate(["CI_2"])
+    assert [k[1] for k, _ in service.cache.items()] == ["CI_1"]
+
+
+# ---------- Against Neo4j ----------
+
+
+@pytest.fixture
+def etl():
+    pytest.importorskip("neo4j")
+    import run_etl
+    from lineage import LineageService
+    import provenance
+    return run_etl, LineageService, provenance
+
+
+def test_cached_lineage_sees_batches_committed_after_the_run_started(neo4j_driver, etl, tmp_path):
+    run_etl, LineageService, provenance = etl
+    item = {"id": "CI_TEST_LINEAGE", "stage": "B6", "qty": 1.0, "unit": "kWh"}
+    recorders = []
+    for name in ("lineage_a.csv", "lineage_b.csv"):
+        path = tmp_path / name
+        path.write_text(f"carbon_id\n{name}\n", encoding="utf-8")
+        recorders.append(provenance.ProvenanceRecorder("test_lineage", str(path)))
+    first, second = recorders
+    service = LineageService(neo4j_driver, poll=0.0)
+
+    def activities():
+        return [a["id"] for a in service.lineage("CarbonItem", item["id"])["activities"]]
+
+    with neo4j_driver.session() as session:
+        try:
+            session.execute_write(first.record)
+            session.execute_write(run_etl.write_carbon_batch, [item], first.part_ids[0])
+            assert activities() == [first.part_ids[0]]
+
+            # Second run: the activity is recorded, a lookup polls, and only
+            # then does the run's batch add its PROV_GENERATED edge
+            session.execute_write(second.record)
+            assert activities() == [first.part_ids[0]]
+            session.execute_write(run_etl.write_carbon_batch, [item], second.part_ids[0])
+            assert set(activities()) == {first.part_ids[0], second.part_ids[0]}
+        finally:
+            session.run("MATCH (c:CarbonItem {id: $id}) DETACH DELETE c", id=item["id"]).consume()
+            for r in recorders:
+                session.run("MATCH (n) WHERE n.id IN $ids DETACH DELETE n",
+                            ids=[r.activity_id, *r.part_ids, provenance.entity_id(r.source)]).consume()
@@ -0,0 +1,80 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from observation_stream import parse_timestamps, transform_chunk
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "docker" / "etl"
+
+
+def test_canonical_chunk_is_converted_to_utc():
+    ts = ["2024-05-01T08:00:00Z", "2024-05-01T09:15:00+08:00", "2024-05-01T08:00:00.250", "2024-05-01T08:00"]
+    out, ok = parse_timestamps(ts)
+    assert ok.all()
+    assert out == ["2024-05-01T08:00:00Z", "2024-05-01T01:15:00Z", "2024-05-01T08:00:00Z", "2024-05-01T08:00:00Z"]
+
+
+def test_utc_chunk_passes_through_unchanged():
+    ts = ["2024-05-01T08:00:00Z", "2024-02-29T23:59:59Z"]
+    out, ok = parse_timestamps(ts)
+    assert out == ts and ok.all()
+
+
+@pytest.mark.parametrize("raw, canonical", [
+    ("2024-05-01 08:00:00", "2024-05-01T08:00:00Z"),
+    ("2024-05-01T08", "2024-05-01T08:00:00Z"),
+    (" 2024-05-01T08:30 ", "2024-05-01T08:30:00Z"),
+    ("2024-05-01 00:30:00-02:00", "2024-05-01T02:30:00Z"),
+    ("2025-10-01T14:00Z", "2025-10-01T14:00:00Z"),
+])
+def test_non_canonical_timestamps_are_normalized(raw, canonical):
+    out, ok = parse_timestamps([raw])
+    assert out == [canonical] and ok.all()
+
+
+def test_same_instant_gets_the_same_ids():
+    row = ["S1", "2", "kWh", "A1"]
+    a = transform_chunk([["2025-10-01T14:00Z"] + row], 0.5)
+    b = transform_chunk([["2025-10-01 14:00:00+00:00"] + row], 0.5)
+    c = transform_chunk([["2025-10-01T22:00:00+08:00"] + row], 0.5)
+    assert a[0]["id"] == b[0]["id"] == c[0]["id"] == ["OBS_S1_2025-10-01T14:00:00Z"]
+    assert a[1]["id"] == b[1]["id"] == c[1]["id"]
+    assert a[1]["hour"] == c[1]["hour"] == ["2025-10-01T14"]
+
+
+@pytest.mark.parametrize("raw", ["2024-5-1T8:00", "2024-02-30T01:00:00", "2024-13-01T00:00", "yesterday", ""])
+def test_invalid_timestamps_are_rejected(raw):
+    _, ok = parse_timestamps(["2024-05-01T08:00:00", raw])
+    assert ok.tolist() == [True, False]
+
+
+def test_hour_buckets_use_normalized_timestamps():
+    rows = [
+        ["2024-05-01 08:45:00", "S1", "1500", "Wh", "A1"],
+        ["2024-05-01T09:00:00", "S1", "2", "kWh", "A1"],
+        ["2024-5-1 10:00", "S1", "3", "kWh", "A1"],
+        ["2024-05-01T10:00:00", "S1", "x", "kWh", "A1"],
+    ]
+    observations, carbon, rejected = transform_chunk(rows, 0.5)
+    assert rejected == 2
+    assert observations["t"] == ["2024-05-01T08:45:00Z", "2024-05-01T09:00:00Z"]
+    assert carbon["hour"] == ["2024-05-01T08", "2024-05-01T09"]
+    assert np.allclose(carbon["kwh"], [1.5, 2.0])
+    assert np.allclose(carbon["kg"], [0.75, 1.0])
+
+
+def test_carbon_mode_does_not_import_numpy():
+    pytest.importorskip("neo4j")
+    code = (
+        "import sys\n"
+        "class Block:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        "        if name.split('.')[0] == 'numpy':\n"
+        "            raise ImportError('numpy blocked')\n"
+        "sys.meta_path.insert(0, Block())\n"
+        "import run_etl\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ETL_DIR, check=True)
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+pytest.importorskip("neo4j")
+from neo4j.exceptions import TransientError  # noqa: E402
+
+from parallel_writer import ParallelWriter, write_with_retry  # noqa: E402
+
+
+class FakeTx:
+    def __init__(self, session):
+        self.session = session
+
+    def commit(self):
+        self.session.commits += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.commits = 0
+
+    def begin_transaction(self):
+        return FakeTx(self)
+
+    def execute_write(self, *args, **kwargs):
+        raise AssertionError("execute_write retries on its own; the writer must not nest it")
+
+    def __enter__(self):
+        self.driver.open += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.driver.open -= 1
+        return False
+
+
+class FakeDriver:
+    def __init__(self):
+        self.open = 0
+
+    def session(self):
+        return FakeSession(self)
+
+
+def test_write_with_retry_retries_transient_errors_once_per_attempt():
+    session = FakeSession(FakeDriver())
+    calls = []
+
+    def work(tx, batch):
+        calls.append(batch)
+        if len(calls) < 3:
+            raise TransientError("deadlock")
+
+    assert write_with_retry(session, work, [1], base_delay=0) == 2
+    assert len(calls) == 3
+    assert session.commits == 1
+
+
+def test_write_with_retry_gives_up_after_max_retries():
+    session = FakeSession(FakeDriver())
+
+    def work(tx, batch):
+        raise TransientError("deadlock")
+
+    with pytest.raises(TransientError):
+        write_with_retry(session, work, [1], max_retries=2, base_delay=0)
+
+
+def test_failed_worker_stops_and_joins_healthy_workers():
+    driver = FakeDriver()
+    written = []
+    lock = threading.Lock()
+
+    def work(tx, batch):
+        if any(item["id"] == 7 for item in batch):
+            raise ValueError("bad row")
+        with lock:
+            written.extend(batch)
+
+    writer = ParallelWriter(driver, work, workers=4, batch_size=1, queue_depth=1, max_retries=0)
+    with pytest.raises(ValueError, match="bad row"):
+        writer.write({"id": i} for i in range(200))
+
+    assert driver.open == 0
+    assert not [t for t in threading.enumerate() if t.name.startswith("sdt-writer-")]
+
+
+def test_write_returns_row_count():
+    driver = FakeDriver()
+    writer = ParallelWriter(driver, lambda tx, batch: None, workers=3, batch_size=4)
+    assert writer.write({"id": i} for i in range(50)) == 50
+    assert driver.open == 0
+
+
+def test_each_worker_uses_its_own_work_function():
+    from parallel_writer import partition_of
+
+    seen = {}
+    lock = threading.Lock()
+
+    def work_for(part):
+        def work(tx, batch):
+            with lock:
+                seen.setdefault(part, set()).update(item["id"] for item in batch)
+        return work
+
+    writer = ParallelWriter(FakeDriver(), [work_for(f"ACT_W{n}") for n in range(3)], workers=3, batch_size=5)
+    assert writer.write({"id": i} for i in range(60)) == 60
+    for part, ids in seen.items():
+        assert {f"ACT_W{partition_of(i, 3)}" for i in ids} == {part}
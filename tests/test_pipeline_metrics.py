@@ -0,0 +1,174 @@
+import json
+import os
+
+import pytest
+
+from pipeline_metrics import Metrics, _merge_prometheus, prometheus_lines
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeTx:
+    def __init__(self, log):
+        self.log = log
+
+    def run(self, query, **params):
+        self.log.append(query)
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.log.append("ROLLBACK" if exc[0] else "COMMIT")
+        return False
+
+
+class FakeSession:
+    def __init__(self, log):
+        self.log = log
+
+    def run(self, query, **params):
+        self.log.append(query)
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(FakeTx(self.log), *args, **kwargs)
+
+    execute_read = execute_write
+
+    def begin_transaction(self):
+        return FakeTx(self.log)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeDriver:
+    def __init__(self):
+        self.log = []
+
+    def session(self, **kwargs):
+        return FakeSession(self.log)
+
+
+def neo4j_counts(rec):
+    return rec["neo4j_queries"], rec["neo4j_transactions"], rec["neo4j_round_trips"]
+
+
+def test_execute_write_counts_one_transaction_and_its_queries():
+    m = Metrics(script="test")
+    driver = m.instrument_driver(FakeDriver())
+    with m.stage("write") as st, driver.session() as session:
+        session.execute_write(lambda tx: [tx.run("A"), tx.run("B")])
+        session.execute_read(lambda tx: tx.run("C"))
+        session.run("D")  # auto-commit: one query, no explicit transaction
+        st.count(4)
+    assert neo4j_counts(m.stages[0]) == (4, 2, 6)
+    assert driver._driver.log == ["A", "B", "C", "D"]
+
+
+def test_begin_transaction_counts_commits_once():
+    m = Metrics(script="test")
+    driver = m.instrument_driver(FakeDriver())
+    with m.stage("explicit"), driver.session() as session:
+        with session.begin_transaction() as tx:  # leaving the block commits
+            tx.run("A")
+            tx.run("B")
+        with session.begin_transaction() as tx:  # commit() then leaving: one transaction
+            tx.run("C")
+            tx.commit()
+        tx = session.begin_transaction()
+        tx.run("D")
+        tx.commit()
+    assert neo4j_counts(m.stages[0]) == (4, 3, 7)
+
+
+def test_rolled_back_transaction_is_not_counted():
+    m = Metrics(script="test")
+    driver = m.instrument_driver(FakeDriver())
+    with pytest.raises(ValueError), m.stage("failing"), driver.session() as session:
+        with session.begin_transaction() as tx:
+            tx.run("A")
+            raise ValueError
+    rec = m.stages[0]
+    assert rec["error"] == "ValueError"
+    assert neo4j_counts(rec) == (1, 0, 1)
+    assert driver._driver.log == ["A", "ROLLBACK"]
+
+
+def test_counts_are_per_stage_and_run_totals_add_up():
+    m = Metrics(script="test")
+    driver = m.instrument_driver(FakeDriver())
+    with driver.session() as session:
+        with m.stage("first"):
+            session.execute_write(lambda tx: tx.run("A"))
+        with m.stage("offline") as st:
+            st.count(10)
+        with m.stage("second"):
+            session.execute_write(lambda tx: [tx.run("B"), tx.run("C")])
+    first, offline, second = m.stages
+    assert neo4j_counts(first) == (1, 1, 2)
+    assert "neo4j_round_trips" not in offline
+    assert neo4j_counts(second) == (2, 1, 3)
+    trace = m.trace()
+    assert (trace["neo4j_queries"], trace["neo4j_transactions"], trace["neo4j_round_trips"]) == (3, 2, 5)
+
+
+def test_merge_prometheus_replaces_only_this_scripts_samples(tmp_path):
+    path = str(tmp_path / "sdt.prom")
+    for script, items in (("extract", 5), ("validate", 7)):
+        m = Metrics(script=script)
+        with m.stage("load") as st:
+            st.count(items)
+        m.write(path)
+
+    rerun = Metrics(script="extract")
+    with rerun.stage("load") as st:
+        st.count(9)
+    rerun.write(path)
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    items = [line for line in lines if line.startswith("sdt_stage_items{")]
+    assert sorted(items) == [
+        'sdt_stage_items{script="extract",stage="load",unit="items"} 9',
+        'sdt_stage_items{script="validate",stage="load",unit="items"} 7',
+    ]
+    assert lines.count("# TYPE sdt_stage_items gauge") == 1
+    assert sum(line.startswith('sdt_run_seconds{script="extract"}') for line in lines) == 1
+
+
+def test_merge_prometheus_without_existing_file(tmp_path):
+    m = Metrics(script="solo")
+    with m.stage("parse") as st:
+        st.count(3)
+    text = _merge_prometheus(str(tmp_path / "missing.prom"), m.script, prometheus_lines(m.trace()))
+    assert 'sdt_stage_items{script="solo",stage="parse",unit="items"} 3' in text.splitlines()
+
+
+def test_jsonl_appends_one_run_per_line(tmp_path):
+    path = str(tmp_path / "pipeline.jsonl")
+    for script in ("extract", "validate"):
+        m = Metrics(script=script)
+        with m.stage("load"):
+            pass
+        m.write(path)
+    with open(path, encoding="utf-8") as f:
+        runs = [json.loads(line) for line in f]
+    assert [run["script"] for run in runs] == ["extract", "validate"]
+    assert [run["stages"][0]["stage"] for run in runs] == ["load", "load"]
+
+
+def test_th2_and_etl_copies_are_identical():
+    copies = [os.path.join(ROOT, "docker", "etl", "pipeline_metrics.py"),
+              os.path.join(ROOT, "TH2-integration", "generate_input_data", "ifc", "pipeline_metrics.py")]
+    texts = []
+    for path in copies:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    assert texts[0] == texts[1]
@@ -0,0 +1,146 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, Namespace, RDF, RDFS
+
+import validate_shacl as vs
+
+IMPORT_DIR = Path(__file__).resolve().parent.parent / "TH1-ontology" / "ttl_package" / "import"
+SDT = Namespace("http://builtinsight.io/ontology/sdt#")
+SOSA = Namespace("http://www.w3.org/ns/sosa/")
+
+# Sensors must monitor an sdt:Asset; the link itself has no rdfs:range here
+SENSOR_SHAPE = """
+@prefix sdt:  <http://builtinsight.io/ontology/sdt#> .
+@prefix sosa: <http://www.w3.org/ns/sosa/> .
+@prefix sh:   <http://www.w3.org/ns/shacl#> .
+sdt:SensorMonitorsShape a sh:NodeShape ;
+    sh:targetClass sosa:Sensor ;
+    sh:property [ sh:path sdt:monitors ; sh:class sdt:Asset ] .
+"""
+
+
+@pytest.fixture(scope="module")
+def shapes():
+    return vs.load_shapes(str(IMPORT_DIR / "sdt_tbox_s1.ttl"), cache_dir="0")
+
+
+@pytest.fixture
+def ntu():
+    return Graph().parse(IMPORT_DIR / "dataset" / "ntu_campus_sample.ttl", format="turtle")
+
+
+def assert_same_reports(data, shapes, n_shards=3):
+    full_conforms, full = vs.validate_full(data, shapes)
+    sharded_conforms, sharded = vs.validate_sharded(data, shapes, n_shards, workers=2)
+    assert sharded_conforms == full_conforms
+    assert vs.compare_reports(vs.csv_rows(full), vs.csv_rows(sharded))
+    return full
+
+
+def test_sharded_matches_full_on_ntu_sample(ntu, shapes):
+    # Break a few observations so the comparison covers actual results
+    for i in range(8):
+        obs = SDT[f"Obs1{i:02d}"]
+        ntu.add((obs, RDF.type, SOSA.Observation))
+        if i % 2:
+            ntu.add((obs, SOSA.madeBySensor, SDT.Sensor_01))
+        if i % 3:
+            ntu.add((obs, SOSA.hasFeatureOfInterest, SDT.Asset001))
+    full = assert_same_reports(ntu, shapes)
+    assert len(full) == 4 + 3
+
+
+def test_sharded_sees_types_inferred_from_range_in_other_shards(ntu, shapes):
+    shapes = shapes + Graph().parse(data=SENSOR_SHAPE, format="turtle")
+    # Chiller07 is only typed through rdfs:range of a triple owned by another shard
+    ntu.add((SDT.aboutAsset, RDFS.range, SDT.Asset))
+    ntu.add((SDT.AAA_Result, SDT.aboutAsset, SDT.Chiller07))
+    ntu.add((SDT.Sensor_ZZ, RDF.type, SOSA.Sensor))
+    ntu.add((SDT.Sensor_ZZ, SDT.monitors, SDT.Chiller07))
+    ntu.add((SDT.Sensor_ZY, RDF.type, SOSA.Sensor))
+    ntu.add((SDT.Sensor_ZY, SDT.monitors, SDT.Pump03))  # untyped: a real violation
+    full = assert_same_reports(ntu, shapes, n_shards=4)
+    assert [str(r[0]) for r in full] == [str(SDT.Sensor_ZY)]
+
+
+def test_inverse_path_shapes_are_validated_unsharded(ntu, shapes):
+    shapes = shapes + Graph().parse(data="""
+        @prefix sdt:  <http://builtinsight.io/ontology/sdt#> .
+        @prefix sh:   <http://www.w3.org/ns/shacl#> .
+        sdt:MonitoredAssetShape a sh:NodeShape ;
+            sh:targetClass sdt:Asset ;
+            sh:property [ sh:path [ sh:inversePath sdt:monitors ] ; sh:minCount 1 ] .
+    """, format="turtle")
+    ntu.add((SDT.ZZ_Asset, RDF.type, SDT.Asset))
+    full = assert_same_reports(ntu, shapes)
+    assert [str(r[0]) for r in full] == [str(SDT.ZZ_Asset)]
+
+
+def test_range_types_follow_sub_properties():
+    g = Graph()
+    g.add((SDT.aboutAsset, RDFS.range, SDT.Asset))
+    g.add((SDT.aboutChiller, RDFS.subPropertyOf, SDT.aboutAsset))
+    g.add((SDT.R1, SDT.aboutChiller, SDT.Chiller07))
+    assert vs.range_types(g) == [(SDT.Chiller07, RDF.type, SDT.Asset)]
+
+
+def brute_force_ancestors(edges):
+    closed = {n: set(ps) for n, ps in edges.items()}
+    changed = True
+    while changed:
+        changed = False
+        for n, ps in closed.items():
+            new = set().union(*(closed.get(p, set()) for p in ps)) - ps
+            if new:
+                ps |= new
+                changed = True
+    return closed
+
+
+def test_ancestors_close_cycles_completely():
+    closed = vs._ancestors({"A": ["B", "C"], "B": ["A"]})
+    assert closed["B"] == {"A", "B", "C"}
+    assert closed["A"] == {"A", "B", "C"}
+    assert closed["C"] == set()
+
+
+def test_ancestors_match_fixpoint_on_random_graphs():
+    import random
+    rng = random.Random(7)
+    for _ in range(200):
+        nodes = list("ABCDEFGH")
+        edges = {n: set(rng.sample(nodes, rng.randint(0, 3))) for n in rng.sample(nodes, 6)}
+        closed = vs._ancestors(edges)
+        for node, expected in brute_force_ancestors(edges).items():
+            assert closed[node] == expected, (edges, node)
+
+
+def test_materialize_types_instances_through_equivalent_classes():
+    closure = vs.close_axioms(vs.axioms_of([
+        (SDT.A, RDFS.subClassOf, SDT.B), (SDT.A, RDFS.subClassOf, SDT.C), (SDT.B, RDFS.subClassOf, SDT.A),
+    ]))
+    g = Graph()
+    g.add((SDT.x, RDF.type, SDT.B))
+    types = set(vs.materialize(g, closure).objects(SDT.x, RDF.type))
+    assert types == {SDT.A, SDT.B, SDT.C}
+
+
+def test_th1_copy_runs_with_the_shared_modules(tmp_path):
+    """The TH1 script has no graph_cache/pipeline_metrics next to it; it imports TH2's."""
+    script = IMPORT_DIR / "validate_shacl.py"
+    assert script.read_bytes() == Path(vs.__file__).read_bytes()
+    assert not (IMPORT_DIR / "pipeline_metrics.py").exists()
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONPATH"}
+    env["SDT_GRAPH_CACHE"] = "0"
+    report = tmp_path / "report.csv"
+    proc = subprocess.run(
+        [sys.executable, str(script), str(IMPORT_DIR / "dataset" / "ntu_campus_sample.ttl"),
+         str(IMPORT_DIR / "sdt_tbox_s1.ttl"), str(report)],
+        cwd=tmp_path, env=env, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert report.exists()